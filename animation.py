@@ -0,0 +1,68 @@
+# animation.py
+import time
+
+
+class PathAnimation:
+    # Draws a route's arrows from Tk after() callbacks, so the main loop keeps handling events
+    # between frames. Each frame draws up to steps_per_frame legs but stops once frame_budget
+    # milliseconds have been spent; the next frame is scheduled frame_interval milliseconds later.
+    # on_done runs once, after the last arrow or when skip() jumps to the end.
+    def __init__(self, root, renderer, path, on_done=None, frame_interval=100, frame_budget=8,
+                 steps_per_frame=1):
+        self.root = root
+        self.renderer = renderer
+        self.path = path
+        self.on_done = on_done
+        self.frame_interval = frame_interval
+        self.frame_budget = frame_budget
+        self.steps_per_frame = steps_per_frame
+        self.step = 0
+        self.pending = None
+        self.finished = False
+
+    def start(self):
+        self.pending = self.root.after_idle(self._frame)
+
+    def _draw_step(self):
+        self.renderer.arrow(self.path[self.step], self.path[self.step + 1])
+        self.step += 1
+
+    def _frame(self):
+        self.pending = None
+        deadline = time.perf_counter() + self.frame_budget / 1000
+        drawn = 0
+        while self.step < len(self.path) - 1 and drawn < self.steps_per_frame:
+            self._draw_step()
+            drawn += 1
+            if time.perf_counter() >= deadline:
+                break
+        if self.step < len(self.path) - 1:
+            self.pending = self.root.after(self.frame_interval, self._frame)
+        else:
+            self._finish()
+
+    def skip(self):
+        # Draw every remaining leg now and finish
+        if self.finished:
+            return
+        self._cancel_pending()
+        while self.step < len(self.path) - 1:
+            self._draw_step()
+        self._finish()
+
+    def cancel(self):
+        # Stop without running on_done
+        self._cancel_pending()
+        self.finished = True
+
+    def _cancel_pending(self):
+        if self.pending is not None:
+            self.root.after_cancel(self.pending)
+            self.pending = None
+
+    def _finish(self):
+        if self.finished:
+            return
+        self.finished = True
+        if self.on_done is not None:
+            self.on_done()
@@ -0,0 +1,211 @@
+# batch.py
+# Headless order planning: python batch.py orders.jsonl -o routes.jsonl
+import argparse
+import csv
+import json
+import logging
+import os
+import re
+import sys
+import time
+from itertools import islice
+
+import database
+from database import get_cost_map, get_grid_snapshot, get_grid_dimensions, get_layout_version, pick_orders
+from grid import OccupancyGrid
+from landmarks import LandmarkIndex
+from spa import PathFinder
+
+logger = logging.getLogger('StockBot.batch')
+
+
+def read_orders(file, fmt):
+    # Yields (order_id, points, start, end, error); start/end are None when the order leaves them out.
+    # A record that cannot be read yields an error message, with points None, instead of ending the
+    # stream; its order_id falls back to the record's number like any order without one.
+    # JSONL: {"order_id": "A1", "points": [12, 40], "start": 1, "end": 100}
+    # CSV:   order_id,points[,start,end] with points separated by spaces or semicolons
+    if fmt == 'csv':
+        for number, record in enumerate(csv.DictReader(file), 1):
+            order_id = record.get('order_id') or str(number)
+            try:
+                if record.get('points') is None:
+                    raise ValueError("no points field")
+                points = [int(p) for p in record['points'].replace(';', ' ').split()]
+                yield (order_id, points,
+                       int(record['start']) if record.get('start') else None,
+                       int(record['end']) if record.get('end') else None, None)
+            except ValueError as e:
+                yield order_id, None, None, None, f"Invalid order record {number}: {e}"
+        return
+    for number, line in enumerate(file, 1):
+        if not line.strip():
+            continue
+        order_id = str(number)
+        try:
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError("not a JSON object")
+            order_id = str(record.get('order_id', number))
+            if 'points' not in record:
+                raise ValueError("no points field")
+            start = record.get('start')
+            end = record.get('end')
+            yield (order_id, [int(p) for p in record['points']],
+                   None if start is None else int(start), None if end is None else int(end), None)
+        except (ValueError, TypeError) as e:
+            yield order_id, None, None, None, f"Invalid order on line {number}: {e}"
+
+
+def plan_orders(orders, pathfinder, start, end, quantities=None, keep_points=False, profile_dir=None,
+                landmarks=False):
+    # Plans each order (as yielded by read_orders) against the pathfinder's grid and yields one
+    # result dict per order; orders read with an error are passed through as failed results.
+    # With quantities (from get_grid_snapshot), out-of-stock picks are skipped like in the GUI.
+    # keep_points leaves the planned picks in result['points'] for commit_picks.
+    # profile_dir gets a cProfile dump per order, named after the order id.
+    # landmarks loads or builds the pathfinder's landmark index at the first order without
+    # picks, the only orders planned with A*.
+    for order_id, points, order_start, order_end, error in orders:
+        order_start = order_start or start
+        order_end = order_end or end
+        result = {'order_id': order_id, 'start': order_start, 'end': order_end}
+        if error is not None:
+            result['error'] = error
+            result['seconds'] = 0.0
+            yield result
+            continue
+        skipped = [p for p in points if quantities is not None and 0 < p <= len(quantities)
+                   and quantities[p - 1] == 0]
+        valid_points = [p for p in points if p not in skipped]
+        if keep_points:
+            result['points'] = valid_points
+        began = time.perf_counter()
+        try:
+            if order_start in points or order_end in points:
+                raise ValueError("Order contains the start and/or end point")
+            profile = None
+            if profile_dir is not None:
+                profile = os.path.join(profile_dir, re.sub(r'[^\w.-]', '_', order_id) + '.prof')
+            if landmarks and not valid_points and pathfinder.landmarks is None:
+                pathfinder.landmarks = LandmarkIndex.for_grid(pathfinder.grid)
+            path = pathfinder.find_shortest_path(order_start, order_end, valid_points, profile)
+            if not path:
+                raise ValueError("No path found between the given points")
+            result.update(route=pathfinder.route, path=path, distance=len(path) - 1,
+                          cost=pathfinder.path_cost(path), skipped=skipped)
+        except (ValueError, KeyError, IndexError) as e:
+            result['error'] = str(e)
+        result['seconds'] = round(time.perf_counter() - began, 6)
+        yield result
+
+
+def batches(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def commit_picks(results, all_or_nothing=False):
+    # Take stock for a batch of planned orders in one transaction; failed orders pick nothing.
+    # A point listed twice in an order takes two units. Adds 'picked' and 'short' ItemID lists
+    # to each planned result.
+    planned = [result for result in results if 'error' not in result]
+    orders = [result['points'] for result in planned]
+    for result, picks in zip(planned, pick_orders(orders, all_or_nothing)):
+        result['picked'] = [item_id for item_id, (picked, _) in picks.items() if picked]
+        result['short'] = [item_id for item_id, (picked, _) in picks.items() if not picked]
+    for result in results:
+        result.pop('points', None)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Plan StockBot pick routes for a file of orders.")
+    parser.add_argument('orders', help="JSONL or CSV file of orders, '-' for stdin")
+    parser.add_argument('-o', '--output', default='-', help="JSONL file to write results to (default stdout)")
+    parser.add_argument('--format', choices=('jsonl', 'csv'), help="input format (default: from file extension)")
+    parser.add_argument('--database', default=database.DB_PATH, help="warehouse database to plan against")
+    parser.add_argument('--rows', type=int, help="grid rows (default: read from the database)")
+    parser.add_argument('--cols', type=int, help="grid columns (default: read from the database)")
+    parser.add_argument('--start', type=int, default=1, help="default start point")
+    parser.add_argument('--end', type=int, help="default end point (default: last cell)")
+    parser.add_argument('--engine', choices=PathFinder.ENGINES, default='astar')
+    parser.add_argument('--landmarks', action='store_true',
+                        help="guide the A* search of orders without picks with a landmark index, "
+                             "kept next to the database and built on first use; orders with picks "
+                             "are planned from BFS sweeps and do not use it")
+    parser.add_argument('--workers', type=int, default=1, help="processes for the island GA")
+    parser.add_argument('--include-out-of-stock', action='store_true',
+                        help="visit picks whose quantity is 0 instead of skipping them")
+    parser.add_argument('--commit-picks', action='store_true',
+                        help="take one unit of stock for every pick on each planned route")
+    parser.add_argument('--pick-batch', type=int, default=100,
+                        help="orders whose picks share one transaction (default 100)")
+    parser.add_argument('--all-or-nothing', action='store_true',
+                        help="with --commit-picks, an order with any short item takes nothing")
+    parser.add_argument('--stats', help="JSONL file to append per-order search statistics to")
+    parser.add_argument('--profile', metavar='DIR', help="write a cProfile dump per order into DIR")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s',
+                        stream=sys.stderr)
+    database.set_database_path(args.database)
+    rows, cols = args.rows, args.cols
+    if rows is None or cols is None:
+        rows, cols = get_grid_dimensions()
+    end = args.end or rows * cols
+
+    # One snapshot of the floor serves every order in the file. Tagging it with the layout
+    # version lets orders share legs through the leg cache; retry if the layout changes mid-read.
+    while True:
+        version = get_layout_version()
+        quantities, obstacles = get_grid_snapshot(rows, cols)
+        costs = get_cost_map(rows, cols)
+        if get_layout_version() == version:
+            break
+    grid = OccupancyGrid(rows, cols, obstacles, version, costs if costs.count(1) != len(costs) else None)
+    pathfinder = PathFinder(rows, cols, grid, engine=args.engine)
+    landmarks = args.landmarks
+    if landmarks and (args.engine != 'astar' or grid.costs is not None):
+        logger.warning("--landmarks only guides the astar engine on floors without cell costs; ignoring it")
+        landmarks = False
+    pathfinder.workers = args.workers
+    if args.profile:
+        os.makedirs(args.profile, exist_ok=True)
+
+    fmt = args.format or ('csv' if args.orders.endswith('.csv') else 'jsonl')
+    source = sys.stdin if args.orders == '-' else open(args.orders, newline='')
+    target = sys.stdout if args.output == '-' else open(args.output, 'w')
+    if args.stats:
+        pathfinder.stats_log = open(args.stats, 'a')
+    planned = failed = 0
+    try:
+        orders = read_orders(source, fmt)
+        skip_quantities = None if args.include_out_of_stock else quantities
+        results = plan_orders(orders, pathfinder, args.start, end, skip_quantities, args.commit_picks,
+                              args.profile, landmarks)
+        for batch in batches(results, args.pick_batch if args.commit_picks else 1):
+            if args.commit_picks:
+                commit_picks(batch, args.all_or_nothing)
+            for result in batch:
+                target.write(json.dumps(result) + '\n')
+                planned += 1
+                failed += 'error' in result
+            target.flush()
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if target is not sys.stdout:
+            target.close()
+        if pathfinder.stats_log is not None:
+            pathfinder.stats_log.close()
+    logger.info(f"Planned {planned} orders ({failed} failed)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,350 @@
+# benchmark.py
+# Seeded pathfinding benchmarks: python benchmark.py -o results.json [--compare previous.json]
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from array import array
+
+import database
+from database import NO_QUANTITY, replace_layout
+from hpa import HierarchicalPlanner
+from jps import JumpPointSearch
+from pathcache import leg_cache
+from spa import PathFinder
+from tsp import held_karp, route_length, np
+
+logger = logging.getLogger('StockBot.benchmark')
+
+# Bumped when records change shape, so --compare can refuse results it cannot line up
+RESULTS_FORMAT = 1
+
+# Medians below this many seconds are left out of --compare; they are mostly timer noise
+COMPARE_FLOOR = 0.001
+
+
+# Layout generators: each returns one byte per cell, indexed by row * cols + col, 1 = obstacle
+
+def empty_layout(rows, cols, rng):
+    return bytearray(rows * cols)
+
+
+def aisle_layout(rows, cols, rng, shelf_depth=2, block_length=10):
+    # Back-to-back shelving runs separated by one-cell aisles, broken by a cross aisle every
+    # block_length rows; the outer rows and the first column stay clear as perimeter aisles
+    cells = bytearray(rows * cols)
+    period = shelf_depth + 1
+    for row in range(1, rows - 1):
+        if row % (block_length + 1) == 0:
+            continue
+        base = row * cols
+        for col in range(1, cols):
+            if col % period:
+                cells[base + col] = 1
+    return cells
+
+
+def random_layout(rows, cols, rng, density=0.3):
+    return bytearray(rng.random() < density for _ in range(rows * cols))
+
+
+def maze_layout(rows, cols, rng):
+    # Perfect maze by randomised depth-first carving between cells at even coordinates
+    cells = bytearray(b'\x01') * (rows * cols)
+    cells[0] = 0
+    stack = [(0, 0)]
+    while stack:
+        row, col = stack[-1]
+        options = [(row + dr, col + dc) for dr, dc in ((0, 2), (2, 0), (0, -2), (-2, 0))
+                   if 0 <= row + dr < rows and 0 <= col + dc < cols and cells[(row + dr) * cols + col + dc]]
+        if not options:
+            stack.pop()
+            continue
+        next_row, next_col = rng.choice(options)
+        cells[((row + next_row) // 2) * cols + (col + next_col) // 2] = 0
+        cells[next_row * cols + next_col] = 0
+        stack.append((next_row, next_col))
+    return cells
+
+
+LAYOUTS = {
+    'empty': empty_layout,
+    'aisles': aisle_layout,
+    'random': random_layout,
+    'maze': maze_layout,
+}
+
+
+def layout_cases(names, densities):
+    # (label, generator) per layout; 'random' expands to one case per obstacle density
+    for name in names:
+        if name not in LAYOUTS:
+            raise ValueError(f"Unknown layout {name!r}, expected one of {tuple(LAYOUTS)}")
+        if name == 'random':
+            for density in densities:
+                yield f'random-{density:g}', lambda rows, cols, rng, density=density: \
+                    random_layout(rows, cols, rng, density)
+        else:
+            yield name, LAYOUTS[name]
+
+
+def largest_region(cells, rows, cols):
+    # ItemIDs of the largest 4-connected set of free cells, so every pick is reachable
+    seen = bytearray(cells)
+    best = []
+    for first in range(rows * cols):
+        if seen[first]:
+            continue
+        seen[first] = 1
+        region = [first]
+        for index in region:
+            col = index % cols
+            for neighbor, ok in ((index + 1, col + 1 < cols), (index - 1, col > 0),
+                                 (index + cols, index + cols < rows * cols), (index - cols, index >= cols)):
+                if ok and not seen[neighbor]:
+                    seen[neighbor] = 1
+                    region.append(neighbor)
+        if len(region) > len(best):
+            best = region
+    return [index + 1 for index in best]
+
+
+def parse_sizes(text):
+    # "10,100x50,1000" -> [(10, 10), (100, 50), (1000, 1000)]
+    sizes = []
+    for part in text.split(','):
+        rows, _, cols = part.strip().partition('x')
+        sizes.append((int(rows), int(cols or rows)))
+    return sizes
+
+
+def summarize(times):
+    return {
+        'runs': len(times),
+        'min': round(min(times), 6),
+        'median': round(statistics.median(times), 6),
+        'mean': round(statistics.fmean(times), 6),
+        'total': round(sum(times), 6),
+    }
+
+
+def exact_leg_length(pathfinder, start, end):
+    distances, _ = pathfinder.bfs_sweep(start, [end])
+    return distances[end]
+
+
+def prepare_engine(pathfinder):
+    # Build the engine's search structures up front so leg timings do not include them
+    began = time.perf_counter()
+    if pathfinder.engine == 'jps':
+        pathfinder.jump_point_search = JumpPointSearch(pathfinder.grid)
+    elif pathfinder.engine == 'hpa':
+        pathfinder.hierarchy = HierarchicalPlanner(pathfinder.grid, pathfinder.cluster_size)
+    return time.perf_counter() - began
+
+
+def leg_record(benchmark, case, times, lengths, optimal, **extra):
+    record = dict(case, benchmark=benchmark, **extra)
+    record['seconds'] = summarize(times)
+    record['length'] = sum(lengths)
+    record['optimal'] = sum(optimal)
+    record['ratio'] = round(record['length'] / record['optimal'], 6) if record['optimal'] else 1.0
+    return record
+
+
+def bench_legs(pathfinder, case, pairs, engines):
+    # bidirectional_a_star directly, then find_path through each engine with a cold leg cache
+    optimal = [exact_leg_length(pathfinder, start, end) for start, end in pairs]
+    times = []
+    lengths = []
+    for start, end in pairs:
+        began = time.perf_counter()
+        path = pathfinder.bidirectional_a_star(start, end)
+        times.append(time.perf_counter() - began)
+        lengths.append(len(path) - 1)
+    yield leg_record('bidirectional_a_star', case, times, lengths, optimal)
+
+    for engine in engines:
+        pathfinder.engine = engine
+        setup = prepare_engine(pathfinder)
+        times = []
+        lengths = []
+        for start, end in pairs:
+            leg_cache.clear()
+            began = time.perf_counter()
+            path = pathfinder.find_path(start, end)
+            times.append(time.perf_counter() - began)
+            lengths.append(len(path) - 1)
+        yield leg_record('find_path', case, times, lengths, optimal, engine=engine,
+                         setup_seconds=round(setup, 6))
+    pathfinder.engine = 'astar'
+
+
+def bench_orders(pathfinder, case, orders, exact_limit):
+    # find_shortest_path per order; routes with at most exact_limit picks are compared with
+    # Held-Karp over the same leg lengths, longer ones report optimal as null
+    picks = len(orders[0][2])
+    times = []
+    lengths = []
+    optimal = []
+    for start, end, points in orders:
+        leg_cache.clear()
+        began = time.perf_counter()
+        path = pathfinder.find_shortest_path(start, end, points)
+        times.append(time.perf_counter() - began)
+        lengths.append(len(path) - 1)
+        if picks <= exact_limit:
+            distance_matrix = pathfinder.build_distance_matrix([start] + points + [end])[0]
+            optimal.append(route_length(held_karp(distance_matrix), distance_matrix))
+    record = dict(case, benchmark='find_shortest_path', picks=picks,
+                  solver='exact' if picks <= pathfinder.exact_threshold else 'ga')
+    record['seconds'] = summarize(times)
+    record['length'] = sum(lengths)
+    record['optimal'] = sum(optimal) if optimal else None
+    record['ratio'] = round(record['length'] / record['optimal'], 6) if optimal and record['optimal'] else None
+    return record
+
+
+def run_case(label, generate, rows, cols, args):
+    # Every random choice for a case comes from a generator seeded by (seed, layout, size),
+    # so cases reproduce individually whichever others run alongside them
+    rng = random.Random(f'{args.seed}/{label}/{rows}x{cols}')
+    case = {'layout': label, 'rows': rows, 'cols': cols}
+
+    began = time.perf_counter()
+    cells = generate(rows, cols, rng)
+    region = largest_region(cells, rows, cols)
+    generated = time.perf_counter() - began
+    if len(region) < 2:
+        logger.warning(f"Skipping {label} {rows}x{cols}: fewer than two reachable cells")
+        return
+
+    began = time.perf_counter()
+    replace_layout(rows, cols, array('l', [NO_QUANTITY]) * (rows * cols), cells)
+    loaded = time.perf_counter() - began
+    began = time.perf_counter()
+    pathfinder = PathFinder(rows, cols, seed=rng.getrandbits(32))
+    pathfinder.exact_threshold = args.exact_threshold
+    pathfinder.workers = args.workers
+    read = time.perf_counter() - began
+    yield dict(case, benchmark='layout', free_cells=rows * cols - sum(cells), reachable=len(region),
+               generate_seconds=round(generated, 6), load_seconds=round(loaded, 6),
+               grid_seconds=round(read, 6))
+
+    pairs = [tuple(rng.sample(region, 2)) for _ in range(args.pairs)]
+    yield from bench_legs(pathfinder, case, pairs, args.engines)
+
+    for picks in args.picks:
+        if picks + 2 > len(region):
+            continue
+        orders = []
+        for _ in range(args.repeats):
+            chosen = rng.sample(region, picks + 2)
+            orders.append((chosen[0], chosen[-1], chosen[1:-1]))
+        yield bench_orders(pathfinder, case, orders, args.exact_limit)
+
+
+def record_key(record):
+    return tuple(record.get(field) for field in ('benchmark', 'layout', 'rows', 'cols', 'engine', 'picks'))
+
+
+def compare(results, previous, threshold):
+    # Log records whose median time grew by more than threshold or whose routes got longer;
+    # returns how many regressed
+    if previous.get('format') != RESULTS_FORMAT:
+        raise ValueError(f"Cannot compare with results format {previous.get('format')!r}")
+    before = {record_key(record): record for record in previous['results']}
+    regressions = 0
+    for record in results:
+        old = before.get(record_key(record))
+        if old is None or 'seconds' not in record:
+            continue
+        label = ' '.join(str(part) for part in record_key(record) if part is not None)
+        slowdown = record['seconds']['median'] / old['seconds']['median'] if old['seconds']['median'] else 1.0
+        if slowdown > threshold and old['seconds']['median'] >= COMPARE_FLOOR:
+            logger.warning(f"{label}: median {old['seconds']['median']}s -> {record['seconds']['median']}s "
+                           f"({slowdown:.2f}x)")
+            regressions += 1
+        if record['length'] > old['length']:
+            logger.warning(f"{label}: route length {old['length']} -> {record['length']}")
+            regressions += 1
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark StockBot pathfinding on generated layouts.")
+    parser.add_argument('-o', '--output', default='-', help="JSON file to write results to (default stdout)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--layouts', default=','.join(LAYOUTS),
+                        help=f"comma-separated layouts (default {','.join(LAYOUTS)})")
+    parser.add_argument('--densities', default='0.1,0.3', help="obstacle densities for the random layout")
+    parser.add_argument('--sizes', default='10,100,1000',
+                        help="comma-separated floor sizes, N or ROWSxCOLS (default 10,100,1000)")
+    parser.add_argument('--picks', default='2,5,10,25', help="pick-list sizes for find_shortest_path")
+    parser.add_argument('--pairs', type=int, default=10, help="start/end pairs timed per leg benchmark")
+    parser.add_argument('--repeats', type=int, default=3, help="orders timed per pick-list size")
+    parser.add_argument('--engines', default=','.join(PathFinder.ENGINES), help="find_path engines to time")
+    parser.add_argument('--exact-threshold', type=int, default=12,
+                        help="PathFinder.exact_threshold; 0 sends every order through the GA")
+    parser.add_argument('--exact-limit', type=int, default=12,
+                        help="largest pick list given a Held-Karp baseline")
+    parser.add_argument('--workers', type=int, default=1, help="processes for the island GA")
+    parser.add_argument('--compare', help="earlier results file to check for regressions")
+    parser.add_argument('--threshold', type=float, default=1.2,
+                        help="median slowdown reported as a regression (default 1.2)")
+    args = parser.parse_args(argv)
+    args.picks = [int(p) for p in args.picks.split(',')]
+    args.engines = [engine for engine in args.engines.split(',') if engine]
+    for engine in args.engines:
+        if engine not in PathFinder.ENGINES:
+            parser.error(f"unknown engine {engine!r}")
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s',
+                        stream=sys.stderr)
+    cases = list(layout_cases(args.layouts.split(','), [float(d) for d in args.densities.split(',')]))
+    results = []
+
+    # Layouts are written to a scratch database so warehouse.db is never touched
+    original_path = database.DB_PATH
+    with tempfile.TemporaryDirectory() as scratch:
+        database.set_database_path(os.path.join(scratch, 'benchmark.db'))
+        try:
+            for rows, cols in parse_sizes(args.sizes):
+                for label, generate in cases:
+                    logger.info(f"Benchmarking {label} {rows}x{cols}")
+                    results.extend(run_case(label, generate, rows, cols, args))
+        finally:
+            database.set_database_path(original_path)
+
+    document = {
+        'format': RESULTS_FORMAT,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': np.__version__ if np is not None else None,
+        'options': {key: value for key, value in vars(args).items() if key not in ('output', 'compare')},
+        'results': results,
+    }
+    text = json.dumps(document, indent=1)
+    if args.output == '-':
+        sys.stdout.write(text + '\n')
+    else:
+        with open(args.output, 'w') as file:
+            file.write(text + '\n')
+
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(results, json.load(file), args.threshold)
+        logger.info(f"{regressions} regressions against {args.compare}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
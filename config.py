@@ -2,6 +2,8 @@ import tkinter as tk
 from tkinter import Toplevel, Spinbox
 from database import populate_database
 
+MAX_GRID_SIZE = 2000  # Largest rows/cols offered on the configuration screen
+
 class ConfigScreen:
     def __init__(self, root, callback):
         self.root = root
@@ -13,11 +15,11 @@ class ConfigScreen:
         self.config_window.title("Configure Grid")
         
         tk.Label(self.config_window, text="Rows:").grid(row=0, column=0, padx=10, pady=10)
-        self.rows_spinbox = Spinbox(self.config_window, from_=1, to=100, width=5)
+        self.rows_spinbox = Spinbox(self.config_window, from_=1, to=MAX_GRID_SIZE, width=5)
         self.rows_spinbox.grid(row=0, column=1, padx=10, pady=10)
         
         tk.Label(self.config_window, text="Columns:").grid(row=1, column=0, padx=10, pady=10)
-        self.cols_spinbox = Spinbox(self.config_window, from_=1, to=100, width=5)
+        self.cols_spinbox = Spinbox(self.config_window, from_=1, to=MAX_GRID_SIZE, width=5)
         self.cols_spinbox.grid(row=1, column=1, padx=10, pady=10)
         
         tk.Button(self.config_window, text="OK", command=self.set_configuration).grid(row=2, column=0, columnspan=2, pady=10)
@@ -1,21 +1,95 @@
 # database.py
 import sqlite3
 import random
+import threading
+import json
+from array import array
+from itertools import islice
 
-def create_database():
-    conn = sqlite3.connect('warehouse.db')
-    c = conn.cursor()
-    
-    # Check if table exists
+DB_PATH = 'warehouse.db'
+
+# Each thread keeps one long-lived connection; sqlite3 caches the prepared
+# statement for every SQL string below on that connection.
+_local = threading.local()
+_schema_lock = threading.Lock()
+_schema_checked = set()
+
+# Callbacks run after the obstacle layout changes: listener(changes, old_version, new_version),
+# where changes is a list of (row, col, is_obstacle) or None when the whole floor was replaced
+_layout_listeners = []
+
+SQL_GET_ITEM = 'SELECT ItemID, Quantity FROM items WHERE Row = ? AND Col = ?'
+SQL_GET_ITEM_BY_ID = 'SELECT Row, Col, Quantity FROM items WHERE ItemID = ?'
+SQL_UPDATE_QUANTITY = 'UPDATE items SET Quantity = ? WHERE ItemID = ?'
+SQL_SET_OBSTACLE = 'UPDATE items SET IsObstacle = ? WHERE Row = ? AND Col = ?'
+SQL_IS_OBSTACLE = 'SELECT IsObstacle FROM items WHERE Row = ? AND Col = ?'
+SQL_SET_COST = 'UPDATE items SET Cost = ? WHERE ItemID = ?'
+
+# Bulk loads drop this index and recreate it once the rows are in
+SQL_CREATE_CELL_INDEX = 'CREATE UNIQUE INDEX IF NOT EXISTS idx_items_row_col ON items (Row, Col)'
+
+# Rows handed to executemany at a time when applying a layout
+BULK_CHUNK_SIZE = 10000
+
+# ItemIDs bound into one IN (...) list, well under SQLite's host parameter limit
+PICK_CHUNK_SIZE = 500
+
+# Traversal cost of a cell runs from 1 (a plain aisle) to this; grids hold costs one byte per cell
+MAX_CELL_COST = 255
+
+
+def set_database_path(path):
+    # Point every thread at a different database file (e.g. a scratch copy)
+    global DB_PATH
+    close_connection()
+    with _schema_lock:
+        _schema_checked.discard(path)
+    DB_PATH = path
+
+
+def get_connection():
+    conn = getattr(_local, 'conn', None)
+    if conn is not None and _local.path == DB_PATH:
+        return conn
+    if conn is not None:
+        conn.close()
+
+    conn = sqlite3.connect(DB_PATH, timeout=30, cached_statements=256)
+    # WAL lets the Tk thread read while the worker thread writes
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute('PRAGMA busy_timeout=30000')
+    conn.execute('PRAGMA cache_size=-16000')
+    conn.execute('PRAGMA temp_store=MEMORY')
+    _local.conn = conn
+    _local.path = DB_PATH
+
+    with _schema_lock:
+        if DB_PATH not in _schema_checked:
+            _ensure_schema(conn)
+            _schema_checked.add(DB_PATH)
+    return conn
+
+
+def close_connection():
+    conn = getattr(_local, 'conn', None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
+
+
+# Schema migrations, applied in order to bring a file's PRAGMA user_version up to SCHEMA_VERSION.
+# Each runs in its own transaction, so a failed upgrade leaves the previous version intact.
+def _migrate_baseline(c):
+    # v1: the layout every earlier release produced. Files from before IsObstacle existed
+    # get the column; the counter table and (Row, Col) index come from later releases.
     c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='items'")
     if c.fetchone():
-        # Add IsObstacle column if it doesn't exist
         c.execute("PRAGMA table_info(items)")
         columns = [column[1] for column in c.fetchall()]
         if 'IsObstacle' not in columns:
             c.execute('ALTER TABLE items ADD COLUMN IsObstacle INTEGER DEFAULT 0')
     else:
-        # Create new table with all columns
         c.execute('''
             CREATE TABLE items (
                 ItemID INTEGER PRIMARY KEY,
@@ -25,64 +99,421 @@ def create_database():
                 IsObstacle INTEGER DEFAULT 0
             )
         ''')
-    
-    conn.commit()
-    conn.close()
+    c.execute('CREATE INDEX IF NOT EXISTS idx_items_row_col ON items (Row, Col)')
+
+    # Single-row counter bumped whenever the obstacle layout changes
+    c.execute('CREATE TABLE IF NOT EXISTS layout (Version INTEGER NOT NULL)')
+    c.execute('SELECT Version FROM layout')
+    if c.fetchone() is None:
+        c.execute('INSERT INTO layout (Version) VALUES (0)')
+
+
+def _migrate_items_v2(c):
+    # v2: rebuild items with clean column definitions. Early files declared
+    # "Quantity INTEGER IsObstacle INTEGER" (a missing comma) and had IsObstacle added later.
+    # Cells are unique, so the (Row, Col) index becomes UNIQUE; ItemID stays the rowid, which
+    # keeps picks, quantity updates and bulk loads on the primary key. The leg cache table
+    # moves here from pathcache.py.
+    duplicate = c.execute('SELECT Row, Col FROM items GROUP BY Row, Col HAVING COUNT(*) > 1 LIMIT 1').fetchone()
+    if duplicate is not None:
+        raise sqlite3.IntegrityError(f"Cannot upgrade {DB_PATH}: cell {duplicate} appears more than once in items")
+    c.execute('''
+        CREATE TABLE items_v2 (
+            ItemID INTEGER PRIMARY KEY,
+            Row INTEGER NOT NULL,
+            Col INTEGER NOT NULL,
+            Quantity INTEGER,
+            IsObstacle INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    c.execute('INSERT INTO items_v2 (ItemID, Row, Col, Quantity, IsObstacle) '
+              'SELECT ItemID, Row, Col, Quantity, IFNULL(IsObstacle, 0) FROM items ORDER BY ItemID')
+    c.execute('DROP TABLE items')
+    c.execute('ALTER TABLE items_v2 RENAME TO items')
+    c.execute(SQL_CREATE_CELL_INDEX)
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS leg_cache (
+            Rows INTEGER, Cols INTEGER, Version INTEGER,
+            Start INTEGER, End INTEGER, Path BLOB,
+            PRIMARY KEY (Rows, Cols, Version, Start, End)
+        )
+    ''')
+
+
+def _migrate_cell_costs(c):
+    # v3: per-cell traversal cost, the time to move into the cell; 1 is an ordinary aisle
+    c.execute('ALTER TABLE items ADD COLUMN Cost INTEGER NOT NULL DEFAULT 1')
+
+
+def _migrate_leg_costs(c):
+    # v4: travel cost of each cached leg, so clearing a cell can be checked against it on a
+    # floor with cell costs; NULL for legs on uniform floors, where it is the step count
+    c.execute('ALTER TABLE leg_cache ADD COLUMN Cost INTEGER')
+
+
+MIGRATIONS = [
+    (1, _migrate_baseline),
+    (2, _migrate_items_v2),
+    (3, _migrate_cell_costs),
+    (4, _migrate_leg_costs),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def _ensure_schema(conn):
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    if version > SCHEMA_VERSION:
+        raise sqlite3.DatabaseError(f"{DB_PATH} has schema version {version}, "
+                                    f"newer than the {SCHEMA_VERSION} this version supports")
+    c = conn.cursor()
+    for target, migrate in MIGRATIONS:
+        if version >= target:
+            continue
+        c.execute('BEGIN IMMEDIATE')
+        try:
+            # Another connection may have upgraded the file while this one waited for the lock
+            version = c.execute('PRAGMA user_version').fetchone()[0]
+            if version < target:
+                migrate(c)
+                c.execute(f'PRAGMA user_version = {target}')
+                version = target
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+
+def create_database():
+    _ensure_schema(get_connection())
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
 
 
 # database.py - Modify populate_database
-def populate_database(rows, cols, start_point, end_point):
-    conn = sqlite3.connect('warehouse.db')
+def populate_database(rows, cols, start_point, end_point, obstacles=None, quantities=None, costs=None):
+    # obstacles: iterable of ItemIDs to block
+    # quantities: mapping or iterable of (ItemID, quantity) pairs
+    # costs: mapping or iterable of (ItemID, cost) pairs; other cells cost 1
+    conn = get_connection()
     c = conn.cursor()
-    c.execute('DELETE FROM items')  # Clear existing data
-    
-    # Initialize empty cells with NULL quantity
-    for row in range(rows):
-        for col in range(cols):
-            item_id = row * cols + col + 1
-            c.execute('INSERT INTO items (ItemID, Row, Col, Quantity) VALUES (?, ?, ?, NULL)',
-                     (item_id, row, col))
-    
-    conn.commit()
-    conn.close()
+    c.execute('BEGIN IMMEDIATE')
+    try:
+        # Drop the index so the load does not maintain it row by row
+        c.execute('DROP INDEX IF EXISTS idx_items_row_col')
+        c.execute('DELETE FROM items')  # Clear existing data
+
+        # Generate every cell inside SQLite, empty cells have NULL quantity
+        c.execute('''
+            WITH RECURSIVE cells(id) AS (
+                SELECT 1 WHERE ? > 0
+                UNION ALL
+                SELECT id + 1 FROM cells WHERE id < ?
+            )
+            INSERT INTO items (ItemID, Row, Col, Quantity, IsObstacle)
+            SELECT id, (id - 1) / ?, (id - 1) % ?, NULL, 0 FROM cells
+        ''', (rows * cols, rows * cols, cols, cols))
+
+        if obstacles is not None:
+            for chunk in _chunks(((item_id,) for item_id in obstacles), BULK_CHUNK_SIZE):
+                c.executemany('UPDATE items SET IsObstacle = 1 WHERE ItemID = ?', chunk)
+        if quantities is not None:
+            pairs = quantities.items() if hasattr(quantities, 'items') else quantities
+            for chunk in _chunks(((quantity, item_id) for item_id, quantity in pairs), BULK_CHUNK_SIZE):
+                c.executemany(SQL_UPDATE_QUANTITY, chunk)
+        if costs is not None:
+            pairs = costs.items() if hasattr(costs, 'items') else costs
+            for chunk in _chunks(((_check_cost(cost), item_id) for item_id, cost in pairs), BULK_CHUNK_SIZE):
+                c.executemany(SQL_SET_COST, chunk)
+
+        c.execute(SQL_CREATE_CELL_INDEX)
+        old_version, new_version = _bump_layout_version(c)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    _notify_layout_listeners(None, old_version, new_version)
 
 def get_item(row, col):
-    conn = sqlite3.connect('warehouse.db')
-    c = conn.cursor()
-    c.execute('SELECT ItemID, Quantity FROM items WHERE Row = ? AND Col = ?', (row, col))
-    item = c.fetchone()
-    conn.close()
-    return item
+    return get_connection().execute(SQL_GET_ITEM, (row, col)).fetchone()
 
 def get_item_by_id(item_id):
-    conn = sqlite3.connect('warehouse.db')
-    c = conn.cursor()
-    c.execute('SELECT Row, Col, Quantity FROM items WHERE ItemID = ?', (item_id,))
-    item = c.fetchone()
-    conn.close()
-    return item
+    return get_connection().execute(SQL_GET_ITEM_BY_ID, (item_id,)).fetchone()
 
 def update_item_quantity(item_id, quantity):
-    conn = sqlite3.connect('warehouse.db')
+    conn = get_connection()
+    with conn:
+        conn.execute(SQL_UPDATE_QUANTITY, (quantity, item_id))
+
+def _pick_counts(picks):
+    # Mapping or iterable of (item_id, count), or bare item_ids for one unit each; repeats add up
+    counts = {}
+    for pick in (picks.items() if hasattr(picks, 'items') else picks):
+        item_id, count = pick if isinstance(pick, tuple) else (pick, 1)
+        if count < 1:
+            raise ValueError(f"Pick count for ItemID {item_id} must be positive, got {count}")
+        counts[item_id] = counts.get(item_id, 0) + count
+    return counts
+
+
+def _apply_picks(c, counts):
+    # Decrement every item that has enough stock; returns {item_id: (picked, quantity now)}.
+    # Items sharing a count go through one UPDATE ... WHERE ItemID IN (...) AND Quantity >= count,
+    # so the stock check and the decrement are a single statement.
+    results = {}
+    by_count = {}
+    for item_id, count in counts.items():
+        by_count.setdefault(count, []).append(item_id)
+    for count, item_ids in by_count.items():
+        for chunk in _chunks(item_ids, PICK_CHUNK_SIZE):
+            c.execute(f'UPDATE items SET Quantity = Quantity - ? WHERE ItemID IN ({",".join("?" * len(chunk))}) '
+                      f'AND Quantity >= ? RETURNING ItemID, Quantity', [count, *chunk, count])
+            for item_id, quantity in c.fetchall():
+                results[item_id] = (True, quantity)
+    short = [item_id for item_id in counts if item_id not in results]
+    results.update(_read_quantities(c, short))
+    return results
+
+
+def _read_quantities(c, item_ids):
+    # {item_id: (False, current quantity)}; quantity is None for unknown items
+    results = dict.fromkeys(item_ids, (False, None))
+    for chunk in _chunks(item_ids, PICK_CHUNK_SIZE):
+        c.execute(f'SELECT ItemID, Quantity FROM items WHERE ItemID IN ({",".join("?" * len(chunk))})', chunk)
+        for item_id, quantity in c.fetchall():
+            results[item_id] = (False, quantity)
+    return results
+
+
+def pick_orders(orders, all_or_nothing=False):
+    # Apply the picks of many orders in one BEGIN IMMEDIATE transaction. Each order is a mapping
+    # or iterable of (item_id, count), or bare item_ids; returns one {item_id: (picked, quantity)}
+    # per order, where quantity is the stock after the pick (or the unchanged stock when short).
+    # With all_or_nothing, an order with any short item takes nothing; other orders still commit.
+    orders = [_pick_counts(order) for order in orders]
+    conn = get_connection()
     c = conn.cursor()
-    c.execute('UPDATE items SET Quantity = ? WHERE ItemID = ?', (quantity, item_id))
-    conn.commit()
-    conn.close()
+    c.execute('BEGIN IMMEDIATE')
+    try:
+        results = []
+        for counts in orders:
+            if not all_or_nothing:
+                results.append(_apply_picks(c, counts))
+                continue
+            c.execute('SAVEPOINT pick_order')
+            order_results = _apply_picks(c, counts)
+            if all(picked for picked, _ in order_results.values()):
+                c.execute('RELEASE pick_order')
+            else:
+                c.execute('ROLLBACK TO pick_order')
+                c.execute('RELEASE pick_order')
+                order_results = _read_quantities(c, list(counts))
+            results.append(order_results)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return results
+
+
+def pick_items(picks, all_or_nothing=False):
+    # Single-order form of pick_orders
+    return pick_orders([picks], all_or_nothing)[0]
 
 # database.py - Add to existing functions
 def set_obstacle(row, col, is_obstacle=True):
-    create_database()  # Ensure column exists
-    conn = sqlite3.connect('warehouse.db')
-    c = conn.cursor()
-    c.execute('UPDATE items SET IsObstacle = ? WHERE Row = ? AND Col = ?', 
-              (1 if is_obstacle else 0, row, col))
-    conn.commit()
-    conn.close()
+    conn = get_connection()
+    with conn:
+        changed = conn.execute(SQL_SET_OBSTACLE + ' AND IsObstacle IS NOT ?',
+                               (1 if is_obstacle else 0, row, col, 1 if is_obstacle else 0)).rowcount
+        if not changed:
+            return
+        old_version, new_version = _bump_layout_version(conn.cursor())
+    _notify_layout_listeners([(row, col, bool(is_obstacle))], old_version, new_version)
+
+def _check_cost(cost):
+    if not 1 <= cost <= MAX_CELL_COST:
+        raise ValueError(f"Cell cost {cost} is outside 1..{MAX_CELL_COST}")
+    return cost
+
+def set_cell_cost(row, col, cost):
+    # Costs change leg lengths anywhere on the floor, so listeners are told the whole layout changed
+    _check_cost(cost)
+    conn = get_connection()
+    with conn:
+        changed = conn.execute('UPDATE items SET Cost = ? WHERE Row = ? AND Col = ? AND Cost IS NOT ?',
+                               (cost, row, col, cost)).rowcount
+        if not changed:
+            return
+        old_version, new_version = _bump_layout_version(conn.cursor())
+    _notify_layout_listeners(None, old_version, new_version)
 
 def is_obstacle(row, col):
-    conn = sqlite3.connect('warehouse.db')
+    result = get_connection().execute(SQL_IS_OBSTACLE, (row, col)).fetchone()
+    return bool(result[0]) if result else False
+
+
+def get_obstacle_map(rows, cols):
+    # One byte per cell, indexed by row * cols + col (ItemID - 1); 1 marks an obstacle
+    cells = bytearray(rows * cols)
+    c = get_connection().execute('SELECT Row, Col FROM items WHERE IsObstacle = 1')
+    for row, col in c:
+        if 0 <= row < rows and 0 <= col < cols:
+            cells[row * cols + col] = 1
+    return cells
+
+
+def get_cost_map(rows, cols):
+    # One byte per cell like get_obstacle_map, holding each cell's traversal cost
+    costs = bytearray(b'\x01') * (rows * cols)
+    c = get_connection().execute('SELECT Row, Col, Cost FROM items WHERE Cost != 1')
+    for row, col, cost in c:
+        if 0 <= row < rows and 0 <= col < cols:
+            costs[row * cols + col] = cost
+    return costs
+
+
+# Quantity stored in a grid snapshot for cells whose Quantity is NULL
+NO_QUANTITY = -1
+
+# Normalises an obstacle map to 0/1 bytes
+OBSTACLE_BYTES = bytes([0]) + bytes([1]) * 255
+
+
+def get_grid_snapshot(rows, cols):
+    # Quantities and obstacle flags for the whole floor from a single query.
+    # Both arrays are indexed by ItemID - 1 (row * cols + col).
+    # Floors written by populate_database/replace_layout store ItemID = row * cols + col + 1, so when
+    # the ItemIDs are exactly 1..n both columns are read in one scan of the table, which visits
+    # ItemIDs in order, as JSON arrays without materialising a Python tuple per row. The checks of
+    # _is_dense_floor gate that scan inside the same query; any other floor is read cell by cell.
+    n = rows * cols
+    conn = get_connection()
+    obstacles = bytearray(n)
+    values, blocked = conn.execute('''
+        SELECT json_group_array(IFNULL(Quantity, ?1)), json_group_array(ItemID - 1) FILTER (WHERE IsObstacle)
+        FROM items
+        WHERE (SELECT MIN(ItemID) FROM items) = 1 AND (SELECT MAX(ItemID) FROM items) = ?2 * ?3
+          AND (SELECT COUNT(*) FROM items) = ?2 * ?3
+          AND (SELECT Row = ?2 - 1 AND Col = ?3 - 1 FROM items WHERE ItemID = ?2 * ?3)
+    ''', (NO_QUANTITY, rows, cols)).fetchone()
+    quantities = array('l', json.loads(values))
+    if n and len(quantities) == n:
+        for index in json.loads(blocked):
+            obstacles[index] = 1
+        return quantities, obstacles
+
+    quantities = array('l', [NO_QUANTITY]) * n
+    c = conn.execute('SELECT Row, Col, Quantity, IsObstacle FROM items')
+    for row, col, quantity, obstacle in c:
+        if 0 <= row < rows and 0 <= col < cols:
+            index = row * cols + col
+            if quantity is not None:
+                quantities[index] = quantity
+            if obstacle:
+                obstacles[index] = 1
+    return quantities, obstacles
+
+
+def _is_dense_floor(conn, rows, cols):
+    # True when the items table holds exactly ItemIDs 1..rows * cols ending at (rows - 1, cols - 1)
+    n = rows * cols
+    if not n:
+        return False
+    first = conn.execute('SELECT MIN(ItemID) FROM items').fetchone()[0]
+    last = conn.execute('SELECT MAX(ItemID) FROM items').fetchone()[0]
+    if first != 1 or last != n:
+        return False
+    if conn.execute('SELECT Row, Col FROM items WHERE ItemID = ?', (n,)).fetchone() != (rows - 1, cols - 1):
+        return False
+    return conn.execute('SELECT COUNT(*) FROM items').fetchone()[0] == n
+
+
+def replace_layout(rows, cols, quantities, obstacles, costs=None):
+    # Replace the whole floor in one transaction from per-cell arrays indexed by ItemID - 1:
+    # quantities holds NO_QUANTITY for NULL, obstacles one byte per cell (non-zero = blocked),
+    # costs one byte per cell or None for a floor where every cell costs 1.
+    # The values reach SQLite as a few strings and blobs rather than a bound row per cell.
+    # A floor of the same size is updated in place in one scan of the table, writing only the
+    # cells that differ; each cell finds its new values at a fixed offset into the blobs, which
+    # writes changed cells faster than a join against json_each. Otherwise the table is rebuilt
+    # from json_each, which inserts cells faster than executemany (about 3x) or a recursive CTE.
+    n = rows * cols
+    if len(quantities) != n or len(obstacles) != n or (costs is not None and len(costs) != n):
+        raise ValueError(f"Layout arrays do not match a {rows}x{cols} floor")
+    # Slow cells are few, so costs go in as sparse updates after the cells are written
+    weighted = []
+    if costs is not None and costs.count(1) != n:
+        weighted = [(cost, index + 1) for index, cost in enumerate(costs) if cost != 1]
+    for cost, _ in weighted:
+        _check_cost(cost)
+    obstacles = bytes(obstacles).translate(OBSTACLE_BYTES)
+    conn = get_connection()
     c = conn.cursor()
-    c.execute('SELECT IsObstacle FROM items WHERE Row = ? AND Col = ?', (row, col))
-    result = c.fetchone()
-    conn.close()
-    return bool(result[0]) if result else False
\ No newline at end of file
+    c.execute('BEGIN IMMEDIATE')
+    try:
+        if _is_dense_floor(conn, rows, cols):
+            # Quantities as right-aligned decimals of one width; CAST skips the padding
+            width = max(len(str(min(quantities))), len(str(max(quantities))))
+            quantities = ((f'%{width}d' * n) % tuple(quantities)).encode()
+            c.execute('''
+                UPDATE items SET Quantity = NULLIF(CAST(substr(?1, ItemID * ?2 - ?2 + 1, ?2) AS INTEGER), ?3),
+                                 IsObstacle = substr(?4, ItemID, 1) = x'01'
+                WHERE Quantity IS NOT NULLIF(CAST(substr(?1, ItemID * ?2 - ?2 + 1, ?2) AS INTEGER), ?3)
+                   OR IsObstacle IS NOT (substr(?4, ItemID, 1) = x'01')
+            ''', (quantities, width, NO_QUANTITY, obstacles))
+            c.execute('UPDATE items SET Cost = 1 WHERE Cost != 1')
+        else:
+            # Cells go in in (Row, Col) order, so keeping the index only appends to it, which is
+            # cheaper than sorting a million entries to rebuild it afterwards
+            c.execute('DELETE FROM items')
+            quantities = json.dumps(quantities.tolist() if hasattr(quantities, 'tolist') else list(quantities))
+            c.execute('''
+                INSERT INTO items (ItemID, Row, Col, Quantity, IsObstacle)
+                SELECT key + 1, key / ?, key % ?, NULLIF(value, ?), substr(?, key + 1, 1) = x'01'
+                FROM json_each(?)
+            ''', (cols, cols, NO_QUANTITY, obstacles, quantities))
+            c.execute(SQL_CREATE_CELL_INDEX)
+        for chunk in _chunks(weighted, BULK_CHUNK_SIZE):
+            c.executemany(SQL_SET_COST, chunk)
+        old_version, new_version = _bump_layout_version(c)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    _notify_layout_listeners(None, old_version, new_version)
+
+
+def _bump_layout_version(cursor):
+    cursor.execute('UPDATE layout SET Version = Version + 1')
+    new_version = cursor.execute('SELECT Version FROM layout').fetchone()[0]
+    return new_version - 1, new_version
+
+
+def _notify_layout_listeners(changes, old_version, new_version):
+    for listener in list(_layout_listeners):
+        listener(changes, old_version, new_version)
+
+
+def add_layout_listener(listener):
+    _layout_listeners.append(listener)
+
+
+def remove_layout_listener(listener):
+    _layout_listeners.remove(listener)
+
+
+def get_layout_version():
+    return get_connection().execute('SELECT Version FROM layout').fetchone()[0]
+
+
+def get_grid_dimensions():
+    # (rows, cols) of the provisioned floor, (0, 0) when it is empty
+    rows, cols = get_connection().execute('SELECT MAX(Row), MAX(Col) FROM items').fetchone()
+    return (rows + 1, cols + 1) if rows is not None else (0, 0)
@@ -0,0 +1,144 @@
+# dial.py
+from array import array
+
+from database import MAX_CELL_COST
+
+UNREACHED = -1
+
+
+class DialSearch:
+    # Dial's algorithm: shortest paths over small integer cell costs with a circular array of
+    # buckets in place of a binary heap. Every key still waiting in the queue lies within
+    # MAX_CELL_COST (plus the heuristic's step) of the one being popped, so a ring that long
+    # never mixes two keys in one bucket, and both push and pop are O(1) list operations.
+    # Moving into a cell costs grid.costs[cell], or 1 where the grid has no costs.
+    def __init__(self, grid):
+        self.grid = grid
+
+    def step_costs(self):
+        costs = self.grid.costs
+        return costs if costs is not None else bytes(b'\x01') * len(self.grid.cells)
+
+    def find_path(self, start, end, stats=None):
+        # Point-to-point A* over the bucket queue; start and end are point numbers (ItemIDs).
+        # Manhattan distance stays a consistent heuristic because no cell costs less than 1.
+        # stats, a searchstats.SearchStats, gets the search's node and queue counts.
+        cols = self.grid.cols
+        cells = self.grid.cells
+        costs = self.step_costs()
+        size = len(cells)
+        source = start - 1
+        goal = end - 1
+        if cells[source] or cells[goal]:
+            return None
+        goal_row, goal_col = divmod(goal, cols)
+
+        def heuristic(index):
+            row, col = divmod(index, cols)
+            return abs(row - goal_row) + abs(col - goal_col)
+
+        ring = MAX_CELL_COST + 2
+        buckets = [[] for _ in range(ring)]
+        g = {source: 0}
+        came_from = {}
+        key = heuristic(source)
+        buckets[key % ring].append(source)
+        queued = 1
+        pushes = 1
+        pops = expanded = 0
+        path = None
+        while queued:
+            bucket = buckets[key % ring]
+            if not bucket:
+                key += 1
+                continue
+            index = bucket.pop()
+            queued -= 1
+            pops += 1
+            # Entries left behind by a later improvement no longer match their bucket's key
+            distance = g[index]
+            if distance + heuristic(index) != key:
+                continue
+            if index == goal:
+                path = [goal + 1]
+                while index in came_from:
+                    index = came_from[index]
+                    path.append(index + 1)
+                path.reverse()
+                break
+            expanded += 1
+            col = index % cols
+            for neighbor in (index + 1 if col + 1 < cols else -1,
+                             index + cols,
+                             index - 1 if col > 0 else -1,
+                             index - cols):
+                if neighbor < 0 or neighbor >= size or cells[neighbor]:
+                    continue
+                tentative = distance + costs[neighbor]
+                if tentative < g.get(neighbor, tentative + 1):
+                    g[neighbor] = tentative
+                    came_from[neighbor] = index
+                    buckets[(tentative + heuristic(neighbor)) % ring].append(neighbor)
+                    queued += 1
+                    pushes += 1
+        if stats is not None:
+            stats.add_search(expanded + (path is not None), pushes, pops, expanded)
+        return path
+
+    def sweep(self, source, targets, stats=None):
+        # One-to-many Dial search from a point that stops once every target is settled.
+        # Returns {target: cost} and parent directions in PathFinder.bfs_sweep's format
+        # (0 = not reached, 5 = the source, 1-4 = OccupancyGrid.DIRECTIONS index + 1).
+        cols = self.grid.cols
+        cells = self.grid.cells
+        costs = self.step_costs()
+        size = len(cells)
+        source_index = source - 1
+        remaining = set(target - 1 for target in targets)
+        distances = {}
+        parents = bytearray(size)
+        parents[source_index] = 5
+        best = array('l', [UNREACHED]) * size
+        best[source_index] = 0
+
+        ring = MAX_CELL_COST + 1
+        buckets = [[] for _ in range(ring)]
+        buckets[0].append(source_index)
+        queued = 1
+        pushes = 1
+        pops = expanded = 0
+        distance = 0
+        settled = bytearray(size)
+        while queued and remaining:
+            bucket = buckets[distance % ring]
+            if not bucket:
+                distance += 1
+                continue
+            index = bucket.pop()
+            queued -= 1
+            pops += 1
+            if settled[index]:
+                continue
+            settled[index] = 1
+            expanded += 1
+            if index in remaining:
+                remaining.discard(index)
+                distances[index + 1] = distance
+            col = index % cols
+            # right, down, left, up - same order as OccupancyGrid.DIRECTIONS
+            for neighbor, direction in ((index + 1 if col + 1 < cols else -1, 1),
+                                        (index + cols, 2),
+                                        (index - 1 if col > 0 else -1, 3),
+                                        (index - cols, 4)):
+                if neighbor < 0 or neighbor >= size or cells[neighbor] or settled[neighbor]:
+                    continue
+                tentative = distance + costs[neighbor]
+                if best[neighbor] == UNREACHED or tentative < best[neighbor]:
+                    best[neighbor] = tentative
+                    parents[neighbor] = direction
+                    buckets[tentative % ring].append(neighbor)
+                    queued += 1
+                    pushes += 1
+        if stats is not None:
+            stats.add_search(expanded, pushes, pops, expanded)
+        return distances, parents
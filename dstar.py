@@ -0,0 +1,126 @@
+# dstar.py
+import heapq
+
+INFINITY = float('inf')
+
+
+class DStarLite:
+    # Incremental planner for one leg (D* Lite with a fixed start, i.e. backward LPA*).
+    # The search runs from the goal, so after obstacles change only the g/rhs values the
+    # change actually invalidates are recomputed before the path is read off again.
+    def __init__(self, grid, start, goal):
+        # start and goal are cell indices (row * cols + col)
+        self.grid = grid
+        self.cols = grid.cols
+        self.start = start
+        self.goal = goal
+        self.g = {}
+        self.rhs = {goal: 0}
+        self.queue = []
+        self.queued = {}
+        self.push(goal)
+        self.compute_shortest_path()
+
+    def heuristic(self, index):
+        cols = self.cols
+        return abs(index // cols - self.start // cols) + abs(index % cols - self.start % cols)
+
+    def key(self, index):
+        value = min(self.g.get(index, INFINITY), self.rhs.get(index, INFINITY))
+        return (value + self.heuristic(index), value)
+
+    def push(self, index):
+        key = self.key(index)
+        self.queued[index] = key
+        heapq.heappush(self.queue, (key, index))
+
+    def neighbors(self, index):
+        cols = self.cols
+        col = index % cols
+        size = len(self.grid.cells)
+        if col + 1 < cols:
+            yield index + 1
+        if index + cols < size:
+            yield index + cols
+        if col > 0:
+            yield index - 1
+        if index - cols >= 0:
+            yield index - cols
+
+    def cost(self, a, b):
+        # Moving from a to b costs entering b; g values are costs onward to the goal
+        cells = self.grid.cells
+        if cells[a] or cells[b]:
+            return INFINITY
+        costs = self.grid.costs
+        return 1 if costs is None else costs[b]
+
+    def update_vertex(self, index):
+        if index != self.goal:
+            g = self.g
+            self.rhs[index] = min((self.cost(index, n) + g.get(n, INFINITY) for n in self.neighbors(index)),
+                                  default=INFINITY)
+        self.queued.pop(index, None)
+        if self.g.get(index, INFINITY) != self.rhs.get(index, INFINITY):
+            self.push(index)
+
+    def top(self):
+        # Drop heap entries superseded by a later push or removal
+        while self.queue:
+            key, index = self.queue[0]
+            if self.queued.get(index) == key:
+                return key, index
+            heapq.heappop(self.queue)
+        return (INFINITY, INFINITY), None
+
+    def compute_shortest_path(self):
+        g = self.g
+        rhs = self.rhs
+        start = self.start
+        while True:
+            key, index = self.top()
+            if index is None or (key >= self.key(start) and rhs.get(start, INFINITY) == g.get(start, INFINITY)):
+                return
+            heapq.heappop(self.queue)
+            del self.queued[index]
+            new_key = self.key(index)
+            if key < new_key:
+                self.push(index)
+            elif g.get(index, INFINITY) > rhs.get(index, INFINITY):
+                g[index] = rhs[index]
+                for neighbor in self.neighbors(index):
+                    self.update_vertex(neighbor)
+            else:
+                g[index] = INFINITY
+                self.update_vertex(index)
+                for neighbor in self.neighbors(index):
+                    self.update_vertex(neighbor)
+
+    def touches(self, index):
+        # Whether a change at this cell can matter: the search has visited it or a neighbour
+        return index in self.rhs or any(n in self.rhs for n in self.neighbors(index))
+
+    def notify_changes(self, changed):
+        # changed: cell indices whose obstacle flag was flipped in the grid.
+        # Returns True if the leg's search state was touched and had to be repaired.
+        affected = [index for index in changed if self.touches(index)]
+        if not affected:
+            return False
+        for index in affected:
+            self.update_vertex(index)
+            for neighbor in self.neighbors(index):
+                self.update_vertex(neighbor)
+        self.compute_shortest_path()
+        return True
+
+    def path(self):
+        # Cell indices from start to goal following the g-values, or None if unreachable
+        g = self.g
+        if g.get(self.start, INFINITY) == INFINITY:
+            return None
+        path = [self.start]
+        current = self.start
+        while current != self.goal:
+            current = min(self.neighbors(current), key=lambda n: self.cost(current, n) + g.get(n, INFINITY))
+            path.append(current)
+        return path
@@ -0,0 +1,64 @@
+# grid.py
+from database import get_obstacle_map, get_cost_map, get_layout_version
+
+
+class OccupancyGrid:
+    # In-memory obstacle map for a warehouse floor, loaded from the items table in one read
+    DIRECTIONS = ((0, 1), (1, 0), (0, -1), (-1, 0))
+
+    def __init__(self, rows, cols, cells=None, version=None, costs=None):
+        self.rows = rows
+        self.cols = cols
+        # One byte per cell, indexed by row * cols + col; 1 marks an obstacle
+        self.cells = cells if cells is not None else bytearray(rows * cols)
+        # Cost of moving into each cell, one byte per cell like cells; None when every cell costs 1
+        self.costs = costs
+        # Database layout version the cells were read at; None once they no longer match it
+        self.version = version
+
+    @classmethod
+    def from_database(cls, rows, cols):
+        # Retry if the layout changes between reading the version and the map
+        while True:
+            version = get_layout_version()
+            cells = get_obstacle_map(rows, cols)
+            costs = get_cost_map(rows, cols)
+            if get_layout_version() == version:
+                return cls(rows, cols, cells, version, costs if costs.count(1) != len(costs) else None)
+
+    def in_bounds(self, row, col):
+        return 0 <= row < self.rows and 0 <= col < self.cols
+
+    def is_obstacle(self, row, col):
+        return self.cells[row * self.cols + col] == 1
+
+    def set_obstacle(self, row, col, is_obstacle=True):
+        self.cells[row * self.cols + col] = 1 if is_obstacle else 0
+        self.version = None
+
+    def set_cost(self, row, col, cost):
+        if self.costs is None:
+            self.costs = bytearray(b'\x01') * (self.rows * self.cols)
+        self.costs[row * self.cols + col] = cost
+        self.version = None
+
+    def path_cost(self, indices):
+        # Travel cost along a path of cell indices: every cell after the first is entered once
+        if self.costs is None:
+            return len(indices) - 1
+        costs = self.costs
+        return sum(costs[index] for index in indices[1:])
+
+    def is_free(self, row, col):
+        return 0 <= row < self.rows and 0 <= col < self.cols and not self.cells[row * self.cols + col]
+
+    def neighbors(self, row, col):
+        neighbors = []
+        for dr, dc in self.DIRECTIONS:
+            new_row = row + dr
+            new_col = col + dc
+            if (0 <= new_row < self.rows and
+                0 <= new_col < self.cols and
+                not self.cells[new_row * self.cols + new_col]):
+                neighbors.append((new_row, new_col))
+        return neighbors
@@ -2,10 +2,15 @@ import tkinter as tk
 from tkinter import simpledialog, messagebox, Toplevel, Menu, Spinbox
 from tkinter import filedialog
 from spa import PathFinder
+from landmarks import LandmarkIndex
+from renderer import GridRenderer
+from layoutfile import save_layout, load_layout
+from viewport import ViewportRenderer, render_cells, cell_kind, GRID_LINE_SCALE
+from animation import PathAnimation
+from config import MAX_GRID_SIZE
 import threading
-import json
-from PIL import Image, ImageDraw
-from database import create_database, populate_database, get_item_by_id, get_item, update_item_quantity, is_obstacle, set_obstacle
+from PIL import ImageColor, ImageDraw
+from database import create_database, populate_database, get_item_by_id, get_item, update_item_quantity, pick_items, is_obstacle, set_obstacle, get_grid_snapshot, set_cell_cost, MAX_CELL_COST, NO_QUANTITY
 import math
 import logging, sys
 
@@ -19,6 +24,8 @@ logging.basicConfig(
 
 logger = logging.getLogger('StockBot')
 
+RETAINED_MIN_CELL = 12  # Smallest cell, in pixels, drawn with per-cell canvas items
+
 class PathFinderApp:
     def __init__(self, root):
         logger.debug("Initializing PathFinderApp")
@@ -30,11 +37,19 @@ class PathFinderApp:
         self.start_point = 1
         self.end_point = 1
         self.points = []
+        self.pathfinder = None  # Planner for the last route, kept so obstacle toggles can repair it
+        # Repair broken route legs with landmark-guided A* instead of D* Lite
+        self.use_landmarks = tk.BooleanVar(value=False)
         
         create_database()
         
         self.visualization_window = None  # Initialize visualization window attribute
         self.canvas = None  # Initialize canvas attribute
+        self.renderer = None  # Retained-mode drawing of the grid on the canvas
+        self.animation = None  # Route animation in progress, if any
+        self.frame_interval = 100  # Milliseconds between animation frames
+        self.frame_budget = 8  # Milliseconds of drawing allowed per frame
+        self.steps_per_frame = 1  # Route legs drawn per frame
         
         self.show_configuration_screen()  # Show configuration screen on startup
     
@@ -43,11 +58,11 @@ class PathFinderApp:
         config_window.title("Configure Grid")
         
         tk.Label(config_window, text="Rows:").grid(row=0, column=0, padx=10, pady=10)
-        self.rows_spinbox = Spinbox(config_window, from_=1, to=100, width=5)
+        self.rows_spinbox = Spinbox(config_window, from_=1, to=MAX_GRID_SIZE, width=5)
         self.rows_spinbox.grid(row=0, column=1, padx=10, pady=10)
         
         tk.Label(config_window, text="Columns:").grid(row=1, column=0, padx=10, pady=10)
-        self.cols_spinbox = Spinbox(config_window, from_=1, to=100, width=5)
+        self.cols_spinbox = Spinbox(config_window, from_=1, to=MAX_GRID_SIZE, width=5)
         self.cols_spinbox.grid(row=1, column=1, padx=10, pady=10)
         
         tk.Button(config_window, text="OK", command=lambda: self.set_configuration(config_window)).grid(row=2, column=0, columnspan=2, pady=10)
@@ -58,6 +73,7 @@ class PathFinderApp:
         self.start_point = 1
         self.end_point = self.rows * self.cols
         populate_database(self.rows, self.cols, self.start_point, self.end_point)
+        self.pathfinder = None
         config_window.destroy()
         self.create_widgets()  # Create widgets after configuration is set
         self.create_menu()  # Create menu after configuration is set
@@ -74,6 +90,9 @@ class PathFinderApp:
         self.find_button = tk.Button(control_frame, text="Find Path", command=self.start_find_path_thread)
         self.find_button.grid(row=0, column=2, padx=5, pady=5)
         
+        self.skip_button = tk.Button(control_frame, text="Skip Animation", command=self.skip_animation)
+        self.skip_button.grid(row=0, column=3, padx=5, pady=5)
+        
         self.rows_label = tk.Label(control_frame, text="Rows:")
         self.rows_label.grid(row=1, column=0, padx=5, pady=5, sticky="e")
         self.rows_value = tk.Label(control_frame, text=str(self.rows))
@@ -124,6 +143,9 @@ class PathFinderApp:
                                     command=self.open_visualization_window)
         self.visualize_button.grid(row=8, column=0, padx=5, pady=5, columnspan=3)
 
+        self.cost_button = tk.Button(control_frame, text="Set Cell Cost", command=self.update_cost)
+        self.cost_button.grid(row=9, column=0, padx=5, pady=5, columnspan=3)
+
     def toggle_obstacle_mode(self):
         self.obstacle_mode = not self.obstacle_mode
         if self.obstacle_mode:
@@ -140,6 +162,10 @@ class PathFinderApp:
         file_menu.add_command(label="Load Configuration", command=self.load_configuration)
         menu_bar.add_cascade(label="File", menu=file_menu)
         
+        search_menu = Menu(menu_bar, tearoff=0)
+        search_menu.add_checkbutton(label="Landmark A* Replanning", variable=self.use_landmarks)
+        menu_bar.add_cascade(label="Search", menu=search_menu)
+        
         help_menu = Menu(menu_bar, tearoff=0)
         help_menu.add_command(label="Help", command=self.show_help)
         menu_bar.add_cascade(label="Help", menu=help_menu)
@@ -164,6 +190,7 @@ class PathFinderApp:
         - The calculated path is highlighted in green.
         - Query an item by its ID to see its location and quantity.
         - Update the quantity of an item by its ID.
+        - Give slow cells (congested aisles, ramps) a higher travel cost; routes minimise total cost.
         - Save and load grid configurations.
 
         How to Use:
@@ -190,86 +217,74 @@ class PathFinderApp:
             self.canvas.bind("<Button-1>", self.on_canvas_click)
         self.draw_grid()
     
-    def draw_grid(self):
+    def draw_grid(self, snapshot=None):
         if self.canvas is None:
             return
         
-        self.canvas.delete("all")
-        cell_width = min(800 // self.cols, 800 // self.rows)
-        cell_height = cell_width
-        font_size = max(8, cell_width // 3)
-        
-        for i in range(self.rows):
-            for j in range(self.cols):
-                x1 = j * cell_width
-                y1 = i * cell_height
-                x2 = x1 + cell_width
-                y2 = y1 + cell_height
-                
-                item = get_item(i, j)
-                cell_id = i * self.cols + j + 1
-                
-                # Set cell color based on status
-                if is_obstacle(i, j):
-                    fill_color = "gray"
-                elif item and item[1] is not None and item[1] == 0:
-                    fill_color = "red"
-                else:
-                    fill_color = "white"
-                
-                self.canvas.create_rectangle(x1, y1, x2, y2, 
-                                        outline="black", 
-                                        fill=fill_color,
-                                        tags=f"cell_{cell_id}")
-                
-                if not is_obstacle(i, j):
-                    # Draw cell number
-                    self.canvas.create_text(x1 + cell_width/2, y1 + cell_height/2,
-                                        text=str(cell_id),
-                                        font=("Arial", font_size),
-                                        fill="black",
-                                        tags=f"text_{cell_id}")
-                    
-
-    def highlight_point(self, point, color):
-        if self.canvas is None:
-            return
-            
-        cell_width = min(800 // self.cols, 800 // self.rows)
-        cell_height = cell_width
-        row, col = divmod(point - 1, self.cols)
-        x1 = col * cell_width
-        y1 = row * cell_height
-        
-        # Create highlight while preserving existing cell color
-        cell_tag = f"cell_{point}"
-        text_tag = f"text_{point}"
-        qty_tag = f"qty_{point}"
-        
-        # Add semi-transparent highlight
-        highlight = self.canvas.create_rectangle(x1, y1, x1 + cell_width, y1 + cell_height,
-                                            fill=color, stipple="gray50")
-        
-        # Raise existing elements above highlight
-        self.canvas.tag_raise(cell_tag)
-        self.canvas.tag_raise(text_tag)
-        self.canvas.tag_raise(qty_tag)
+        if snapshot is None:
+            snapshot = get_grid_snapshot(self.rows, self.cols)
+        
+        # Cell items are created once per grid size; afterwards only changed cells are updated
+        # Floors too large for one canvas item per cell are drawn as zoomable raster tiles
+        renderer = self.renderer
+        if renderer is None or renderer.canvas is not self.canvas or (renderer.rows, renderer.cols) != (self.rows, self.cols):
+            if renderer is not None and renderer.canvas is self.canvas:
+                renderer.close()
+            if min(800 // self.cols, 800 // self.rows) >= RETAINED_MIN_CELL:
+                self.renderer = GridRenderer(self.canvas, self.rows, self.cols)
+            else:
+                self.renderer = ViewportRenderer(self.canvas, self.rows, self.cols)
+            self.renderer.build(snapshot)
+        else:
+            renderer.sync(snapshot)
+            renderer.clear_overlays()
         
     def on_canvas_click(self, event):
-        cell_width = min(800 // self.cols, 800 // self.rows)
-        cell_height = cell_width
-        col = event.x // cell_width
-        row = event.y // cell_height
+        if self.renderer is None:
+            return
+        index = self.renderer.cell_at(event.x, event.y)
+        if index is None:
+            return
+        row, col = divmod(index, self.cols)
         
         if self.obstacle_mode:
             current = is_obstacle(row, col)
             set_obstacle(row, col, not current)
-            self.draw_grid()
+            if self.renderer is not None:
+                self.renderer.clear_overlays()
+                self.renderer.set_obstacle(row * self.cols + col + 1, not current)
+            self.replan_route(row, col, not current)
         else:
             item = get_item(row, col)
             if item and item[1] is not None and not is_obstacle(row, col):
                 self.show_item_info(row, col)
     
+    def replan_route(self, row, col, blocked=None, cost=None):
+        # Repair the last planned route around a toggled or re-costed cell instead of replanning every leg
+        if self.pathfinder is None or self.pathfinder.route is None:
+            return
+        if blocked is not None:
+            self.pathfinder.grid.set_obstacle(row, col, blocked)
+        if cost is not None:
+            self.pathfinder.grid.set_cost(row, col, cost)
+        pathfinder = self.pathfinder
+        if not pathfinder.incremental and pathfinder.landmarks is None and pathfinder.grid.costs is None:
+            pathfinder.landmarks = LandmarkIndex.for_grid(pathfinder.grid)
+        try:
+            path = self.pathfinder.replan([(row, col)])
+        except ValueError as e:
+            logger.error(f"Replanning failed: {str(e)}")
+            self.pathfinder = None
+            messagebox.showerror("Path Error", str(e))
+            return
+        logger.info(f"Route repaired: {path}")
+        self.path = path
+        self.path_output.delete(1.0, tk.END)
+        self.path_output.insert(tk.END, " -> ".join(map(str, path)))
+        self.path_distance_label.config(text=f"Total Path Distance: {self.calculate_path_cost(path)}")
+        for i in range(len(path) - 1):
+            self.draw_arrow(path[i], path[i + 1])
+    
     def show_item_info(self, row, col):
         item = get_item(row, col)
         if item and item[1] is not None:  # Double check item exists and has quantity
@@ -309,40 +324,43 @@ class PathFinderApp:
                 messagebox.showinfo("Success", 
                                 f"Updated quantity for ItemID {item_id} to {quantity}")
     
+    def update_cost(self):
+        item_id = simpledialog.askinteger("Set Cell Cost", "Enter the ItemID:", minvalue=1)
+        if item_id is None:
+            return
+        item = get_item_by_id(item_id)
+        if not item:
+            messagebox.showerror("Error", f"ItemID {item_id} does not exist")
+            return
+        cost = simpledialog.askinteger("Set Cell Cost",
+                                       f"Enter the travel cost for ItemID {item_id} (1 = normal aisle):",
+                                       minvalue=1, maxvalue=MAX_CELL_COST)
+        if cost is not None:
+            set_cell_cost(item[0], item[1], cost)
+            logger.info(f"Set ItemID {item_id} cost to {cost}")
+            if self.renderer is not None:
+                self.renderer.clear_overlays()
+            self.replan_route(item[0], item[1], cost=cost)
+
     def highlight_point(self, point, color):
-        if self.canvas is None:
+        if self.renderer is None:
             return
-        cell_width = min(800 // self.cols, 800 // self.rows)
-        cell_height = cell_width
-        font_size = max(8, cell_width // 3)
-        row, col = divmod(point - 1, self.cols)
-        x1 = col * cell_width
-        y1 = row * cell_height
-        x2 = x1 + cell_width
-        y2 = y1 + cell_height
-        self.canvas.create_rectangle(x1, y1, x2, y2, outline="black", fill=color)
-        self.canvas.create_text(x1 + cell_width / 2, y1 + cell_height / 2, text=str(point), fill="green", font=("Arial", font_size))
+        self.renderer.mark_cell(point, color)
     
     def draw_arrow(self, start_point, end_point):
-        if self.canvas is None:
+        if self.renderer is None:
             return
-        cell_width = min(800 // self.cols, 800 // self.rows)
-        cell_height = cell_width
-        
-        start_row, start_col = divmod(start_point - 1, self.cols)
-        end_row, end_col = divmod(end_point - 1, self.cols)
-        
-        start_x = start_col * cell_width + cell_width / 2
-        start_y = start_row * cell_height + cell_height / 2
-        end_x = end_col * cell_width + cell_width / 2
-        end_y = end_row * cell_height + cell_height / 2
-        
-        self.canvas.create_line(start_x, start_y, end_x, end_y, arrow=tk.LAST, fill="black")
+        self.renderer.arrow(start_point, end_point)
     
     def start_find_path_thread(self):
-        threading.Thread(target=self.find_path).start()
+        # Input checks and drawing stay on the Tk thread; only the planning runs on the worker
+        valid_points = self.prepare_find_path()
+        if valid_points is None:
+            return
+        self.find_button.config(state=tk.DISABLED)
+        threading.Thread(target=self.find_path, args=(valid_points, self.use_landmarks.get()), daemon=True).start()
     
-    def find_path(self):
+    def prepare_find_path(self):
         logger.debug("Starting pathfinding calculation")
         try:
             points = list(map(int, self.points_entry.get().split(',')))
@@ -359,12 +377,15 @@ class PathFinderApp:
                 
         except ValueError:
             messagebox.showerror("Invalid Input", "Please enter valid points.")
-            return
+            return None
 
         # Check if start or end points are in the user input
         if self.start_point in self.points or self.end_point in self.points:
             messagebox.showerror("Invalid Input", "You have inputted a start and/or end point. Please remove it!")
-            return
+            return None
+        # A route still being drawn is finished first so its picks are committed
+        if self.animation is not None:
+            self.animation.skip()
         # Remove out-of-stock items from the points list
         valid_points = []
         self.open_visualization_window()
@@ -375,124 +396,125 @@ class PathFinderApp:
                 self.highlight_point(point, "red")
             else:
                 valid_points.append(point)
-
+        return valid_points
+    
+    def find_path(self, valid_points, use_landmarks=False):
+        # Runs on the worker thread; results are handed back to the Tk thread with after().
+        # Find Path is re-enabled however the search ends.
         try:
-            pathfinder = PathFinder(self.rows, self.cols)
+            # The landmark index only guides A*, so with it legs are repaired by A* rather than
+            # D* Lite; replan_route builds it at the first repair, when A* first runs
+            pathfinder = PathFinder(self.rows, self.cols, incremental=not use_landmarks)
             path = pathfinder.find_shortest_path(self.start_point, self.end_point, valid_points)
-            if path:
-                logger.info(f"Path found: {path}")
-                self.path = path  # Store the path in an instance variable
-                self.animate_path(path, valid_points)
-                self.path_output.delete(1.0, tk.END)
-                self.path_output.insert(tk.END, " -> ".join(map(str, path)))
-                self.path_distance_label.config(text=f"Total Path Distance: {self.calculate_path_cost(path)}")
-            else:
-                messagebox.showinfo("No Path", "No path found between the given points.")
+            logger.debug(f"Search stats: {pathfinder.stats.to_dict()}")
         except (ValueError, KeyError) as e:
             logger.error(f"Pathfinding failed: {str(e)}")
-            messagebox.showerror("Path Error", str(e))
+            self.root.after(0, self.show_path_error, str(e))
+        except Exception as e:
+            logger.exception("Pathfinding crashed")
+            self.root.after(0, self.show_path_error, f"Unexpected error: {e}")
+        else:
+            self.root.after(0, self.show_path, pathfinder, path, valid_points)
+        finally:
+            self.root.after(0, self.find_button.config, {'state': tk.NORMAL})
+    
+    def show_path_error(self, message):
+        messagebox.showerror("Path Error", message)
+    
+    def show_path(self, pathfinder, path, valid_points):
+        self.pathfinder = pathfinder
+        if path:
+            logger.info(f"Path found: {path}")
+            self.path = path  # Store the path in an instance variable
+            self.animate_path(path, valid_points)
+            self.path_output.delete(1.0, tk.END)
+            self.path_output.insert(tk.END, " -> ".join(map(str, path)))
+            self.path_distance_label.config(text=f"Total Path Distance: {self.calculate_path_cost(path)}")
+        else:
+            messagebox.showinfo("No Path", "No path found between the given points.")
         
     def animate_path(self, path, valid_points):
+        # Arrows are drawn from after() callbacks; stock is only taken once the whole route is shown
+        if self.animation is not None:
+            self.animation.skip()
         self.draw_grid()
-        cell_width = min(800 // self.cols, 800 // self.rows)
-        cell_height = cell_width
-        
-        # Track visited points to avoid multiple decrements
-        visited_points = set()
-        
-        for i in range(len(path) - 1):
-            current_point = path[i]
-            next_point = path[i + 1]
-            
-            # Update quantity if point is in user-specified points
-            if current_point in self.points and current_point not in visited_points:
-                row, col = divmod(current_point - 1, self.cols)
-                item = get_item(row, col)
-                if item and item[1] is not None and item[1] > 0:
-                    new_quantity = item[1] - 1
-                    update_item_quantity(current_point, new_quantity)
-                    logger.info(f"Updated quantity for point {current_point} to {new_quantity}")
-                    visited_points.add(current_point)
-            
-            self.draw_arrow(current_point, next_point)
-            self.root.update()
-            self.root.after(100)
-        
-        # Check final point
-        if path[-1] in self.points and path[-1] not in visited_points:
-            row, col = divmod(path[-1] - 1, self.cols)
-            item = get_item(row, col)
-            if item and item[1] is not None and item[1] > 0:
-                new_quantity = item[1] - 1
-                update_item_quantity(path[-1], new_quantity)
-                logger.info(f"Updated quantity for point {path[-1]} to {new_quantity}")
-        
-        # Redraw grid with updated quantities
-        self.draw_grid()
+        self.animation = PathAnimation(self.root, self.renderer, path,
+                                       on_done=lambda: self.commit_route(path, valid_points),
+                                       frame_interval=self.frame_interval,
+                                       frame_budget=self.frame_budget,
+                                       steps_per_frame=self.steps_per_frame)
+        self.animation.start()
+    
+    def skip_animation(self):
+        if self.animation is not None:
+            self.animation.skip()
+    
+    def commit_route(self, path, valid_points):
+        self.animation = None
+        
+        # Take one unit of every picked item on the route in one transaction; like the search,
+        # only in-stock picks count, and cells without a quantity are never picked
+        quantities = self.renderer.quantities
+        picks = pick_items([point for point in dict.fromkeys(path)
+                            if point in valid_points and quantities[point - 1] != NO_QUANTITY])
+        for point, (picked, quantity) in picks.items():
+            if picked:
+                logger.info(f"Updated quantity for point {point} to {quantity}")
+            else:
+                logger.warning(f"Point {point} was out of stock when the route was committed")
+            self.renderer.set_quantity(point, quantity)
         
         # Draw path visualization
+        self.renderer.clear_overlays()
         for point in path:
-            row, col = divmod(point - 1, self.cols)
-            item = get_item(row, col)
-            if item and item[1] == 0:
+            if self.renderer.quantities[point - 1] == 0:
                 self.highlight_point(point, "red")
             else:
-                x1 = col * cell_width
-                y1 = row * cell_height
-                x2 = x1 + cell_width
-                y2 = y1 + cell_height
-                self.canvas.create_rectangle(x1, y1, x2, y2, outline="black", fill="green")
-                self.canvas.create_text(x1 + cell_width / 2, y1 + cell_height / 2, text=str(point), fill="black")
+                self.renderer.mark_cell(point, "green", layer="path", text_color="black")
         
         # Highlight points
         self.highlight_point(self.start_point, "blue")
         self.highlight_point(self.end_point, "blue")
         
-        for point in self.points:
-            if point in valid_points:
-                self.highlight_point(point, "yellow")
+        # valid_points belong to this route; self.points may already hold the next order's
+        for point in valid_points:
+            self.highlight_point(point, "yellow")
     
     def calculate_path_cost(self, path):
-        # Calculate the total cost of the path (e.g., total distance)
-        return len(path) - 1
+        # Total travel cost of the path: its length, plus extra for any slow cells it crosses
+        if self.pathfinder is None:
+            return len(path) - 1
+        return self.pathfinder.path_cost(path)
     
     def save_configuration(self):
-        config = {
-            "rows": self.rows,
-            "cols": self.cols,
-            "points": self.points,
-            "items": []
-        }
-        for i in range(self.rows):
-            for j in range(self.cols):
-                item = get_item(i, j)
-                if item:
-                    item_id, quantity = item
-                    config["items"].append({"row": i, "col": j, "item_id": item_id, "quantity": quantity})
-        
-        file_path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON files", "*.json")])
+        # Binary snapshots by default; choosing a .json name writes the JSON configuration format
+        file_path = filedialog.asksaveasfilename(defaultextension=".layout",
+                                                 filetypes=[("Layout snapshots", "*.layout"), ("JSON files", "*.json")])
         if file_path:
-            with open(file_path, "w") as file:
-                json.dump(config, file)
+            save_layout(file_path, points=self.points)
             messagebox.showinfo("Save Configuration", "Configuration saved successfully.")
     
     def load_configuration(self):
-        file_path = filedialog.askopenfilename(defaultextension=".json", filetypes=[("JSON files", "*.json")])
+        file_path = filedialog.askopenfilename(defaultextension=".layout",
+                                               filetypes=[("Layout snapshots", "*.layout"), ("JSON files", "*.json")])
         if file_path:
-            with open(file_path, "r") as file:
-                config = json.load(file)
+            try:
+                layout = load_layout(file_path)
+            except (OSError, ValueError, KeyError) as e:
+                logger.error(f"Loading {file_path} failed: {str(e)}")
+                messagebox.showerror("Load Configuration", str(e))
+                return
             
-            self.rows = config["rows"]
-            self.cols = config["cols"]
-            self.points = config["points"]
+            self.rows = layout.rows
+            self.cols = layout.cols
+            self.points = layout.points
+            self.start_point = 1
+            self.end_point = self.rows * self.cols
+            self.pathfinder = None
             self.rows_value.config(text=str(self.rows))
             self.cols_value.config(text=str(self.cols))
             
-            create_database()
-            for item in config["items"]:
-                update_item_quantity(item["item_id"], item["quantity"])
-            
-            self.draw_grid()
+            self.draw_grid((layout.quantities, layout.obstacles))
             messagebox.showinfo("Load Configuration", "Configuration loaded successfully.")
     
     def export_grid(self):
@@ -500,30 +522,39 @@ class PathFinderApp:
         if not file_path:
             return
         
-        cell_width = min(800 // self.cols, 800 // self.rows)
+        # At least one pixel per cell, so floors wider than 800 cells still export
+        cell_width = max(1, min(800 // self.cols, 800 // self.rows))
         cell_height = cell_width
         img_width = self.cols * cell_width
         img_height = self.rows * cell_height
         
-        image = Image.new("RGB", (img_width, img_height), "white")
+        # Rasterise the cell colours in one pass; start/end and user points are painted over
+        quantities, obstacles = get_grid_snapshot(self.rows, self.cols)
+        palette_names = ["white", "red", "gray", "blue", "yellow"]
+        cells = bytearray(cell_kind(q, o) for q, o in zip(quantities, obstacles))
+        # Points typed in but never planned may lie off the floor; those are left out
+        for point in (self.start_point, self.end_point):
+            if point and 0 < point <= len(cells):
+                cells[point - 1] = palette_names.index("blue")
+        for point in self.points:
+            if 0 < point <= len(cells):
+                cells[point - 1] = palette_names.index("yellow")
+        palette = []
+        for name in palette_names:
+            palette.extend(ImageColor.getrgb(name))
+        image = render_cells(cells, self.cols, 0, self.rows, 0, self.cols, img_width, img_height, palette,
+                             grid_lines=cell_width >= GRID_LINE_SCALE)
         draw = ImageDraw.Draw(image)
         
-        for i in range(self.rows):
-            for j in range(self.cols):
-                x1 = j * cell_width
-                y1 = i * cell_height
-                x2 = x1 + cell_width
-                y2 = y1 + cell_height
-                item = get_item(i, j)
-                if item and item[1] == 0:
-                    color = "red"
-                else:
-                    color = "white"
-                draw.rectangle([x1, y1, x2, y2], outline="black", fill=color)
-                draw.text((x1 + cell_width / 2, y1 + cell_height / 2), str(i * self.cols + j + 1), fill="green")
+        if cell_width >= RETAINED_MIN_CELL:
+            for index in range(self.rows * self.cols):
+                row, col = divmod(index, self.cols)
+                draw.text((col * cell_width + cell_width / 2, row * cell_height + cell_height / 2),
+                          str(index + 1), fill="green")
         
         # Highlight the path with arrows
         if hasattr(self, 'path') and self.path:
+            arrow_size = min(10, cell_width)
             for i in range(len(self.path) - 1):
                 start_point = self.path[i]
                 end_point = self.path[i + 1]
@@ -535,10 +566,9 @@ class PathFinderApp:
                 end_x = end_col * cell_width + cell_width / 2
                 end_y = end_row * cell_height + cell_height / 2
                 
-                draw.line([start_x, start_y, end_x, end_y], fill="black", width=2)
+                draw.line([start_x, start_y, end_x, end_y], fill="black", width=2 if cell_width >= 4 else 1)
                 
                 # Draw arrowhead
-                arrow_size = 10
                 angle = math.atan2(end_y - start_y, end_x - start_x)
                 arrow_x1 = end_x - arrow_size * math.cos(angle - math.pi / 6)
                 arrow_y1 = end_y - arrow_size * math.sin(angle - math.pi / 6)
@@ -546,35 +576,6 @@ class PathFinderApp:
                 arrow_y2 = end_y - arrow_size * math.sin(angle + math.pi / 6)
                 draw.polygon([end_x, end_y, arrow_x1, arrow_y1, arrow_x2, arrow_y2], fill="black")
         
-        # Highlight start and end points
-        if hasattr(self, 'start_point') and self.start_point:
-            row, col = divmod(self.start_point - 1, self.cols)
-            x1 = col * cell_width
-            y1 = row * cell_height
-            x2 = x1 + cell_width
-            y2 = y1 + cell_height
-            draw.rectangle([x1, y1, x2, y2], outline="black", fill="blue")
-            draw.text((x1 + cell_width / 2, y1 + cell_height / 2), str(self.start_point), fill="green")
-        
-        if hasattr(self, 'end_point') and self.end_point:
-            row, col = divmod(self.end_point - 1, self.cols)
-            x1 = col * cell_width
-            y1 = row * cell_height
-            x2 = x1 + cell_width
-            y2 = y1 + cell_height
-            draw.rectangle([x1, y1, x2, y2], outline="black", fill="blue")
-            draw.text((x1 + cell_width / 2, y1 + cell_height / 2), str(self.end_point), fill="green")
-        
-        # Highlight user input points
-        for point in self.points:
-            row, col = divmod(point - 1, self.cols)
-            x1 = col * cell_width
-            y1 = row * cell_height
-            x2 = x1 + cell_width
-            y2 = y1 + cell_height
-            draw.rectangle([x1, y1, x2, y2], outline="black", fill="yellow")
-            draw.text((x1 + cell_width / 2, y1 + cell_height / 2), str(point), fill="green")
-        
         image.save(file_path)
         messagebox.showinfo("Export Grid", "Grid exported successfully.")
 
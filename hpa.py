@@ -0,0 +1,266 @@
+# hpa.py
+import heapq
+
+# Open runs along a cluster border at least this long also get an entrance in the middle
+WIDE_ENTRANCE = 6
+
+
+class HierarchicalPlanner:
+    # HPA*: the floor is cut into square clusters joined by entrances on their borders.
+    # Legs are searched on the abstract graph of entrance cells and only then refined into
+    # cells one cluster at a time. Intra-cluster edge costs are computed the first time a
+    # search reaches a cluster, so a large floor costs nothing until it is planned over.
+    def __init__(self, grid, cluster_size=16):
+        self.grid = grid
+        self.rows = grid.rows
+        self.cols = grid.cols
+        self.cluster_size = cluster_size
+        self.cluster_rows = -(-self.rows // cluster_size)
+        self.cluster_cols = -(-self.cols // cluster_size)
+        self.border_transitions = {}  # border key -> [(cell, cell across the border)]
+        self.transitions = {}         # entrance cell -> set of entrance cells across a border
+        self.intra_edges = {}         # cluster -> {entrance: {entrance: cost}}
+        self.refined = {}             # (a, b) -> cell path between two entrances of one cluster
+        for cluster_row in range(self.cluster_rows):
+            for cluster_col in range(self.cluster_cols):
+                if cluster_col + 1 < self.cluster_cols:
+                    self.build_border(('h', cluster_row, cluster_col))
+                if cluster_row + 1 < self.cluster_rows:
+                    self.build_border(('v', cluster_row, cluster_col))
+
+    def cluster_of(self, index):
+        row, col = divmod(index, self.cols)
+        return (row // self.cluster_size, col // self.cluster_size)
+
+    def bounds(self, cluster):
+        size = self.cluster_size
+        top = cluster[0] * size
+        left = cluster[1] * size
+        return top, min(top + size, self.rows), left, min(left + size, self.cols)
+
+    def border_pairs(self, key):
+        # ('h', r, c) separates cluster (r, c) from (r, c + 1); ('v', r, c) separates (r, c) from (r + 1, c)
+        kind, cluster_row, cluster_col = key
+        top, bottom, left, right = self.bounds((cluster_row, cluster_col))
+        cols = self.cols
+        if kind == 'h':
+            return [(row * cols + right - 1, row * cols + right) for row in range(top, bottom)]
+        return [((bottom - 1) * cols + col, bottom * cols + col) for col in range(left, right)]
+
+    def borders_of(self, cluster):
+        cluster_row, cluster_col = cluster
+        keys = []
+        if cluster_col + 1 < self.cluster_cols:
+            keys.append(('h', cluster_row, cluster_col))
+        if cluster_col > 0:
+            keys.append(('h', cluster_row, cluster_col - 1))
+        if cluster_row + 1 < self.cluster_rows:
+            keys.append(('v', cluster_row, cluster_col))
+        if cluster_row > 0:
+            keys.append(('v', cluster_row - 1, cluster_col))
+        return keys
+
+    def build_border(self, key):
+        for a, b in self.border_transitions.get(key, ()):
+            for x, y in ((a, b), (b, a)):
+                partners = self.transitions.get(x)
+                if partners is not None:
+                    partners.discard(y)
+                    if not partners:
+                        del self.transitions[x]
+
+        cells = self.grid.cells
+        chosen = []
+        run = []
+        for a, b in self.border_pairs(key) + [(None, None)]:
+            if a is not None and not cells[a] and not cells[b]:
+                run.append((a, b))
+                continue
+            # An entrance at each end of every open run, so legs passing either side of a wall
+            # gap do not detour through a single entrance in its middle
+            if len(run) >= WIDE_ENTRANCE:
+                chosen.extend((run[0], run[len(run) // 2], run[-1]))
+            elif len(run) > 1:
+                chosen.extend((run[0], run[-1]))
+            elif run:
+                chosen.append(run[0])
+            run = []
+
+        self.border_transitions[key] = chosen
+        for a, b in chosen:
+            self.transitions.setdefault(a, set()).add(b)
+            self.transitions.setdefault(b, set()).add(a)
+
+    def entrances(self, cluster):
+        found = set()
+        for key in self.borders_of(cluster):
+            for a, b in self.border_transitions[key]:
+                found.add(a if self.cluster_of(a) == cluster else b)
+        return found
+
+    def local_search(self, cluster, source):
+        # BFS confined to one cluster; returns distances and parents keyed by cell index
+        return self.box_search(self.bounds(cluster), source)
+
+    def box_search(self, box, source):
+        # BFS confined to the cells top <= row < bottom, left <= col < right
+        top, bottom, left, right = box
+        cols = self.cols
+        cells = self.grid.cells
+        distances = {source: 0}
+        parents = {source: None}
+        frontier = [source]
+        distance = 0
+        while frontier:
+            distance += 1
+            next_frontier = []
+            for index in frontier:
+                row, col = divmod(index, cols)
+                for neighbor_row, neighbor_col in ((row, col + 1), (row + 1, col), (row, col - 1), (row - 1, col)):
+                    if top <= neighbor_row < bottom and left <= neighbor_col < right:
+                        neighbor = neighbor_row * cols + neighbor_col
+                        if neighbor not in distances and not cells[neighbor]:
+                            distances[neighbor] = distance
+                            parents[neighbor] = index
+                            next_frontier.append(neighbor)
+            frontier = next_frontier
+        return distances, parents
+
+    @staticmethod
+    def trace(parents, index):
+        path = []
+        while index is not None:
+            path.append(index)
+            index = parents[index]
+        return path[::-1]
+
+    def cluster_edges(self, cluster):
+        edges = self.intra_edges.get(cluster)
+        if edges is None:
+            edges = {}
+            nodes = self.entrances(cluster)
+            for node in nodes:
+                distances, _ = self.local_search(cluster, node)
+                edges[node] = {other: distances[other] for other in nodes if other != node and other in distances}
+            self.intra_edges[cluster] = edges
+        return edges
+
+    def update_cells(self, changed):
+        # Rebuild the borders of each cluster holding a toggled cell; intra-cluster edges of
+        # those clusters and their neighbours are dropped and recomputed on next use.
+        clusters = set(self.cluster_of(index) for index in changed)
+        touched = set(clusters)
+        for cluster in clusters:
+            for key in self.borders_of(cluster):
+                self.build_border(key)
+            cluster_row, cluster_col = cluster
+            touched.update(((cluster_row - 1, cluster_col), (cluster_row + 1, cluster_col),
+                            (cluster_row, cluster_col - 1), (cluster_row, cluster_col + 1)))
+        for cluster in touched:
+            self.intra_edges.pop(cluster, None)
+        self.refined = {key: path for key, path in self.refined.items()
+                        if self.cluster_of(key[0]) not in touched}
+
+    def heuristic(self, a, b):
+        cols = self.cols
+        return abs(a // cols - b // cols) + abs(a % cols - b % cols)
+
+    def find_path(self, start, end, stats=None):
+        # start and end are point numbers (ItemIDs); returns the full cell-by-cell path.
+        # stats, a searchstats.SearchStats, gets the abstract search's node and heap counts.
+        cells = self.grid.cells
+        source = start - 1
+        goal = end - 1
+        if cells[source] or cells[goal]:
+            return None
+        if source == goal:
+            return [start]
+
+        source_cluster = self.cluster_of(source)
+        goal_cluster = self.cluster_of(goal)
+        source_distances, source_parents = self.local_search(source_cluster, source)
+        goal_distances, goal_parents = self.local_search(goal_cluster, goal)
+        source_links = {node: source_distances[node] for node in self.entrances(source_cluster)
+                        if node in source_distances and node != source}
+        goal_links = {node: goal_distances[node] for node in self.entrances(goal_cluster)
+                      if node in goal_distances}
+        # Start and goal in the same or neighbouring clusters are also searched directly over
+        # both clusters, so short legs across a border never detour through an entrance.
+        # Longer legs can still come out longer than optimal by the detours to and between
+        # entrance cells (a few percent on open floors).
+        direct = None
+        if abs(source_cluster[0] - goal_cluster[0]) <= 1 and abs(source_cluster[1] - goal_cluster[1]) <= 1:
+            source_box = self.bounds(source_cluster)
+            goal_box = self.bounds(goal_cluster)
+            box = (min(source_box[0], goal_box[0]), max(source_box[1], goal_box[1]),
+                   min(source_box[2], goal_box[2]), max(source_box[3], goal_box[3]))
+            direct_distances, direct_parents = self.box_search(box, source)
+            direct = direct_distances.get(goal)
+
+        # A* over the abstract graph, with the start and goal linked into their clusters
+        # Ties on f go to the deeper node, otherwise open floors expand every cluster in the box
+        open_list = [(self.heuristic(source, goal), 0, 0, source)]
+        g_score = {source: 0}
+        came_from = {}
+        found = None
+        expanded = pops = pushes = lookups = 0
+        while open_list:
+            _, _, g, node = heapq.heappop(open_list)
+            pops += 1
+            if g > g_score[node]:
+                continue
+            expanded += 1
+            if node == goal:
+                found = g
+                break
+            if direct is not None and g + self.heuristic(node, goal) >= direct:
+                break
+            lookups += 1
+            if node == source:
+                successors = list(source_links.items())
+            else:
+                successors = list(self.cluster_edges(self.cluster_of(node)).get(node, {}).items())
+            successors.extend((partner, 1) for partner in self.transitions.get(node, ()))
+            if node in goal_links and node != goal:
+                successors.append((goal, goal_links[node]))
+            for neighbor, cost in successors:
+                tentative = g + cost
+                if tentative < g_score.get(neighbor, tentative + 1):
+                    g_score[neighbor] = tentative
+                    came_from[neighbor] = node
+                    heapq.heappush(open_list, (tentative + self.heuristic(neighbor, goal), -tentative,
+                                               tentative, neighbor))
+                    pushes += 1
+        if stats is not None:
+            stats.add_search(expanded, pushes + 1, pops, lookups)
+
+        if found is None or (direct is not None and direct <= found):
+            if direct is None:
+                return None
+            return [index + 1 for index in self.trace(direct_parents, goal)]
+
+        abstract = [goal]
+        while abstract[-1] != source:
+            abstract.append(came_from[abstract[-1]])
+        abstract.reverse()
+
+        # Refine each abstract edge into cells
+        path = [source]
+        for i, (a, b) in enumerate(zip(abstract, abstract[1:])):
+            if b in self.transitions.get(a, ()) and self.cluster_of(a) != self.cluster_of(b):
+                path.append(b)
+            elif a == source:
+                path.extend(self.trace(source_parents, b)[1:])
+            elif b == goal:
+                path.extend(self.trace(goal_parents, a)[::-1][1:])
+            else:
+                path.extend(self.refine(a, b)[1:])
+        return [index + 1 for index in path]
+
+    def refine(self, a, b):
+        path = self.refined.get((a, b))
+        if path is None:
+            _, parents = self.local_search(self.cluster_of(a), a)
+            path = self.trace(parents, b)
+            self.refined[(a, b)] = path
+        return path
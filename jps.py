@@ -0,0 +1,218 @@
+# jps.py
+import heapq
+import random
+from array import array
+
+
+class JumpPointSearch:
+    # Jump Point Search for 4-connected uniform-cost grids.
+    # Ties between equal-length paths are broken "vertical first", so a horizontal run
+    # only needs to stop where a vertical neighbour is forced (the cell beside the
+    # previous step was blocked), while a vertical run scans sideways at every step.
+    def __init__(self, grid):
+        self.grid = grid
+        self.refresh()
+
+    def refresh(self):
+        # Precompute, per cell and horizontal direction, the next forced cell and the end of
+        # the open run, so a horizontal jump is O(1). Call again after the grid changes.
+        self.rows = self.grid.rows
+        self.cols = self.grid.cols
+        self.cells = self.grid.cells
+        size = self.rows * self.cols
+        self.next_forced = {1: array('i', [-1]) * size, -1: array('i', [-1]) * size}
+        self.run_end = {1: array('i', [-1]) * size, -1: array('i', [-1]) * size}
+        for row in range(self.rows):
+            first = row * self.cols
+            last = first + self.cols - 1
+            self.scan_row(range(last, first - 1, -1), 1)
+            self.scan_row(range(first, last + 1), -1)
+
+    def scan_row(self, indices, dc):
+        # Walk a row against the jump direction dc, carrying the nearest forced cell ahead
+        cells = self.cells
+        next_forced = self.next_forced[dc]
+        run_end = self.run_end[dc]
+        forced = -1
+        end = -1
+        for index in indices:
+            if cells[index]:
+                forced = -1
+                end = -1
+                continue
+            next_forced[index] = forced
+            run_end[index] = end if end != -1 else index
+            if end == -1:
+                end = index
+            if self.is_forced(index, dc):
+                forced = index
+
+    def is_forced(self, index, dc):
+        # True when entering index along dc exposes a vertical neighbour the previous cell lacked
+        cells = self.cells
+        cols = self.cols
+        col = index % cols
+        if not 0 <= col - dc < cols:
+            return False
+        behind = index - dc
+        up = index - cols
+        down = index + cols
+        if up >= 0 and not cells[up] and cells[behind - cols]:
+            return True
+        return down < len(cells) and not cells[down] and cells[behind + cols]
+
+    def free(self, index):
+        return 0 <= index < len(self.cells) and not self.cells[index]
+
+    def jump_horizontal(self, index, dc, goal):
+        end = self.run_end[dc][index]
+        if end == index:
+            return None
+        if goal // self.cols == index // self.cols and 0 < (goal - index) * dc <= (end - index) * dc:
+            forced = self.next_forced[dc][index]
+            if forced == -1 or (goal - forced) * dc <= 0:
+                return goal
+        return self.next_forced[dc][index] if self.next_forced[dc][index] != -1 else None
+
+    def jump_vertical(self, index, dr, goal):
+        step = dr * self.cols
+        while True:
+            index += step
+            if not self.free(index):
+                return None
+            if index == goal:
+                return index
+            if (self.jump_horizontal(index, 1, goal) is not None or
+                    self.jump_horizontal(index, -1, goal) is not None):
+                return index
+
+    def successors(self, index, direction, goal):
+        # direction is (dr, dc) of the move that reached index, or None at the start
+        cols = self.cols
+        cells = self.cells
+        jumps = []
+        if direction is None or direction[0] != 0:
+            vertical = (-1, 1) if direction is None else (direction[0],)
+            horizontal = (-1, 1)
+        else:
+            dc = direction[1]
+            horizontal = (dc,)
+            behind = index - dc
+            vertical = []
+            if index - cols >= 0 and not cells[index - cols] and cells[behind - cols]:
+                vertical.append(-1)
+            if index + cols < len(cells) and not cells[index + cols] and cells[behind + cols]:
+                vertical.append(1)
+
+        for dc in horizontal:
+            target = self.jump_horizontal(index, dc, goal)
+            if target is not None:
+                jumps.append((target, (0, dc)))
+        for dr in vertical:
+            target = self.jump_vertical(index, dr, goal)
+            if target is not None:
+                jumps.append((target, (dr, 0)))
+        return jumps
+
+    def heuristic(self, a, b):
+        return abs(a // self.cols - b // self.cols) + abs(a % self.cols - b % self.cols)
+
+    def find_path(self, start, end, stats=None):
+        # start and end are point numbers (ItemIDs); returns the full cell-by-cell path.
+        # stats, a searchstats.SearchStats, gets the search's node and heap counts.
+        start_index = start - 1
+        goal = end - 1
+        if not self.free(start_index) or not self.free(goal):
+            return None
+        if start_index == goal:
+            return [start]
+
+        open_list = [(self.heuristic(start_index, goal), 0, start_index, None)]
+        g_score = {start_index: 0}
+        came_from = {}
+        closed = set()
+        pops = pushes = 0
+        path = None
+        while open_list:
+            _, g, current, direction = heapq.heappop(open_list)
+            pops += 1
+            if current in closed:
+                continue
+            closed.add(current)
+            if current == goal:
+                path = self.expand(current, came_from)
+                break
+            for target, move in self.successors(current, direction, goal):
+                tentative = g + self.heuristic(current, target)
+                if tentative < g_score.get(target, tentative + 1):
+                    g_score[target] = tentative
+                    came_from[target] = current
+                    heapq.heappush(open_list, (tentative + self.heuristic(target, goal), tentative, target, move))
+                    pushes += 1
+        if stats is not None:
+            stats.add_search(len(closed), pushes + 1, pops, len(closed) - (path is not None))
+        return path
+
+    def expand(self, current, came_from):
+        # Fill in the straight runs between consecutive jump points
+        jump_points = [current]
+        while current in came_from:
+            current = came_from[current]
+            jump_points.append(current)
+        jump_points.reverse()
+
+        path = [jump_points[0] + 1]
+        for a, b in zip(jump_points, jump_points[1:]):
+            step = (1 if b > a else -1) if a // self.cols == b // self.cols else (self.cols if b > a else -self.cols)
+            index = a
+            while index != b:
+                index += step
+                path.append(index + 1)
+        return path
+
+
+def cross_check(pathfinder, pairs):
+    # Compare JPS with the existing searches on a PathFinder's grid.
+    # Returns a list of (start, end, problem) tuples; empty means every pair agreed.
+    jps = JumpPointSearch(pathfinder.grid)
+    problems = []
+    for start, end in pairs:
+        path = jps.find_path(start, end)
+        reference = pathfinder.bidirectional_a_star(start, end)
+        exact, _ = pathfinder.bfs_sweep(start, [end])
+        if (path is None) != (reference is None) or (path is None) != (end not in exact):
+            problems.append((start, end, "reachability differs"))
+            continue
+        if path is None:
+            continue
+        if path[0] != start or path[-1] != end:
+            problems.append((start, end, "wrong end points"))
+        for a, b in zip(path, path[1:]):
+            (ra, ca), (rb, cb) = pathfinder.number_to_coord(a), pathfinder.number_to_coord(b)
+            if abs(ra - rb) + abs(ca - cb) != 1 or pathfinder.grid.is_obstacle(rb, cb):
+                problems.append((start, end, f"invalid step {a} -> {b}"))
+                break
+        if len(path) - 1 != exact[end]:
+            problems.append((start, end, f"length {len(path) - 1}, shortest is {exact[end]}"))
+        elif len(path) > len(reference):
+            problems.append((start, end, "longer than bidirectional A*"))
+    return problems
+
+
+if __name__ == "__main__":
+    from grid import OccupancyGrid
+    from spa import PathFinder
+
+    rng = random.Random(0)
+    for trial in range(200):
+        rows, cols = rng.randint(1, 30), rng.randint(1, 30)
+        density = rng.choice((0.0, 0.1, 0.25, 0.4))
+        grid = OccupancyGrid(rows, cols, bytearray(rng.random() < density for _ in range(rows * cols)))
+        pathfinder = PathFinder(rows, cols, grid)
+        free = [i + 1 for i in range(rows * cols) if not grid.cells[i]]
+        if not free:
+            continue
+        pairs = [(rng.choice(free), rng.choice(free)) for _ in range(10)]
+        for problem in cross_check(pathfinder, pairs):
+            print(f"{rows}x{cols}: {problem}")
+    print("Cross-check finished")
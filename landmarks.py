@@ -0,0 +1,129 @@
+# landmarks.py
+import os
+import struct
+import zlib
+from array import array
+
+import database
+
+MAGIC = b'SBLM'
+VERSION = 1
+HEADER = struct.Struct('<4sHIIII')  # magic, version, rows, cols, layout checksum, landmark count
+UNREACHABLE = -1
+
+
+def layout_checksum(grid):
+    return zlib.crc32(grid.cells)
+
+
+def landmark_path():
+    # Stored next to the database, e.g. warehouse.db -> warehouse.landmarks
+    return os.path.splitext(database.DB_PATH)[0] + '.landmarks'
+
+
+def bfs_distances(grid, source):
+    # Exact step count from source (a cell index) to every cell, UNREACHABLE where walled off
+    cols = grid.cols
+    cells = grid.cells
+    size = len(cells)
+    distances = array('i', [UNREACHABLE]) * size
+    distances[source] = 0
+    frontier = [source]
+    distance = 0
+    while frontier:
+        distance += 1
+        next_frontier = []
+        for index in frontier:
+            col = index % cols
+            for neighbor in (index + 1 if col + 1 < cols else -1,
+                             index + cols,
+                             index - 1 if col > 0 else -1,
+                             index - cols):
+                if 0 <= neighbor < size and distances[neighbor] == UNREACHABLE and not cells[neighbor]:
+                    distances[neighbor] = distance
+                    next_frontier.append(neighbor)
+        frontier = next_frontier
+    return distances
+
+
+class LandmarkIndex:
+    # ALT heuristic: exact distances from a few landmark cells give, by the triangle
+    # inequality, |d(L, a) - d(L, b)| <= d(a, b) for every landmark L.
+    def __init__(self, rows, cols, checksum, landmarks, tables):
+        self.rows = rows
+        self.cols = cols
+        self.checksum = checksum
+        self.landmarks = landmarks
+        self.tables = tables
+
+    @classmethod
+    def build(cls, grid, count=8):
+        # Farthest-point selection: each new landmark is the free cell furthest from those chosen
+        free = [i for i, blocked in enumerate(grid.cells) if not blocked]
+        landmarks = []
+        tables = []
+        if free:
+            nearest = bfs_distances(grid, free[0])
+            for _ in range(count):
+                candidate = max(free, key=nearest.__getitem__)
+                if nearest[candidate] <= 0 and landmarks:
+                    break
+                distances = bfs_distances(grid, candidate)
+                landmarks.append(candidate)
+                tables.append(distances)
+                for i in free:
+                    if 0 <= distances[i] < nearest[i]:
+                        nearest[i] = distances[i]
+        return cls(grid.rows, grid.cols, layout_checksum(grid), landmarks, tables)
+
+    @classmethod
+    def for_grid(cls, grid, path=None, count=8):
+        # Reuse the persisted index if it was built for this exact obstacle layout
+        path = path or landmark_path()
+        index = cls.load(path)
+        if (index is not None and index.rows == grid.rows and index.cols == grid.cols
+                and index.checksum == layout_checksum(grid)):
+            return index
+        index = cls.build(grid, count)
+        index.save(path)
+        return index
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with open(path, 'rb') as file:
+                magic, version, rows, cols, checksum, count = HEADER.unpack(file.read(HEADER.size))
+                if magic != MAGIC or version != VERSION:
+                    return None
+                landmarks = array('i')
+                landmarks.fromfile(file, count)
+                tables = []
+                for _ in range(count):
+                    table = array('i')
+                    table.fromfile(file, rows * cols)
+                    tables.append(table)
+        except (OSError, EOFError, struct.error):
+            return None
+        return cls(rows, cols, checksum, list(landmarks), tables)
+
+    def save(self, path):
+        temporary = path + '.tmp'
+        with open(temporary, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, VERSION, self.rows, self.cols, self.checksum, len(self.landmarks)))
+            array('i', self.landmarks).tofile(file)
+            for table in self.tables:
+                table.tofile(file)
+        os.replace(temporary, path)
+
+    def lower_bound(self, a, b):
+        # a and b are cell indices (row * cols + col)
+        bound = 0
+        for table in self.tables:
+            da = table[a]
+            db = table[b]
+            if da == UNREACHABLE or db == UNREACHABLE:
+                continue
+            difference = da - db if da > db else db - da
+            if difference > bound:
+                bound = difference
+        return bound
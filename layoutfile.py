@@ -0,0 +1,321 @@
+# layoutfile.py
+import json
+import mmap
+import re
+import struct
+import sys
+import zlib
+from array import array
+from collections import namedtuple
+
+from database import (NO_QUANTITY, get_grid_snapshot, get_grid_dimensions, get_layout_version, get_cost_map,
+                      replace_layout)
+
+# Binary layout snapshot:
+#   header   magic, format version, flags, rows, cols, point count, layout version at save time
+#   points   int32 per user point
+#   bitmap   one bit per cell, most significant bit first, 1 = obstacle
+#   quantity int32 per cell, NO_QUANTITY for NULL
+#   costs    one byte per cell, only with FLAG_COSTS (format 2); without it every cell costs 1
+# All integers are little-endian. With FLAG_COMPRESSED everything after the header is one zlib
+# stream; otherwise the file can be memory-mapped and the sections read in place.
+# Floors without costs are still written as format 1 so older readers can load them.
+MAGIC = b'SBLY'
+FORMAT_VERSION = 2
+FLAG_COMPRESSED = 1
+FLAG_COSTS = 2
+HEADER = struct.Struct('<4sBBHIIIQ')
+COMPRESSION_LEVEL = 1  # zlib level; higher levels cost several times the time for ~25% smaller files
+
+Layout = namedtuple('Layout', 'rows cols points quantities obstacles version costs')
+
+_BITS_FROM_CELLS = bytes(b'0' + b'1' * 255)
+_CELLS_FROM_BITS = bytes.maketrans(b'01', b'\x00\x01')
+
+
+def pack_bits(cells):
+    # One byte per cell (non-zero = set) to a packed bitmap; int() parses base 2 in linear time
+    if not cells:
+        return b''
+    bits = bytes(cells).translate(_BITS_FROM_CELLS)
+    bits += b'0' * (-len(bits) % 8)
+    return int(bits, 2).to_bytes(len(bits) // 8, 'big')
+
+
+def unpack_bits(data, n):
+    if not n:
+        return bytearray()
+    bits = format(int.from_bytes(data, 'big'), f'0{len(data) * 8}b')
+    return bytearray(bits[:n].encode().translate(_CELLS_FROM_BITS))
+
+
+def _int32_bytes(values):
+    packed = array('i', values)
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _int32_array(data):
+    values = array('i')
+    values.frombytes(data)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+def write_layout(path, rows, cols, quantities, obstacles, points=(), version=0, compress=True, costs=None):
+    # costs: one byte per cell, or None when every cell costs 1
+    n = rows * cols
+    if len(quantities) != n or len(obstacles) != n or (costs is not None and len(costs) != n):
+        raise ValueError(f"Layout arrays do not match a {rows}x{cols} floor")
+    if costs is not None and costs.count(1) == n:
+        costs = None
+    body = [_int32_bytes(points), pack_bits(obstacles), _int32_bytes(quantities)]
+    flags = FLAG_COMPRESSED if compress else 0
+    if costs is not None:
+        body.append(bytes(costs))
+        flags |= FLAG_COSTS
+    header = HEADER.pack(MAGIC, FORMAT_VERSION if costs is not None else 1, flags, 0, rows, cols,
+                         len(points), version)
+    with open(path, 'wb') as file:
+        file.write(header)
+        if compress:
+            compressor = zlib.compressobj(COMPRESSION_LEVEL)
+            for section in body:
+                file.write(compressor.compress(section))
+            file.write(compressor.flush())
+        else:
+            for section in body:
+                file.write(section)
+
+
+def is_layout_file(path):
+    with open(path, 'rb') as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+def read_layout(path):
+    with open(path, 'rb') as file:
+        header = file.read(HEADER.size)
+        if len(header) < HEADER.size:
+            raise ValueError(f"{path} is not a layout snapshot")
+        magic, format_version, flags, _, rows, cols, point_count, version = HEADER.unpack(header)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a layout snapshot")
+        if format_version > FORMAT_VERSION:
+            raise ValueError(f"{path} uses layout format {format_version}, newer than this version supports")
+
+        n = rows * cols
+        sizes = (4 * point_count, (n + 7) // 8, 4 * n, n if flags & FLAG_COSTS else 0)
+        mapped = None
+        if flags & FLAG_COMPRESSED:
+            try:
+                body = memoryview(zlib.decompress(file.read()))
+            except zlib.error as e:
+                raise ValueError(f"{path} is corrupt: {e}") from e
+        elif sum(sizes):
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            body = memoryview(mapped)[HEADER.size:]
+        else:
+            body = memoryview(b'')
+
+        try:
+            if len(body) < sum(sizes):
+                raise ValueError(f"{path} is truncated")
+            points_end = sizes[0]
+            bitmap_end = points_end + sizes[1]
+            quantities_end = bitmap_end + sizes[2]
+            points = _int32_array(body[:points_end]).tolist()
+            obstacles = unpack_bits(body[points_end:bitmap_end], n)
+            quantities = array('l', _int32_array(body[bitmap_end:quantities_end]))
+            costs = bytearray(body[quantities_end:quantities_end + sizes[3]]) if sizes[3] else None
+        finally:
+            body.release()
+            if mapped is not None:
+                mapped.close()
+    return Layout(rows, cols, points, quantities, obstacles, version, costs)
+
+
+class _JsonStream:
+    # Pulls JSON values one at a time from a text file, reading it in chunks
+    WHITESPACE = re.compile(r'\s*')
+    SEPARATOR = re.compile(r'\s*([,\]])\s*')
+
+    def __init__(self, file, chunk_size=1 << 16):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        chunk = self.file.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        while True:
+            self.pos = self.WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                raise ValueError("Unexpected end of JSON configuration")
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} in JSON configuration at offset {self.pos}")
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.fill():
+                    continue
+                raise
+            # A number ending exactly at the buffer edge may continue in the next chunk
+            if end == len(self.buffer) and not self.eof and self.fill():
+                continue
+            self.pos = end
+            return value
+
+    def array(self):
+        # Yields the values of the array at the current position one by one. Values are decoded
+        # straight off the buffer; only one cut off at the end of a chunk goes back to fill().
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        decode = self.decoder.raw_decode
+        separator = self.SEPARATOR
+        buffer = self.buffer
+        pos = self.pos
+        while True:
+            try:
+                value, end = decode(buffer, pos)
+                match = separator.match(buffer, end)
+            except json.JSONDecodeError:
+                match = None
+            # A value or separator at the very end of the buffer may continue in the next chunk
+            if (match is None or match.end() == len(buffer)) and not self.eof:
+                self.pos = pos
+                self.fill()
+                buffer = self.buffer
+                pos = self.pos
+                continue
+            if match is None:
+                raise ValueError(f"Malformed array in JSON configuration at offset {pos}")
+            pos = self.pos = match.end()
+            yield value
+            if match.group(1) == ']':
+                return
+
+
+def iter_json_config(file):
+    # Yields (key, value) for the top-level members of a saved JSON configuration, except that
+    # the "items" list is yielded as ('item', entry) per entry so it is never held in memory
+    stream = _JsonStream(file)
+    stream.expect('{')
+    if stream.peek() == '}':
+        return
+    while True:
+        key = stream.value()
+        stream.expect(':')
+        if key == 'items':
+            for item in stream.array():
+                yield 'item', item
+        else:
+            yield key, stream.value()
+        if stream.peek() != ',':
+            break
+        stream.pos += 1
+    stream.expect('}')
+
+
+def read_json_layout(path):
+    # Older configurations carry no obstacle flags; those cells load as free
+    rows = cols = None
+    points = []
+    quantities = obstacles = costs = None
+    pending = []  # items seen before the dimensions
+    with open(path, 'r') as file:
+        for key, value in iter_json_config(file):
+            if key == 'item':
+                if quantities is None:
+                    pending.append(value)
+                else:
+                    _apply_json_item(value, cols, quantities, obstacles, costs)
+                continue
+            if key == 'rows':
+                rows = value
+            elif key == 'cols':
+                cols = value
+            elif key == 'points':
+                points = value
+            if quantities is None and rows is not None and cols is not None:
+                quantities = array('l', [NO_QUANTITY]) * (rows * cols)
+                obstacles = bytearray(rows * cols)
+                costs = bytearray(b'\x01') * (rows * cols)
+                for item in pending:
+                    _apply_json_item(item, cols, quantities, obstacles, costs)
+                pending = None
+    if quantities is None:
+        raise ValueError(f"{path} has no rows/cols")
+    return Layout(rows, cols, points, quantities, obstacles, 0, costs if costs.count(1) != len(costs) else None)
+
+
+def _apply_json_item(item, cols, quantities, obstacles, costs):
+    index = item['item_id'] - 1 if 'item_id' in item else item['row'] * cols + item['col']
+    if not 0 <= index < len(quantities):
+        raise ValueError(f"Item {item} lies outside the floor")
+    quantity = item.get('quantity')
+    quantities[index] = NO_QUANTITY if quantity is None else quantity
+    obstacles[index] = 1 if item.get('obstacle') else 0
+    costs[index] = item.get('cost', 1)
+
+
+def write_json_layout(path, rows, cols, quantities, obstacles, points=(), costs=None):
+    # Same shape as the configurations saved before the binary format, plus an obstacle flag per item
+    # and a cost for cells that cost more than 1. Written a floor row at a time rather than built as
+    # one document.
+    with open(path, 'w') as file:
+        file.write(f'{{"rows": {rows}, "cols": {cols}, "points": {json.dumps(list(points))}, "items": [')
+        for row in range(rows):
+            entries = []
+            for col in range(cols):
+                index = row * cols + col
+                quantity = quantities[index]
+                entry = (f'{{"row": {row}, "col": {col}, "item_id": {index + 1}, '
+                         f'"quantity": {"null" if quantity == NO_QUANTITY else quantity}, '
+                         f'"obstacle": {"true" if obstacles[index] else "false"}')
+                if costs is not None and costs[index] != 1:
+                    entry += f', "cost": {costs[index]}'
+                entries.append(entry + '}')
+            file.write((', ' if row else '') + ', '.join(entries))
+        file.write(']}')
+
+
+def save_layout(path, points=(), compress=True):
+    # Snapshot the provisioned floor; a .json path writes the JSON configuration format instead
+    rows, cols = get_grid_dimensions()
+    quantities, obstacles = get_grid_snapshot(rows, cols)
+    costs = get_cost_map(rows, cols)
+    if path.lower().endswith('.json'):
+        write_json_layout(path, rows, cols, quantities, obstacles, points, costs)
+    else:
+        write_layout(path, rows, cols, quantities, obstacles, points, get_layout_version(), compress, costs)
+
+
+def load_layout(path):
+    # Replace the floor from a binary snapshot or a JSON configuration; returns the Layout read
+    layout = read_layout(path) if is_layout_file(path) else read_json_layout(path)
+    replace_layout(layout.rows, layout.cols, layout.quantities, layout.obstacles, layout.costs)
+    return layout
@@ -0,0 +1,254 @@
+# multiagent.py
+import heapq
+import itertools
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ReservationTable:
+    # Space-time occupancy shared by planned robots: (cell, timestep) vertices, directed
+    # moves between timesteps (to forbid head-on swaps) and cells where a robot has parked.
+    def __init__(self):
+        self.vertices = set()
+        self.edges = set()
+        self.parked = {}    # cell -> first timestep it is permanently occupied
+        self.last_use = {}  # cell -> last timestep it is reserved
+        # Last timestep any vertex or move is reserved; after it only parked cells stay blocked
+        self.horizon = -1
+
+    def reserve_vertex(self, cell, t):
+        self.vertices.add((cell, t))
+        if t > self.last_use.get(cell, -1):
+            self.last_use[cell] = t
+        if t > self.horizon:
+            self.horizon = t
+
+    def reserve_edge(self, a, b, t):
+        # A robot moves a -> b between t and t + 1
+        self.edges.add((a, b, t))
+        if t + 1 > self.horizon:
+            self.horizon = t + 1
+
+    def reserve_path(self, path, park=True):
+        # path is time-indexed: path[t] is the cell occupied at timestep t
+        for t, cell in enumerate(path):
+            self.reserve_vertex(cell, t)
+            if t + 1 < len(path):
+                self.reserve_edge(cell, path[t + 1], t)
+        if park and path:
+            self.parked[path[-1]] = min(self.parked.get(path[-1], len(path) - 1), len(path) - 1)
+
+    def blocked(self, cell, t):
+        return (cell, t) in self.vertices or self.parked.get(cell, t + 1) <= t
+
+    def swap_blocked(self, a, b, t):
+        # Moving a -> b between t and t + 1 while another robot moves b -> a
+        return (b, a, t) in self.edges
+
+    def free_after(self, cell, t):
+        # Whether a robot may stop on cell from timestep t onwards
+        return self.last_use.get(cell, -1) < t and cell not in self.parked
+
+
+class MultiRobotPlanner:
+    # Plans several robots' orders together so their time-indexed paths never collide.
+    # Each robot's visiting order comes from PathFinder.find_shortest_path; the cells and
+    # timing of every leg come from a space-time A* against a shared reservation table
+    # (prioritised planning). Teams no larger than cbs_limit are first solved with
+    # conflict-based search, which can find plans prioritised planning misses.
+    def __init__(self, pathfinder, park_at_goal=True, cbs_limit=4, cbs_max_nodes=200, max_wait=None):
+        self.pathfinder = pathfinder
+        self.grid = pathfinder.grid
+        self.cols = pathfinder.cols
+        self.park_at_goal = park_at_goal
+        self.cbs_limit = cbs_limit
+        self.cbs_max_nodes = cbs_max_nodes
+        # Upper bound on timesteps a single leg may take beyond its length
+        self.max_wait = max_wait if max_wait is not None else pathfinder.rows + pathfinder.cols
+
+    def neighbors(self, index):
+        cols = self.cols
+        cells = self.grid.cells
+        col = index % cols
+        candidates = [index]
+        if col + 1 < cols:
+            candidates.append(index + 1)
+        if index + cols < len(cells):
+            candidates.append(index + cols)
+        if col > 0:
+            candidates.append(index - 1)
+        if index - cols >= 0:
+            candidates.append(index - cols)
+        return [n for n in candidates if not cells[n]]
+
+    def heuristic(self, a, b):
+        cols = self.cols
+        return abs(a // cols - b // cols) + abs(a % cols - b % cols)
+
+    def space_time_search(self, start, goal, start_time, table, final):
+        # Space-time A* from (start, start_time) to goal; waiting in place is a move.
+        # On the final leg the robot must be able to stay on the goal for good, so it cannot
+        # arrive to stay before the goal's last reservation has passed; that wait is part of
+        # the heuristic, otherwise the search fills the whole space-time box before it.
+        if final and goal in table.parked:
+            return None
+        release = table.last_use.get(goal, -1) + 1 if final else 0
+
+        def heuristic(cell, t):
+            distance = self.heuristic(cell, goal)
+            return distance if distance > release - t else release - t
+
+        limit = start_time + self.heuristic(start, goal) + self.max_wait
+        if release > limit:
+            limit = release
+        counter = itertools.count()
+        open_list = [(heuristic(start, start_time), 0, next(counter), start_time, start)]
+        came_from = {(start, start_time): None}
+        # After the table's horizon nothing moves, so reaching a cell no earlier than a time
+        # it was already reached at past the horizon cannot help
+        horizon = table.horizon
+        reached = {}
+        while open_list:
+            _, _, _, t, cell = heapq.heappop(open_list)
+            if cell == goal and (not final or table.free_after(cell, t)):
+                path = []
+                state = (cell, t)
+                while state is not None:
+                    path.append(state[0])
+                    state = came_from[state]
+                return path[::-1]
+            if t >= limit:
+                continue
+            for neighbor in self.neighbors(cell):
+                state = (neighbor, t + 1)
+                if state in came_from or table.blocked(neighbor, t + 1) or table.swap_blocked(cell, neighbor, t):
+                    continue
+                if t + 1 > horizon:
+                    if reached.get(neighbor, t + 2) <= t + 1:
+                        continue
+                    reached[neighbor] = t + 1
+                came_from[state] = (cell, t)
+                g = t + 1 - start_time
+                heapq.heappush(open_list, (g + heuristic(neighbor, t + 1), -g, next(counter), t + 1, neighbor))
+        return None
+
+    def plan_robot(self, route, table):
+        # Time-indexed path through every waypoint of route (cell indices), or None
+        path = [route[0]]
+        for i, (a, b) in enumerate(zip(route, route[1:])):
+            leg = self.space_time_search(a, b, len(path) - 1, table, final=i == len(route) - 2)
+            if leg is None:
+                return None
+            path.extend(leg[1:])
+        return path
+
+    def plan(self, orders):
+        # orders: list of (start, end, points) in ItemIDs, one per robot.
+        # Returns a list of time-indexed ItemID paths (path[t] is the robot's cell at step t).
+        starts = [start for start, _, _ in orders]
+        if len(set(starts)) != len(starts):
+            raise ValueError("Robots must start on different cells")
+        ends = [end for _, end, _ in orders]
+        if self.park_at_goal and len(set(ends)) != len(ends):
+            raise ValueError("Robots that park at their goal need different end points")
+
+        routes = []
+        for start, end, points in orders:
+            self.pathfinder.find_shortest_path(start, end, list(points))
+            routes.append([point - 1 for point in self.pathfinder.route])
+
+        paths = None
+        if len(routes) <= self.cbs_limit:
+            paths = self.conflict_based_search(routes)
+        if paths is None:
+            paths = self.prioritised(routes)
+        if paths is None:
+            raise ValueError("Could not find collision-free routes for every robot")
+        return [[index + 1 for index in path] for path in paths]
+
+    def prioritised(self, routes):
+        # Longer routes first: they have the least slack to wait for others
+        table = ReservationTable()
+        for route in routes:
+            table.reserve_vertex(route[0], 0)
+        paths = [None] * len(routes)
+        for robot in sorted(range(len(routes)), key=lambda r: -len(routes[r])):
+            # Release this robot's own start reservation before planning it
+            table.vertices.discard((routes[robot][0], 0))
+            path = self.plan_robot(routes[robot], table)
+            if path is None:
+                logger.info(f"Prioritised planning failed for robot {robot}")
+                return None
+            table.reserve_path(path, self.park_at_goal)
+            paths[robot] = path
+        return paths
+
+    def position(self, path, t):
+        if t < len(path):
+            return path[t]
+        return path[-1] if self.park_at_goal else None
+
+    def first_conflict(self, paths):
+        horizon = max(len(path) for path in paths)
+        for t in range(horizon):
+            seen = {}
+            for robot, path in enumerate(paths):
+                cell = self.position(path, t)
+                if cell is None:
+                    continue
+                if cell in seen:
+                    return ('vertex', seen[cell], robot, cell, t)
+                seen[cell] = robot
+            for a, b in itertools.combinations(range(len(paths)), 2):
+                a_now, b_now = self.position(paths[a], t), self.position(paths[b], t)
+                a_next, b_next = self.position(paths[a], t + 1), self.position(paths[b], t + 1)
+                if None not in (a_now, b_now, a_next, b_next) and a_now == b_next and b_now == a_next \
+                        and a_now != a_next:
+                    return ('edge', a, b, (a_now, a_next), t)
+        return None
+
+    def constrained_path(self, route, constraints):
+        table = ReservationTable()
+        for kind, value, t in constraints:
+            if kind == 'vertex':
+                table.reserve_vertex(value, t)
+            else:
+                # Forbid moving value[0] -> value[1] at t by recording the opposite move
+                table.reserve_edge(value[1], value[0], t)
+        return self.plan_robot(route, table)
+
+    def conflict_based_search(self, routes):
+        # CBS: plan robots independently, then split on the earliest collision by forbidding
+        # the clashing cell (or move) to one robot or the other.
+        constraints = [[] for _ in routes]
+        paths = [self.constrained_path(route, []) for route in routes]
+        if None in paths:
+            return None
+        counter = itertools.count()
+        open_list = [(sum(map(len, paths)), next(counter), constraints, paths)]
+        expanded = 0
+        while open_list and expanded < self.cbs_max_nodes:
+            _, _, constraints, paths = heapq.heappop(open_list)
+            expanded += 1
+            conflict = self.first_conflict(paths)
+            if conflict is None:
+                return paths
+            kind, a, b, value, t = conflict
+            for robot in (a, b):
+                if kind == 'vertex':
+                    constraint = ('vertex', value, t)
+                else:
+                    move = value if robot == a else (value[1], value[0])
+                    constraint = ('edge', move, t)
+                robot_constraints = constraints[robot] + [constraint]
+                path = self.constrained_path(routes[robot], robot_constraints)
+                if path is None:
+                    continue
+                child_constraints = constraints[:]
+                child_constraints[robot] = robot_constraints
+                child_paths = paths[:]
+                child_paths[robot] = path
+                heapq.heappush(open_list, (sum(map(len, child_paths)), next(counter), child_constraints, child_paths))
+        logger.info(f"Conflict-based search gave up after {expanded} nodes")
+        return None
@@ -0,0 +1,173 @@
+# pathcache.py
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+import database
+
+
+class LegCache:
+    # Leg paths shared by every PathFinder, keyed by (rows, cols, layout version, start, end).
+    # Bounded by entry count and by the total number of cells held, evicting least recently
+    # used legs first. When an obstacle changes only the legs it can affect are dropped;
+    # the rest are carried over to the new layout version. Each entry is (path, cost), where
+    # cost is the leg's travel cost on a floor with cell costs and None on a uniform floor.
+    def __init__(self, max_entries=4096, max_cells=1000000, persist=False):
+        self.max_entries = max_entries
+        self.max_cells = max_cells
+        # Also keep legs in the leg_cache table (created by the schema migrations) so they survive restarts
+        self.persist = persist
+        self.entries = OrderedDict()
+        self.cells_held = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.lock = threading.Lock()
+        # Per-thread count of leg_cache queries and the time spent in them, for SearchStats
+        self.db_local = threading.local()
+
+    def get(self, rows, cols, version, start, end):
+        key = (rows, cols, version, start, end)
+        reverse = (rows, cols, version, end, start)
+        with self.lock:
+            for candidate, backwards in ((key, False), (reverse, True)):
+                entry = self.entries.get(candidate)
+                if entry is not None:
+                    self.entries.move_to_end(candidate)
+                    self.hits += 1
+                    return list(entry[0][::-1] if backwards else entry[0])
+        loaded = self.load(rows, cols, version, start, end) if self.persist else None
+        with self.lock:
+            if loaded is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            # Kept the way round it was stored, so the cost still matches the key's direction
+            stored_start, stored_end, path, cost = loaded
+            self.insert((rows, cols, version, stored_start, stored_end), path, cost)
+        return list(path if stored_start == start else path[::-1])
+
+    def put(self, rows, cols, version, start, end, path, cost=None):
+        # cost: the leg's travel cost when the floor has cell costs
+        with self.lock:
+            self.insert((rows, cols, version, start, end), tuple(path), cost)
+        if self.persist:
+            self.store(rows, cols, version, start, end, path, cost)
+
+    def insert(self, key, path, cost=None):
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.cells_held -= len(old[0])
+        self.entries[key] = (path, cost)
+        self.cells_held += len(path)
+        while self.entries and (len(self.entries) > self.max_entries or self.cells_held > self.max_cells):
+            _, (evicted, _) = self.entries.popitem(last=False)
+            self.cells_held -= len(evicted)
+            self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.cells_held = 0
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'cells_held': self.cells_held,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+    @staticmethod
+    def still_valid(path, cols, start, end, changes, cost=None):
+        # A new obstacle breaks only the legs that cross it. A cleared cell can only shorten
+        # a leg if a detour through it could beat the leg's current cost. Every step costs at
+        # least 1, so the detour's step count bounds its cost from below on any floor.
+        start_row, start_col = divmod(start - 1, cols)
+        end_row, end_col = divmod(end - 1, cols)
+        length = len(path) - 1 if cost is None else cost
+        for row, col, blocked in changes:
+            if blocked:
+                if row * cols + col + 1 in path:
+                    return False
+            elif (abs(start_row - row) + abs(start_col - col) +
+                  abs(row - end_row) + abs(col - end_col)) < length:
+                return False
+        return True
+
+    def on_layout_changed(self, changes, old_version, new_version):
+        with self.lock:
+            for key in list(self.entries):
+                rows, cols, version, start, end = key
+                if version != old_version:
+                    continue
+                path, cost = entry = self.entries.pop(key)
+                if changes is not None and self.still_valid(path, cols, start, end, changes, cost):
+                    self.entries[(rows, cols, new_version, start, end)] = entry
+                else:
+                    self.cells_held -= len(path)
+                    self.invalidations += 1
+        if self.persist:
+            self.migrate_table(changes, old_version, new_version)
+
+    # SQLite persistence
+
+    def db_usage(self):
+        # (queries, seconds) spent in leg_cache queries on this thread so far
+        return getattr(self.db_local, 'queries', 0), getattr(self.db_local, 'seconds', 0.0)
+
+    def count_query(self, began):
+        queries, seconds = self.db_usage()
+        self.db_local.queries = queries + 1
+        self.db_local.seconds = seconds + time.perf_counter() - began
+
+    def load(self, rows, cols, version, start, end):
+        began = time.perf_counter()
+        conn = database.get_connection()
+        # Returns (start, end, path, cost) as stored, which may be the reverse of the request
+        row = conn.execute('SELECT Start, End, Path, Cost FROM leg_cache WHERE Rows = ? AND Cols = ? '
+                           'AND Version = ? AND ((Start = ? AND End = ?) OR (Start = ? AND End = ?))',
+                           (rows, cols, version, start, end, end, start)).fetchone()
+        self.count_query(began)
+        if row is None:
+            return None
+        path = array('i')
+        path.frombytes(row[2])
+        return row[0], row[1], tuple(path), row[3]
+
+    def store(self, rows, cols, version, start, end, path, cost=None):
+        began = time.perf_counter()
+        conn = database.get_connection()
+        with conn:
+            conn.execute('INSERT OR REPLACE INTO leg_cache (Rows, Cols, Version, Start, End, Path, Cost) '
+                         'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                         (rows, cols, version, start, end, array('i', path).tobytes(), cost))
+        self.count_query(began)
+
+    def migrate_table(self, changes, old_version, new_version):
+        conn = database.get_connection()
+        with conn:
+            if changes is None:
+                conn.execute('DELETE FROM leg_cache WHERE Version = ?', (old_version,))
+                return
+            stale = []
+            for rows, cols, start, end, blob, cost in conn.execute(
+                    'SELECT Rows, Cols, Start, End, Path, Cost FROM leg_cache WHERE Version = ?', (old_version,)):
+                path = array('i')
+                path.frombytes(blob)
+                if not self.still_valid(path, cols, start, end, changes, cost):
+                    stale.append((rows, cols, old_version, start, end))
+            conn.executemany('DELETE FROM leg_cache WHERE Rows = ? AND Cols = ? AND Version = ? '
+                             'AND Start = ? AND End = ?', stale)
+            conn.execute('UPDATE leg_cache SET Version = ? WHERE Version = ?', (new_version, old_version))
+
+
+leg_cache = LegCache()
+database.add_layout_listener(leg_cache.on_layout_changed)
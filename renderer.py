@@ -0,0 +1,117 @@
+# renderer.py
+import tkinter as tk
+
+from database import NO_QUANTITY
+
+# Overlay layers, bottom to top; each is a canvas tag that can be cleared on its own
+LAYERS = ("path", "highlight", "arrow")
+
+
+class GridRenderer:
+    # Retained-mode grid drawing: every cell's rectangle and label are created once and kept
+    # in a cell -> item id map, so later changes are itemconfig calls on just those cells.
+    # Paths, highlights and arrows live on tagged overlay layers above the cells.
+    def __init__(self, canvas, rows, cols, size=800):
+        self.canvas = canvas
+        self.rows = rows
+        self.cols = cols
+        self.cell_size = min(size // cols, size // rows)
+        self.font_size = max(8, self.cell_size // 3)
+        self.rect_items = []
+        self.text_items = []
+        self.quantities = None
+        self.obstacles = None
+        self.fills = []
+
+    def cell_box(self, index):
+        row, col = divmod(index, self.cols)
+        x1 = col * self.cell_size
+        y1 = row * self.cell_size
+        return x1, y1, x1 + self.cell_size, y1 + self.cell_size
+
+    def cell_at(self, x, y):
+        # Cell index (ItemID - 1) under a canvas point, None outside the floor
+        col = int(x // self.cell_size)
+        row = int(y // self.cell_size)
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            return row * self.cols + col
+        return None
+
+    def close(self):
+        self.canvas.delete("all")
+
+    def cell_centre(self, index):
+        x1, y1, x2, y2 = self.cell_box(index)
+        return (x1 + x2) / 2, (y1 + y2) / 2
+
+    @staticmethod
+    def fill_for(quantity, obstacle):
+        if obstacle:
+            return "gray"
+        if quantity == 0:
+            return "red"
+        return "white"
+
+    def build(self, snapshot):
+        # Create the cell items from a database.get_grid_snapshot() result
+        self.canvas.delete("all")
+        quantities, obstacles = snapshot
+        self.quantities = quantities[:]
+        self.obstacles = bytearray(obstacles)
+        self.rect_items = []
+        self.text_items = []
+        self.fills = []
+        for index in range(self.rows * self.cols):
+            x1, y1, x2, y2 = self.cell_box(index)
+            fill = self.fill_for(self.quantities[index], self.obstacles[index])
+            self.rect_items.append(self.canvas.create_rectangle(x1, y1, x2, y2, outline="black", fill=fill,
+                                                                tags=("cell", f"cell_{index + 1}")))
+            self.text_items.append(self.canvas.create_text((x1 + x2) / 2, (y1 + y2) / 2,
+                                                           text=str(index + 1),
+                                                           font=("Arial", self.font_size),
+                                                           fill="black",
+                                                           state="hidden" if self.obstacles[index] else "normal",
+                                                           tags=("cell", f"text_{index + 1}")))
+            self.fills.append(fill)
+
+    def refresh_cell(self, index):
+        fill = self.fill_for(self.quantities[index], self.obstacles[index])
+        if fill != self.fills[index]:
+            self.canvas.itemconfig(self.rect_items[index], fill=fill)
+            self.canvas.itemconfig(self.text_items[index], state="hidden" if self.obstacles[index] else "normal")
+            self.fills[index] = fill
+
+    def sync(self, snapshot):
+        # Bring the cells in line with a fresh snapshot, touching only cells that changed
+        quantities, obstacles = snapshot
+        for index in range(self.rows * self.cols):
+            if quantities[index] != self.quantities[index] or obstacles[index] != self.obstacles[index]:
+                self.quantities[index] = quantities[index]
+                self.obstacles[index] = obstacles[index]
+                self.refresh_cell(index)
+
+    def set_obstacle(self, point, is_obstacle):
+        self.obstacles[point - 1] = 1 if is_obstacle else 0
+        self.refresh_cell(point - 1)
+
+    def set_quantity(self, point, quantity):
+        self.quantities[point - 1] = NO_QUANTITY if quantity is None else quantity
+        self.refresh_cell(point - 1)
+
+    def clear_layer(self, layer):
+        self.canvas.delete(layer)
+
+    def clear_overlays(self):
+        for layer in LAYERS:
+            self.canvas.delete(layer)
+
+    def mark_cell(self, point, color, layer="highlight", text_color="green"):
+        x1, y1, x2, y2 = self.cell_box(point - 1)
+        self.canvas.create_rectangle(x1, y1, x2, y2, outline="black", fill=color, tags=layer)
+        self.canvas.create_text((x1 + x2) / 2, (y1 + y2) / 2, text=str(point), fill=text_color,
+                                font=("Arial", self.font_size), tags=layer)
+
+    def arrow(self, start_point, end_point):
+        start_x, start_y = self.cell_centre(start_point - 1)
+        end_x, end_y = self.cell_centre(end_point - 1)
+        self.canvas.create_line(start_x, start_y, end_x, end_y, arrow=tk.LAST, fill="black", tags="arrow")
@@ -0,0 +1,106 @@
+# searchstats.py
+import cProfile
+import io
+import json
+import pstats
+import time
+from contextlib import contextmanager
+
+# Functions listed in the text profile kept on a SearchStats
+PROFILE_LINES = 25
+
+
+class SearchStats:
+    # Counters and timings for one PathFinder.find_path or find_shortest_path call.
+    # Search loops count in locals and add their totals here once they finish, so
+    # collecting costs a handful of additions per search rather than per node.
+    COUNTERS = ('nodes_expanded', 'heap_pushes', 'heap_pops', 'neighbor_lookups', 'searches',
+                'cache_hits', 'cache_misses', 'db_queries')
+
+    def __init__(self, call, **details):
+        self.call = call
+        self.details = details
+        for name in self.COUNTERS:
+            setattr(self, name, 0)
+        self.db_seconds = 0.0
+        # Best route length after each GA generation, as (generation, length) pairs
+        self.fitness_curve = []
+        self.phases = {}
+        self.started = time.time()
+        self.seconds = 0.0
+        self.profile = None
+
+    def add_search(self, expanded, pushes=0, pops=0, lookups=0):
+        self.searches += 1
+        self.nodes_expanded += expanded
+        self.heap_pushes += pushes
+        self.heap_pops += pops
+        self.neighbor_lookups += lookups
+
+    @contextmanager
+    def phase(self, name):
+        began = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - began
+
+    @property
+    def ga_generations(self):
+        return self.fitness_curve[-1][0] + 1 if self.fitness_curve else 0
+
+    @property
+    def cache_hit_rate(self):
+        lookups = self.cache_hits + self.cache_misses
+        return self.cache_hits / lookups if lookups else 0.0
+
+    def attach_profile(self, profiler, target):
+        # target True keeps the top functions by cumulative time as text; a path dumps the
+        # full profile there for pstats/snakeviz and records the path
+        if isinstance(target, str):
+            profiler.dump_stats(target)
+            self.profile = target
+            return
+        text = io.StringIO()
+        pstats.Stats(profiler, stream=text).sort_stats('cumulative').print_stats(PROFILE_LINES)
+        self.profile = text.getvalue()
+
+    def to_dict(self):
+        record = {'call': self.call}
+        record.update(self.details)
+        record['started'] = round(self.started, 6)
+        record['seconds'] = round(self.seconds, 6)
+        record['phases'] = {name: round(seconds, 6) for name, seconds in self.phases.items()}
+        for name in self.COUNTERS:
+            record[name] = getattr(self, name)
+        record['cache_hit_rate'] = round(self.cache_hit_rate, 6)
+        record['db_seconds'] = round(self.db_seconds, 6)
+        record['ga_generations'] = self.ga_generations
+        record['fitness_curve'] = self.fitness_curve
+        if self.profile is not None:
+            record['profile'] = self.profile
+        return record
+
+    def write_jsonl(self, target):
+        # Append one JSON line to a path or an open text file
+        line = json.dumps(self.to_dict()) + '\n'
+        if isinstance(target, str):
+            with open(target, 'a') as file:
+                file.write(line)
+        else:
+            target.write(line)
+
+
+@contextmanager
+def profiled(stats, target):
+    # Run the body under cProfile when target is set (see SearchStats.attach_profile)
+    if not target:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        stats.attach_profile(profiler, target)
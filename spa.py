@@ -1,20 +1,73 @@
 # spa.py
 import heapq
 import random
-from database import is_obstacle
+import time
+from contextlib import contextmanager
+from grid import OccupancyGrid
+from dial import DialSearch
+from dstar import DStarLite
+from hpa import HierarchicalPlanner
+from jps import JumpPointSearch
+from landmarks import LandmarkIndex, layout_checksum
+from pathcache import leg_cache
+from searchstats import SearchStats, profiled
+from tsp import held_karp, improve_route, route_length, vectorized_genetic_route, island_genetic_route, np
 import logging, sys
-from functools import lru_cache
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 class PathFinder:
-    def __init__(self, rows=6, cols=6):
+    ENGINES = ('astar', 'jps', 'hpa', 'dial')
+
+    def __init__(self, rows=6, cols=6, grid=None, engine='astar', landmarks=None, incremental=False, seed=None):
+        if engine not in self.ENGINES:
+            raise ValueError(f"Unknown search engine {engine!r}, expected one of {self.ENGINES}")
         self.rows = rows
         self.cols = cols
+        # Obstacle map is read once up front so searches never touch the database
+        self.grid = grid if grid is not None else OccupancyGrid.from_database(rows, cols)
+        # Leg planner used by find_path: bidirectional A*, Jump Point Search, hierarchical A*
+        # or Dial's bucket queue. Only Dial follows cell costs, so it plans every leg on a
+        # floor with costs whichever engine is chosen.
+        self.engine = engine
+        self.jump_point_search = None
+        self.hierarchy = None
+        self.dial = None
+        self.cluster_size = 16
+        # Optional landmarks.LandmarkIndex; tightens the A* heuristic around long shelving walls.
+        # Only find_path's A* uses it: orders without picks and legs replan() searches again.
+        # Multi-pick leg matrices come from BFS/Dial sweeps, which need no heuristic.
+        self.landmarks = landmarks
+        # Incremental mode repairs legs that replan() finds broken with a D* Lite planner, kept
+        # per leg so later edits only redo the part of its search they reach
+        self.incremental = incremental
+        self.leg_planners = {}
+        # Points of the last route in visiting order, and the cell path of each of its legs
+        self.route = None
+        self.route_legs = None
         self.initial_mutation_rate = 0.1
         self.mutation_decay = 0.995
-        self.path_cache = {}
+        # Orders with at most this many picks are solved exactly instead of by the GA
+        self.exact_threshold = 12
+        # Local search on GA routes: None, 'final' (best route only) or 'memetic' (elites every generation)
+        self.local_search = 'memetic'
+        self.elite_size = 2
+        self.generations = 500
+        self.patience = 20
+        # Run the GA on NumPy arrays when NumPy is installed
+        self.vectorized = np is not None
+        # Island-model GA across this many processes (needs NumPy); 1 keeps the GA in-process
+        self.workers = 1
+        self.migration_interval = 10
+        self.migrants = 2
+        # Drives every random choice in the GA, so a fixed seed gives repeatable routes
+        self.rng = random.Random(seed)
+        # SearchStats for the last find_path/find_shortest_path call, and the one being collected
+        self.stats = None
+        self.active_stats = None
+        # Path or open text file that receives every call's stats as a JSON line
+        self.stats_log = None
 
     def number_to_coord(self, num):
         num -= 1
@@ -25,30 +78,33 @@ class PathFinder:
         
     def validate_points(self, points_to_check):
         invalid_points = []
+        outside_points = []
         for point in points_to_check:
             row, col = self.number_to_coord(point)
-            if is_obstacle(row, col):
+            if not 1 <= point <= self.rows * self.cols:
+                outside_points.append(point)
+            elif self.grid.is_obstacle(row, col):
                 invalid_points.append(point)
+        if outside_points:
+            raise ValueError(
+                f"Cannot calculate path: Points {outside_points} are outside the "
+                f"{self.rows}x{self.cols} grid (valid points are 1 to {self.rows * self.cols})."
+            )
         if invalid_points:
             raise ValueError(
                 f"Cannot calculate path: Points {invalid_points} are obstacles. "
                 "Please select different points."
             )
 
-    @lru_cache(maxsize=1024)
     def get_neighbors(self, row, col):
-        neighbors = set()
-        for dr, dc in [(0,1), (1,0), (0,-1), (-1,0)]:
-            new_row = row + dr
-            new_col = col + dc
-            if (0 <= new_row < self.rows and 
-                0 <= new_col < self.cols and 
-                not is_obstacle(new_row, new_col)):
-                neighbors.add((new_row, new_col))
-        return neighbors
+        return self.grid.neighbors(row, col)
 
     def heuristic(self, a, b):
-        return abs(a[0] - b[0]) + abs(a[1] - b[1])
+        manhattan = abs(a[0] - b[0]) + abs(a[1] - b[1])
+        if self.landmarks is None:
+            return manhattan
+        bound = self.landmarks.lower_bound(a[0] * self.cols + a[1], b[0] * self.cols + b[1])
+        return bound if bound > manhattan else manhattan
 
     def reconstruct_path(self, current, came_from, start):
         path = []
@@ -58,16 +114,128 @@ class PathFinder:
         path.append(start)
         return path[::-1]
 
-    def find_path(self, start, end):
-        cache_key = (start, end)
-        if cache_key in self.path_cache:
-            return self.path_cache[cache_key]
+    @contextmanager
+    def instrumented(self, call, profile, **details):
+        # Collect a SearchStats for one public call. Calls made inside it (find_shortest_path
+        # falling back to find_path, join_legs) add to the outer call's stats.
+        if self.active_stats is not None:
+            yield self.active_stats
+            return
+        stats = SearchStats(call, engine=self.engine, **details)
+        queries, db_seconds = leg_cache.db_usage()
+        self.active_stats = stats
+        began = time.perf_counter()
+        try:
+            with profiled(stats, profile):
+                yield stats
+        finally:
+            stats.seconds = time.perf_counter() - began
+            queries_after, db_seconds_after = leg_cache.db_usage()
+            stats.db_queries += queries_after - queries
+            stats.db_seconds += db_seconds_after - db_seconds
+            self.active_stats = None
+            self.stats = stats
+            if self.stats_log is not None:
+                stats.write_jsonl(self.stats_log)
 
-        path = self.bidirectional_a_star(start, end)
-        if path:
-            self.path_cache[cache_key] = path
-            self.path_cache[(end, start)] = path[::-1]
-        return path
+    def find_path(self, start, end, profile=None):
+        # profile: True keeps a text cProfile summary on self.stats, a path dumps the profile there
+        with self.instrumented('find_path', profile, start=start, end=end) as stats:
+            # Legs are shared between PathFinders while the grid matches a database layout version.
+            # A*, JPS, Dial and D* Lite return shortest legs; HPA* legs can be a few percent
+            # longer, so HPA* may use cached legs but never adds to them.
+            version = self.grid.version
+            shared = True
+            if version is not None:
+                path = leg_cache.get(self.rows, self.cols, version, start, end)
+                if path is not None:
+                    stats.cache_hits += 1
+                    return path
+                stats.cache_misses += 1
+
+            with stats.phase('search'):
+                if self.incremental:
+                    path = self.incremental_leg(start, end)
+                elif self.engine == 'dial' or self.grid.costs is not None:
+                    if self.dial is None:
+                        self.dial = DialSearch(self.grid)
+                    path = self.dial.find_path(start, end, stats)
+                elif self.engine == 'jps':
+                    if self.jump_point_search is None:
+                        self.jump_point_search = JumpPointSearch(self.grid)
+                    path = self.jump_point_search.find_path(start, end, stats)
+                elif self.engine == 'hpa':
+                    if self.hierarchy is None:
+                        self.hierarchy = HierarchicalPlanner(self.grid, self.cluster_size)
+                    path = self.hierarchy.find_path(start, end, stats)
+                    shared = False
+                else:
+                    path = self.bidirectional_a_star(start, end)
+            if path and version is not None and shared:
+                cost = self.path_cost(path) if self.grid.costs is not None else None
+                leg_cache.put(self.rows, self.cols, version, start, end, path, cost)
+            return path
+
+    def path_cost(self, path):
+        # Travel cost of a path of point numbers; its step count on a floor without costs
+        return self.grid.path_cost([point - 1 for point in path])
+
+    def incremental_leg(self, start, end):
+        planner = self.leg_planners.get((start, end))
+        if planner is None:
+            planner = DStarLite(self.grid, start - 1, end - 1)
+            self.leg_planners[(start, end)] = planner
+        path = planner.path()
+        return [index + 1 for index in path] if path else None
+
+    def replan(self, changed_cells):
+        # Repair the current route after the (row, col) cells in changed_cells were toggled
+        # or re-costed in self.grid. A leg is searched again only if a changed cell lies on it,
+        # or could open a cheaper detour (the leg cache's rule); the rest are kept as they are.
+        # In incremental mode those legs get a D* Lite planner, and legs that already have one
+        # are repaired by it, which only does work if its search state reaches a change.
+        if self.route is None:
+            raise ValueError("No route to replan: call find_shortest_path first")
+        changed = [row * self.cols + col for row, col in changed_cells]
+        if self.jump_point_search is not None:
+            self.jump_point_search.refresh()
+        if self.hierarchy is not None:
+            self.hierarchy.update_cells(changed)
+        # Landmark distances from the old layout can overestimate on the new one
+        if self.landmarks is not None and self.landmarks.checksum != layout_checksum(self.grid):
+            self.landmarks = LandmarkIndex.build(self.grid, len(self.landmarks.landmarks) or 8)
+        self.validate_points(self.route)
+
+        # Each cell is checked both as blocked (does the leg cross it?) and as cleared (could a
+        # detour through it be cheaper?), which also covers cost changes either way
+        changes = [(row, col, blocked) for row, col in changed_cells for blocked in (True, False)]
+        costs = self.grid.costs
+        repaired = 0
+        legs = []
+        for (a, b), leg in zip(zip(self.route, self.route[1:]), self.route_legs):
+            planner = self.leg_planners.get((a, b))
+            if planner is not None:
+                repaired += planner.notify_changes(changed)
+                path = planner.path()
+                leg = [index + 1 for index in path] if path else None
+            elif not leg or not leg_cache.still_valid(leg, self.cols, a, b, changes,
+                                                      None if costs is None else self.path_cost(leg)):
+                repaired += 1
+                leg = self.find_path(a, b)
+            if not leg:
+                raise ValueError(f"No path found between {a} and {b}")
+            legs.append(leg)
+        logger.info(f"Replanned {repaired} of {len(legs)} legs")
+        self.route_legs = legs
+        return self.join_legs(legs)
+
+    @staticmethod
+    def join_legs(legs):
+        full_path = []
+        for leg in legs:
+            full_path.extend(leg[:-1])
+        full_path.append(legs[-1][-1])
+        return full_path
 
     def bidirectional_a_star(self, start, end):
         start_row, start_col = self.number_to_coord(start)
@@ -84,49 +252,66 @@ class PathFinder:
         backward_closed = set()
         backward_came_from = {}
         backward_g_score = {end_coord: 0}
+        # Cheapest start-to-end path seen where the two searches touch, and its meeting cell.
+        # Stopping at the first cell both searches have closed can miss a shorter path, so the
+        # search runs until neither frontier can beat it: every cheaper path would have to pass
+        # through an open cell whose f (a lower bound on the path's length) is below best.
+        best = 0 if start_coord == end_coord else None
+        meeting = start_coord
+        pops = pushes = 0
         
         while forward_open and backward_open:
+            if best is not None and max(forward_open[0][0], backward_open[0][0]) >= best:
+                break
+
             # Forward search
             _, current_forward = heapq.heappop(forward_open)
-            if current_forward in forward_closed:
-                continue
-            forward_closed.add(current_forward)
-            
-            if current_forward in backward_closed:
-                return self.reconstruct_bidirectional_path(
-                    current_forward, forward_came_from, backward_came_from, start, end)
-            
-            for neighbor in self.get_neighbors(*current_forward):
-                if neighbor in forward_closed:
-                    continue
-                tentative_g_score = forward_g_score[current_forward] + 1
-                if neighbor not in forward_g_score or tentative_g_score < forward_g_score[neighbor]:
-                    forward_came_from[neighbor] = current_forward
-                    forward_g_score[neighbor] = tentative_g_score
-                    f_score = tentative_g_score + self.heuristic(neighbor, end_coord)
-                    heapq.heappush(forward_open, (f_score, neighbor))
-            
+            pops += 1
+            if current_forward not in forward_closed:
+                forward_closed.add(current_forward)
+                for neighbor in self.get_neighbors(*current_forward):
+                    if neighbor in forward_closed:
+                        continue
+                    tentative_g_score = forward_g_score[current_forward] + 1
+                    if neighbor not in forward_g_score or tentative_g_score < forward_g_score[neighbor]:
+                        forward_came_from[neighbor] = current_forward
+                        forward_g_score[neighbor] = tentative_g_score
+                        f_score = tentative_g_score + self.heuristic(neighbor, end_coord)
+                        heapq.heappush(forward_open, (f_score, neighbor))
+                        pushes += 1
+                        other = backward_g_score.get(neighbor)
+                        if other is not None and (best is None or tentative_g_score + other < best):
+                            best = tentative_g_score + other
+                            meeting = neighbor
+
             # Backward search
             _, current_backward = heapq.heappop(backward_open)
-            if current_backward in backward_closed:
-                continue
-            backward_closed.add(current_backward)
-            
-            if current_backward in forward_closed:
-                return self.reconstruct_bidirectional_path(
-                    current_backward, forward_came_from, backward_came_from, start, end)
-            
-            for neighbor in self.get_neighbors(*current_backward):
-                if neighbor in backward_closed:
-                    continue
-                tentative_g_score = backward_g_score[current_backward] + 1
-                if neighbor not in backward_g_score or tentative_g_score < backward_g_score[neighbor]:
-                    backward_came_from[neighbor] = current_backward
-                    backward_g_score[neighbor] = tentative_g_score
-                    f_score = tentative_g_score + self.heuristic(neighbor, start_coord)
-                    heapq.heappush(backward_open, (f_score, neighbor))
+            pops += 1
+            if current_backward not in backward_closed:
+                backward_closed.add(current_backward)
+                for neighbor in self.get_neighbors(*current_backward):
+                    if neighbor in backward_closed:
+                        continue
+                    tentative_g_score = backward_g_score[current_backward] + 1
+                    if neighbor not in backward_g_score or tentative_g_score < backward_g_score[neighbor]:
+                        backward_came_from[neighbor] = current_backward
+                        backward_g_score[neighbor] = tentative_g_score
+                        f_score = tentative_g_score + self.heuristic(neighbor, start_coord)
+                        heapq.heappush(backward_open, (f_score, neighbor))
+                        pushes += 1
+                        other = forward_g_score.get(neighbor)
+                        if other is not None and (best is None or tentative_g_score + other < best):
+                            best = tentative_g_score + other
+                            meeting = neighbor
+
+        path = None
+        if best is not None:
+            path = self.reconstruct_bidirectional_path(meeting, forward_came_from, backward_came_from, start, end)
         
-        return None
+        if self.active_stats is not None:
+            expanded = len(forward_closed) + len(backward_closed)
+            self.active_stats.add_search(expanded, pushes + 2, pops, expanded - (path is not None))
+        return path
 
     def reconstruct_bidirectional_path(self, meeting_point, forward_came_from, backward_came_from, start, end):
         forward_path = []
@@ -145,40 +330,172 @@ class PathFinder:
         
         return forward_path + backward_path
 
-    def find_shortest_path(self, start, end, points):
-        self.validate_points([start, end] + points)
-        
-        if not points:
-            return self.find_path(start, end)
-        
-        all_points = [start] + points + [end]
-        all_paths = {}
-        
-        # Calculate paths between all points
-        for i, point1 in enumerate(all_points):
-            for point2 in all_points[i+1:]:
-                path = self.find_path(point1, point2)
-                if path:
-                    all_paths[(point1, point2)] = path
-                    all_paths[(point2, point1)] = path[::-1]
-                else:
-                    raise ValueError(f"No path found between {point1} and {point2}")
+    def bfs_sweep(self, source, targets):
+        # Breadth-first sweep from one cell that stops once every target is settled.
+        # Returns {target: distance} and a bytearray of parent directions, one per cell
+        # (0 = not reached, 5 = the source itself, 1-4 = index into OccupancyGrid.DIRECTIONS + 1).
+        cols = self.cols
+        cells = self.grid.cells
+        source_index = source - 1
+        remaining = set(target - 1 for target in targets)
+        distances = {}
+        parents = bytearray(self.rows * cols)
+        parents[source_index] = 5
+
+        frontier = [source_index]
+        distance = 0
+        expanded = 0
+        while frontier and remaining:
+            expanded += len(frontier)
+            next_frontier = []
+            for index in frontier:
+                if index in remaining:
+                    remaining.discard(index)
+                    distances[index + 1] = distance
+                col = index % cols
+                # right, down, left, up - same order as OccupancyGrid.DIRECTIONS
+                if col + 1 < cols:
+                    neighbor = index + 1
+                    if not parents[neighbor] and not cells[neighbor]:
+                        parents[neighbor] = 1
+                        next_frontier.append(neighbor)
+                neighbor = index + cols
+                if neighbor < len(cells) and not parents[neighbor] and not cells[neighbor]:
+                    parents[neighbor] = 2
+                    next_frontier.append(neighbor)
+                if col > 0:
+                    neighbor = index - 1
+                    if not parents[neighbor] and not cells[neighbor]:
+                        parents[neighbor] = 3
+                        next_frontier.append(neighbor)
+                neighbor = index - cols
+                if neighbor >= 0 and not parents[neighbor] and not cells[neighbor]:
+                    parents[neighbor] = 4
+                    next_frontier.append(neighbor)
+            frontier = next_frontier
+            distance += 1
+        if self.active_stats is not None:
+            self.active_stats.add_search(expanded, lookups=expanded)
+        return distances, parents
+
+    def trace_sweep_path(self, parents, target):
+        # Walk parent directions from target back to the sweep's source
+        offsets = (0, -1, -self.cols, 1, self.cols)
+        index = target - 1
+        path = [target]
+        while parents[index] != 5:
+            index += offsets[parents[index]]
+            path.append(index + 1)
+        return path[::-1]
+
+    def build_distance_matrix(self, points):
+        # One BFS sweep per point gives exact leg lengths to every other point.
+        # Returns the distance matrix, each point's sweep parents (None where the point was not
+        # swept) and, for every pair i < j, where its leg came from: the path from the leg cache
+        # or the index of the point whose sweep found it. matrix_leg turns these into cells.
+        # With cell costs the sweeps run on Dial's bucket queue instead. A leg then costs
+        # cost[a] - cost[b] more one way than the other, so each row adds its own point's
+        # cost: the matrix becomes symmetric, as 2-opt and Or-opt assume, and every route
+        # through the same points gains the same amount, so the best order is unchanged.
+        # The matrix is symmetric either way, so legs already known from the cache or an
+        # earlier sweep are filled in both directions, and a point is only swept while some of
+        # its legs are still unknown. Swept legs go into the cache for the next order.
+        costs = self.grid.costs
+        if costs is not None and self.dial is None:
+            self.dial = DialSearch(self.grid)
+        version = self.grid.version
+        stats = self.active_stats
+        size = len(points)
+        offsets = [0 if costs is None else costs[point - 1] for point in points]
+        distance_matrix = [[None] * size for _ in range(size)]
+        sweeps = [None] * size
+        legs = {}
+        for i in range(size):
+            distance_matrix[i][i] = offsets[i]
+            for j in range(i + 1, size):
+                if points[i] == points[j]:
+                    distance_matrix[i][j] = distance_matrix[j][i] = offsets[i]
+                    continue
+                if version is None:
+                    continue
+                path = leg_cache.get(self.rows, self.cols, version, points[i], points[j])
+                if path is None:
+                    if stats is not None:
+                        stats.cache_misses += 1
+                    continue
+                if stats is not None:
+                    stats.cache_hits += 1
+                legs[(i, j)] = path
+                distance_matrix[i][j] = distance_matrix[j][i] = self.path_cost(path) + offsets[i]
+
+        for i, point in enumerate(points):
+            row = distance_matrix[i]
+            missing = [j for j in range(size) if row[j] is None]
+            if not missing:
+                continue
+            targets = [points[j] for j in missing]
+            if costs is None:
+                distances, parents = self.bfs_sweep(point, targets)
+            else:
+                distances, parents = self.dial.sweep(point, targets, stats)
+            sweeps[i] = parents
+            for j in missing:
+                other = points[j]
+                if other not in distances:
+                    raise ValueError(f"No path found between {point} and {other}")
+                row[j] = distance_matrix[j][i] = distances[other] + offsets[i]
+                legs[(min(i, j), max(i, j))] = i
+                if version is not None:
+                    leg_cache.put(self.rows, self.cols, version, point, other, self.trace_sweep_path(parents, other),
+                                  None if costs is None else distances[other])
+        return distance_matrix, sweeps, legs
+
+    def matrix_leg(self, points, sweeps, legs, i, j):
+        # Cells from points[i] to points[j] out of build_distance_matrix's sweeps and cached legs.
+        # Reversing a shortest leg gives a shortest leg the other way, with or without costs.
+        if points[i] == points[j]:
+            return [points[i]]
+        source = legs[(min(i, j), max(i, j))]
+        if isinstance(source, int):
+            path = self.trace_sweep_path(sweeps[source], points[i + j - source])
+            return path if source == i else path[::-1]
+        return list(source) if i < j else source[::-1]
+
+    def genetic_route(self, distance_matrix, curve=None):
+        # Routes are lists of distance matrix indices: 0 is the start, the last index the end.
+        # curve, if given, gets the best route length as the GA runs (see SearchStats.fitness_curve).
+        start = 0
+        end = len(distance_matrix) - 1
+        points = list(range(1, end))
+        population_size = max(50, len(points) * 10)
+
+        rng = self.rng
+        if self.workers > 1 and np is not None:
+            return island_genetic_route(distance_matrix, population_size, self.generations, self.patience,
+                                        self.initial_mutation_rate, self.mutation_decay,
+                                        self.local_search, self.elite_size, self.workers,
+                                        self.migration_interval, self.migrants,
+                                        np.random.default_rng(rng.getrandbits(64)), curve)
+        if self.vectorized:
+            return vectorized_genetic_route(distance_matrix, population_size, self.generations, self.patience,
+                                            self.initial_mutation_rate, self.mutation_decay,
+                                            self.local_search, self.elite_size,
+                                            np.random.default_rng(rng.getrandbits(64)), curve)
 
         def path_length(path):
-            return sum(len(all_paths[(path[i], path[i + 1])]) - 1 
-                      for i in range(len(path) - 1))
+            return route_length(path, distance_matrix)
 
         def adaptive_mutate(path, generation):
             mutation_rate = self.initial_mutation_rate * (self.mutation_decay ** generation)
-            if len(path) > 3 and random.random() < mutation_rate:
-                i, j = random.sample(range(1, len(path) - 1), 2)
+            if len(path) > 3 and rng.random() < mutation_rate:
+                i, j = rng.sample(range(1, len(path) - 1), 2)
                 path[i], path[j] = path[j], path[i]
 
         def crossover(parent1, parent2):
             if len(parent1) <= 3:
                 return parent1[:]
             
-            start, end = sorted(random.sample(range(1, len(parent1) - 1), 2))
+            start, end = sorted(rng.sample(range(1, len(parent1) - 1), 2))
             child = [None] * len(parent1)
             child[start:end] = parent1[start:end]
             
@@ -192,18 +509,23 @@ class PathFinder:
             return child
 
         # Genetic algorithm with early stopping
-        population_size = max(50, len(points) * 10)
-        generations = 500
-        patience = 20
+        generations = self.generations
+        patience = self.patience
         best_fitness = float('inf')
         generations_without_improvement = 0
         
-        population = [[start] + random.sample(points, len(points)) + [end] 
+        population = [[start] + rng.sample(points, len(points)) + [end] 
                      for _ in range(population_size)]
         
         for generation in range(generations):
             population.sort(key=path_length)
+            if self.local_search == 'memetic':
+                for k in range(min(self.elite_size, population_size)):
+                    population[k] = improve_route(population[k], distance_matrix)
+                population.sort(key=path_length)
             current_best = path_length(population[0])
+            if curve is not None:
+                curve.append((generation, current_best))
             
             if current_best < best_fitness:
                 best_fitness = current_best
@@ -218,7 +540,7 @@ class PathFinder:
             next_gen = population[:population_size // 2]
             
             while len(next_gen) < population_size:
-                parent1, parent2 = random.sample(next_gen, 2)
+                parent1, parent2 = rng.sample(next_gen, 2)
                 child = crossover(parent1, parent2)
                 adaptive_mutate(child, generation)
                 next_gen.append(child)
@@ -226,11 +548,39 @@ class PathFinder:
             population = next_gen
 
         best_route = min(population, key=path_length)
-        
-        # Reconstruct full path
-        full_path = []
-        for i in range(len(best_route) - 1):
-            full_path.extend(all_paths[(best_route[i], best_route[i + 1])][:-1])
-        full_path.append(end)
-        
-        return full_path
\ No newline at end of file
+        if self.local_search:
+            best_route = improve_route(best_route, distance_matrix)
+        return best_route
+
+    def find_shortest_path(self, start, end, points, profile=None):
+        # profile: as for find_path; the call's counters and phase times end up in self.stats
+        with self.instrumented('find_shortest_path', profile, start=start, end=end, picks=len(points)) as stats:
+            self.validate_points([start, end] + points)
+
+            if not points:
+                self.route = [start, end]
+                path = self.find_path(start, end)
+                self.route_legs = [path]
+                return path
+
+            all_points = [start] + points + [end]
+
+            # Leg lengths between all points from the leg cache and one BFS sweep per point
+            with stats.phase('leg_matrix'):
+                distance_matrix, sweeps, legs = self.build_distance_matrix(all_points)
+
+            with stats.phase('optimisation'):
+                if len(points) <= self.exact_threshold:
+                    stats.details['solver'] = 'exact'
+                    order = held_karp(distance_matrix)
+                else:
+                    stats.details['solver'] = 'ga'
+                    order = self.genetic_route(distance_matrix, stats.fitness_curve)
+            self.route = [all_points[i] for i in order]
+
+            with stats.phase('reconstruction'):
+                # Reconstruct full path, tracing only the legs the route uses; in incremental
+                # mode these are kept as they are until replan() finds one broken
+                self.route_legs = [self.matrix_leg(all_points, sweeps, legs, a, b)
+                                   for a, b in zip(order, order[1:])]
+                return self.join_legs(self.route_legs)
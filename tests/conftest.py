@@ -0,0 +1,21 @@
+# conftest.py - the modules live at the repository root, next to this directory
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+from pathcache import leg_cache
+
+
+@pytest.fixture
+def db(tmp_path):
+    # A scratch warehouse database for one test, with an empty leg cache
+    previous = database.DB_PATH
+    database.set_database_path(str(tmp_path / 'warehouse.db'))
+    leg_cache.clear()
+    yield database
+    leg_cache.clear()
+    database.set_database_path(previous)
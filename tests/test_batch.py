@@ -0,0 +1,48 @@
+import io
+
+import pytest
+
+from batch import plan_orders, read_orders
+from grid import OccupancyGrid
+from spa import PathFinder
+
+
+def test_bad_jsonl_lines_become_error_records():
+    text = ('{"order_id": "a", "points": [3, 12]}\n'
+            'not json\n'
+            '\n'
+            '{"order_id": "b"}\n'
+            '{"order_id": "c", "points": [3, "x"]}\n'
+            '{"order_id": "d", "points": [4], "end": 20}\n')
+    orders = list(read_orders(io.StringIO(text), 'jsonl'))
+    assert [order[0] for order in orders] == ['a', '2', 'b', 'c', 'd']
+    assert orders[0] == ('a', [3, 12], None, None, None)
+    assert orders[4] == ('d', [4], None, 20, None)
+    for order in orders[1:4]:
+        assert order[1] is None and order[4]
+
+
+def test_bad_csv_rows_become_error_records():
+    text = 'order_id,points,start,end\nx,3;12,,\ny,3 q,,\nz\n,4,2,25\n'
+    orders = list(read_orders(io.StringIO(text), 'csv'))
+    assert orders[0] == ('x', [3, 12], None, None, None)
+    assert orders[1][0] == 'y' and orders[1][4]
+    assert orders[2][0] == 'z' and orders[2][4]
+    assert orders[3] == ('4', [4], 2, 25, None)
+
+
+def test_planning_continues_past_bad_orders():
+    text = '{"order_id": "a", "points": [3]}\n{broken\n{"order_id": "c", "points": [99]}\n{"order_id": "d", "points": [7]}\n'
+    pathfinder = PathFinder(5, 5, OccupancyGrid(5, 5))
+    results = list(plan_orders(read_orders(io.StringIO(text), 'jsonl'), pathfinder, 1, 25))
+    assert [result['order_id'] for result in results] == ['a', '2', 'c', 'd']
+    assert 'error' not in results[0] and 'error' not in results[3]
+    assert 'outside' in results[2]['error']
+    assert results[1]['error'].startswith('Invalid order on line 2')
+
+
+@pytest.mark.parametrize('point', [0, -3, 26])
+def test_points_off_the_grid_are_rejected(point):
+    pathfinder = PathFinder(5, 5, OccupancyGrid(5, 5))
+    with pytest.raises(ValueError, match='outside the 5x5 grid'):
+        pathfinder.find_shortest_path(1, 25, [point])
@@ -0,0 +1,119 @@
+import os
+import shutil
+import sqlite3
+import threading
+
+import pytest
+
+LEGACY_DB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'warehouse.db')
+
+
+def columns(db, table):
+    return [column[1] for column in db.get_connection().execute(f'PRAGMA table_info({table})')]
+
+
+def user_version(db):
+    return db.get_connection().execute('PRAGMA user_version').fetchone()[0]
+
+
+def make_legacy_file(path, rows):
+    # The items table as the first releases wrote it: a missing comma folds IsObstacle into
+    # Quantity's type, and a later release appended the real IsObstacle column
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE items (ItemID INTEGER PRIMARY KEY, Row INTEGER, Col INTEGER, '
+                 'Quantity INTEGER IsObstacle INTEGER)')
+    conn.execute('ALTER TABLE items ADD COLUMN IsObstacle INTEGER DEFAULT 0')
+    conn.executemany('INSERT INTO items VALUES (?, ?, ?, ?, ?)', rows)
+    conn.commit()
+    conn.close()
+
+
+def test_new_database_gets_the_current_schema(db):
+    db.create_database()
+    assert user_version(db) == db.SCHEMA_VERSION
+    assert columns(db, 'items') == ['ItemID', 'Row', 'Col', 'Quantity', 'IsObstacle', 'Cost']
+    assert 'Cost' in columns(db, 'leg_cache')
+
+
+def test_shipped_legacy_database_is_upgraded(db, tmp_path):
+    shutil.copy(LEGACY_DB, tmp_path / 'warehouse.db')
+    assert user_version(db) == db.SCHEMA_VERSION
+    assert columns(db, 'items') == ['ItemID', 'Row', 'Col', 'Quantity', 'IsObstacle', 'Cost']
+    assert db.get_grid_dimensions() == (15, 1)
+    assert db.get_grid_snapshot(15, 1)[1] == bytearray(15)
+
+
+def test_legacy_cells_keep_their_stock_and_obstacles(db, tmp_path):
+    make_legacy_file(str(tmp_path / 'warehouse.db'),
+                     [(1, 0, 0, None, None), (2, 0, 1, 7, 0), (3, 1, 0, 3, 1), (4, 1, 1, 0, 0)])
+    assert db.get_grid_dimensions() == (2, 2)
+    assert [db.get_item_by_id(item_id) for item_id in range(1, 5)] == [(0, 0, None), (0, 1, 7), (1, 0, 3), (1, 1, 0)]
+    assert db.is_obstacle(1, 0) and not db.is_obstacle(0, 0)
+    assert db.get_cost_map(2, 2) == bytearray(b'\x01') * 4
+    assert db.get_layout_version() == 0
+
+
+def test_failed_upgrade_keeps_the_last_good_version(db, tmp_path):
+    make_legacy_file(str(tmp_path / 'warehouse.db'), [(1, 0, 0, 1, 0), (2, 0, 0, 2, 0)])
+    with pytest.raises(sqlite3.IntegrityError):
+        db.get_connection()
+    db.close_connection()
+    conn = sqlite3.connect(str(tmp_path / 'warehouse.db'))
+    assert conn.execute('PRAGMA user_version').fetchone()[0] == 1
+    assert conn.execute('SELECT COUNT(*) FROM items').fetchone()[0] == 2
+    conn.close()
+
+
+def test_newer_database_is_refused(db, tmp_path):
+    conn = sqlite3.connect(str(tmp_path / 'warehouse.db'))
+    conn.execute(f'PRAGMA user_version = {db.SCHEMA_VERSION + 1}')
+    conn.close()
+    with pytest.raises(sqlite3.DatabaseError, match='newer'):
+        db.get_connection()
+
+
+def test_concurrent_picks_never_oversell(db):
+    db.populate_database(4, 4, 1, 16, quantities={5: 25, 6: 1000})
+    outcomes = []
+    lock = threading.Lock()
+
+    def worker():
+        try:
+            for _ in range(10):
+                result = db.pick_items([5, 6])
+                with lock:
+                    outcomes.append(result[5][0])
+        finally:
+            db.close_connection()
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(outcomes) == 80 and outcomes.count(True) == 25
+    assert db.get_item_by_id(5)[2] == 0
+    assert db.get_item_by_id(6)[2] == 1000 - 80
+
+
+def test_all_or_nothing_orders_take_nothing_when_short(db):
+    db.populate_database(2, 3, 1, 6, quantities={2: 2, 3: 1, 4: 5})
+    orders = [{2: 1, 3: 2}, [2, 4, 4], [3, 3]]
+    partial = db.pick_orders(orders)
+    assert partial[0] == {2: (True, 1), 3: (False, 1)}
+    assert partial[1] == {2: (True, 0), 4: (True, 3)}
+    assert partial[2] == {3: (False, 1)}
+
+    db.populate_database(2, 3, 1, 6, quantities={2: 2, 3: 1, 4: 5})
+    whole = db.pick_orders(orders, all_or_nothing=True)
+    assert whole[0] == {2: (False, 2), 3: (False, 1)}
+    assert whole[1] == {2: (True, 1), 4: (True, 3)}
+    assert whole[2] == {3: (False, 1)}
+    assert [db.get_item_by_id(item_id)[2] for item_id in (2, 3, 4)] == [1, 1, 3]
+
+
+def test_pick_counts_must_be_positive(db):
+    db.populate_database(2, 2, 1, 4, quantities={2: 3})
+    with pytest.raises(ValueError):
+        db.pick_items({2: 0})
+    assert db.get_item_by_id(2)[2] == 3
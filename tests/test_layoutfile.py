@@ -0,0 +1,102 @@
+import io
+import json
+import random
+from array import array
+
+import pytest
+
+from database import NO_QUANTITY
+from layoutfile import (HEADER, _JsonStream, load_layout, pack_bits, read_json_layout, read_layout, save_layout,
+                        unpack_bits, write_json_layout, write_layout)
+
+
+def random_layout(rng, rows, cols, costs=True):
+    n = rows * cols
+    quantities = array('l', (rng.choice((NO_QUANTITY, 0, rng.randint(1, 2 ** 31 - 1))) for _ in range(n)))
+    obstacles = bytearray(rng.random() < 0.3 for _ in range(n))
+    weights = bytearray(rng.randint(1, 9) for _ in range(n)) if costs else None
+    return quantities, obstacles, weights
+
+
+@pytest.mark.parametrize('n', [0, 1, 7, 8, 9, 64, 1001])
+def test_bits_round_trip(n):
+    cells = bytearray(random.Random(n).random() < 0.5 for _ in range(n))
+    packed = pack_bits(cells)
+    assert len(packed) == (n + 7) // 8
+    assert unpack_bits(packed, n) == cells
+
+
+@pytest.mark.parametrize('compress', [True, False])
+@pytest.mark.parametrize('costs', [True, False])
+def test_binary_layout_round_trip(tmp_path, compress, costs):
+    quantities, obstacles, weights = random_layout(random.Random(1), 13, 17, costs)
+    path = str(tmp_path / 'floor.layout')
+    write_layout(path, 13, 17, quantities, obstacles, [3, 200, 9], version=42, compress=compress, costs=weights)
+    layout = read_layout(path)
+    assert (layout.rows, layout.cols, layout.points, layout.version) == (13, 17, [3, 200, 9], 42)
+    assert (layout.quantities, layout.obstacles, layout.costs) == (quantities, obstacles, weights)
+
+
+def test_json_layout_round_trip(tmp_path):
+    quantities, obstacles, weights = random_layout(random.Random(2), 6, 9)
+    path = str(tmp_path / 'floor.json')
+    write_json_layout(path, 6, 9, quantities, obstacles, [4, 5], weights)
+    layout = read_json_layout(path)
+    assert (layout.rows, layout.cols, layout.points) == (6, 9, [4, 5])
+    assert (layout.quantities, layout.obstacles, layout.costs) == (quantities, obstacles, weights)
+
+
+@pytest.mark.parametrize('compress', [True, False])
+def test_truncated_snapshots_are_rejected(tmp_path, compress):
+    quantities, obstacles, weights = random_layout(random.Random(3), 8, 8)
+    path = str(tmp_path / 'floor.layout')
+    write_layout(path, 8, 8, quantities, obstacles, compress=compress, costs=weights)
+    with open(path, 'rb') as file:
+        data = file.read()
+    for size in (HEADER.size - 1, len(data) - 1):
+        with open(path, 'wb') as file:
+            file.write(data[:size])
+        with pytest.raises(ValueError):
+            read_layout(path)
+
+
+def test_other_files_are_not_read_as_snapshots(tmp_path):
+    path = str(tmp_path / 'floor.layout')
+    with open(path, 'wb') as file:
+        file.write(b'NOPE' + bytes(HEADER.size))
+    with pytest.raises(ValueError, match='not a layout snapshot'):
+        read_layout(path)
+
+
+def test_json_arrays_read_across_chunk_edges():
+    values = [{"row": 0, "col": 1, "quantity": None}, {"s": "x}, ]", "n": {"b": [1, 2]}}, 12345, -7.5e3, [], True]
+    for text in (json.dumps(values), json.dumps(values, indent=3)):
+        for chunk_size in range(1, 40):
+            assert list(_JsonStream(io.StringIO(text), chunk_size).array()) == values
+
+
+@pytest.mark.parametrize('text', ['[1 2]', '[1,', '[{"a": 1}', '[1,]'])
+def test_malformed_json_arrays_are_rejected(text):
+    for chunk_size in (1, 3, 100):
+        with pytest.raises(ValueError):
+            list(_JsonStream(io.StringIO(text), chunk_size).array())
+
+
+def test_snapshot_restores_a_changed_floor(db, tmp_path):
+    quantities = {2: 5, 3: 0, 7: 123456}
+    db.populate_database(3, 4, 1, 12, obstacles=[6], quantities=quantities, costs={10: 7})
+    path = str(tmp_path / 'floor.layout')
+    save_layout(path, points=[2, 7])
+    before = db.get_grid_snapshot(3, 4), db.get_cost_map(3, 4)
+
+    # Same size: cells are updated in place
+    db.populate_database(3, 4, 1, 12, obstacles=[5, 8], quantities={2: 1, 4: 9})
+    layout = load_layout(path)
+    assert layout.points == [2, 7]
+    assert (db.get_grid_snapshot(3, 4), db.get_cost_map(3, 4)) == before
+
+    # Different size: the table is rebuilt
+    db.populate_database(2, 2, 1, 4)
+    load_layout(path)
+    assert db.get_grid_dimensions() == (3, 4)
+    assert (db.get_grid_snapshot(3, 4), db.get_cost_map(3, 4)) == before
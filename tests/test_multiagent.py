@@ -0,0 +1,50 @@
+import random
+import time
+
+from grid import OccupancyGrid
+from multiagent import MultiRobotPlanner, ReservationTable
+from spa import PathFinder
+
+
+def aisle_floor(n):
+    # Shelf pairs every four rows, broken by two-cell cross aisles every 20 columns
+    cells = bytearray(n * n)
+    for row in range(n):
+        for col in range(1, n - 1):
+            if row % 4 in (2, 3) and col % 20 not in (0, 1):
+                cells[row * n + col] = 1
+    return cells
+
+
+def test_final_leg_waits_for_the_goal_to_be_released():
+    # Another robot passes through the goal late; the search must wait it out without
+    # giving up at the leg's usual time limit
+    planner = MultiRobotPlanner(PathFinder(5, 5, OccupancyGrid(5, 5)), max_wait=0)
+    table = ReservationTable()
+    table.reserve_path([7] * 30 + [12, 17], park=True)
+    leg = planner.space_time_search(0, 12, 0, table, final=True)
+    assert leg[0] == 0 and leg[-1] == 12
+    assert len(leg) - 1 >= 31
+    assert not any(table.blocked(cell, t) for t, cell in enumerate(leg))
+    assert planner.space_time_search(0, 17, 0, table, final=True) is None
+
+
+def test_twenty_robots_on_an_aisle_floor():
+    n = 100
+    cells = aisle_floor(n)
+    free = [index + 1 for index, cell in enumerate(cells) if not cell]
+    rng = random.Random(3)
+    chosen = rng.sample(free, 120)
+    orders = [(chosen[k], chosen[20 + k], chosen[40 + 4 * k:44 + 4 * k]) for k in range(20)]
+    planner = MultiRobotPlanner(PathFinder(n, n, OccupancyGrid(n, n, cells), seed=3))
+
+    began = time.perf_counter()
+    paths = planner.plan(orders)
+    took = time.perf_counter() - began
+
+    assert planner.first_conflict([[point - 1 for point in path] for path in paths]) is None
+    for (start, end, points), path in zip(orders, paths):
+        assert path[0] == start and path[-1] == end
+        assert set(points) <= set(path)
+    # About 0.3s here; the final-leg search used to fill its whole space-time box
+    assert took < 2
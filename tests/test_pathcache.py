@@ -0,0 +1,49 @@
+from spa import PathFinder
+
+
+def plan(rows, cols, points):
+    pathfinder = PathFinder(rows, cols, seed=1)
+    path = pathfinder.find_shortest_path(1, rows * cols, points)
+    return pathfinder, path
+
+
+def test_repeated_order_is_served_from_the_leg_cache(db):
+    db.populate_database(8, 8, 1, 64, obstacles=[20, 28, 36, 44])
+    points = [6, 30, 50]
+    first, path = plan(8, 8, points)
+    assert first.stats.cache_hits == 0
+
+    second, again = plan(8, 8, points)
+    legs = len(points) + 2
+    assert again == path
+    assert second.stats.cache_hits == legs * (legs - 1) // 2
+    assert second.stats.cache_misses == 0
+    assert second.stats.searches == 0
+
+
+def test_blocking_a_cell_on_a_cached_leg_invalidates_it(db):
+    db.populate_database(8, 8, 1, 64)
+    points = [8, 57]
+    _, path = plan(8, 8, points)
+    blocked = next(cell for cell in path[len(path) // 2:] if cell not in points + [1, 64])
+    row, col = divmod(blocked - 1, 8)
+    db.set_obstacle(row, col, True)
+
+    pathfinder, replanned = plan(8, 8, points)
+    assert blocked not in replanned
+    assert pathfinder.stats.cache_misses > 0
+    assert pathfinder.stats.searches > 0
+    assert len(replanned) == len(path)
+
+
+def test_clearing_a_cell_lets_a_cheaper_leg_replace_a_cached_one(db):
+    # Bottom row 7..9 costs 50 a cell; the top row is cheap once cell 3 is cleared
+    db.populate_database(2, 5, 6, 10, obstacles=[3], costs={7: 50, 8: 50, 9: 50})
+    pathfinder = PathFinder(2, 5)
+    assert pathfinder.find_path(6, 10) == [6, 7, 8, 9, 10]
+    db.set_obstacle(0, 2, False)
+
+    pathfinder = PathFinder(2, 5)
+    path = pathfinder.find_path(6, 10)
+    assert path == [6, 1, 2, 3, 4, 5, 10]
+    assert pathfinder.path_cost(path) == 6
@@ -0,0 +1,167 @@
+import heapq
+import random
+
+import pytest
+
+from grid import OccupancyGrid
+from landmarks import LandmarkIndex
+from spa import PathFinder
+
+
+def random_floor(rng, rows, cols, density=0.25, costs=False):
+    cells = bytearray(1 if rng.random() < density else 0 for _ in range(rows * cols))
+    weights = bytearray(rng.choice((1, 1, 1, 2, 5, 9)) for _ in range(rows * cols)) if costs else None
+    return OccupancyGrid(rows, cols, cells, costs=weights)
+
+
+def reference_distances(grid, source):
+    # Plain Dijkstra over the grid, charging each cell's cost on entry
+    costs = grid.costs
+    distances = {source: 0}
+    queue = [(0, source)]
+    while queue:
+        distance, index = heapq.heappop(queue)
+        if distance > distances[index]:
+            continue
+        for row, col in grid.neighbors(*divmod(index, grid.cols)):
+            neighbor = row * grid.cols + col
+            candidate = distance + (costs[neighbor] if costs is not None else 1)
+            if candidate < distances.get(neighbor, candidate + 1):
+                distances[neighbor] = candidate
+                heapq.heappush(queue, (candidate, neighbor))
+    return distances
+
+
+def assert_valid_path(grid, path, start, end):
+    assert path[0] == start and path[-1] == end
+    for a, b in zip(path, path[1:]):
+        (ra, ca), (rb, cb) = divmod(a - 1, grid.cols), divmod(b - 1, grid.cols)
+        assert abs(ra - rb) + abs(ca - cb) == 1
+    assert not any(grid.cells[point - 1] for point in path)
+
+
+def free_pairs(rng, grid, count):
+    free = [index + 1 for index, cell in enumerate(grid.cells) if not cell]
+    return [tuple(rng.sample(free, 2)) for _ in range(count)]
+
+
+@pytest.mark.parametrize('engine', ['astar', 'jps', 'dial'])
+def test_engines_find_shortest_legs(engine):
+    rng = random.Random(7)
+    for _ in range(12):
+        rows, cols = rng.randint(3, 14), rng.randint(3, 14)
+        grid = random_floor(rng, rows, cols)
+        pathfinder = PathFinder(rows, cols, grid, engine=engine)
+        for start, end in free_pairs(rng, grid, 8):
+            distance = reference_distances(grid, start - 1).get(end - 1)
+            path = pathfinder.find_path(start, end)
+            if distance is None:
+                assert not path
+            else:
+                assert_valid_path(grid, path, start, end)
+                assert len(path) - 1 == distance
+
+
+def test_landmark_heuristic_keeps_astar_optimal():
+    rng = random.Random(11)
+    for _ in range(6):
+        grid = random_floor(rng, 12, 12, density=0.3)
+        pathfinder = PathFinder(12, 12, grid, landmarks=LandmarkIndex.build(grid, 4))
+        for start, end in free_pairs(rng, grid, 10):
+            distance = reference_distances(grid, start - 1).get(end - 1)
+            path = pathfinder.find_path(start, end)
+            assert (len(path) - 1 if path else None) == distance
+
+
+def test_weighted_floors_are_planned_by_cost():
+    rng = random.Random(5)
+    for engine in PathFinder.ENGINES:
+        grid = random_floor(rng, 10, 10, density=0.15, costs=True)
+        pathfinder = PathFinder(10, 10, grid, engine=engine)
+        for start, end in free_pairs(rng, grid, 10):
+            cost = reference_distances(grid, start - 1).get(end - 1)
+            path = pathfinder.find_path(start, end)
+            assert (pathfinder.path_cost(path) if path else None) == cost
+
+
+def test_hpa_paths_are_valid_and_never_shorter_than_optimal():
+    rng = random.Random(3)
+    for _ in range(8):
+        grid = random_floor(rng, 20, 20, density=0.2)
+        pathfinder = PathFinder(20, 20, grid, engine='hpa')
+        pathfinder.cluster_size = 5
+        for start, end in free_pairs(rng, grid, 12):
+            distance = reference_distances(grid, start - 1).get(end - 1)
+            path = pathfinder.find_path(start, end)
+            if distance is None:
+                assert not path
+            else:
+                assert_valid_path(grid, path, start, end)
+                assert len(path) - 1 >= distance
+
+
+def test_hpa_stays_close_to_optimal_on_an_open_floor():
+    grid = OccupancyGrid(60, 60)
+    pathfinder = PathFinder(60, 60, grid, engine='hpa')
+    rng = random.Random(1)
+    extra = total = 0
+    for start, end in free_pairs(rng, grid, 60):
+        distance = reference_distances(grid, start - 1)[end - 1]
+        extra += len(pathfinder.find_path(start, end)) - 1 - distance
+        total += distance
+    assert extra <= 0.03 * total
+
+
+def test_incremental_legs_follow_obstacle_edits():
+    rng = random.Random(9)
+    grid = random_floor(rng, 12, 12, density=0.2)
+    pathfinder = PathFinder(12, 12, grid, incremental=True)
+    start, end = free_pairs(rng, grid, 1)[0]
+    for _ in range(15):
+        distance = reference_distances(grid, start - 1).get(end - 1)
+        path = pathfinder.find_path(start, end)
+        if distance is None:
+            assert not path
+        else:
+            assert_valid_path(grid, path, start, end)
+            assert len(path) - 1 == distance
+        cell = rng.choice([index for index in range(144) if index + 1 not in (start, end)])
+        row, col = divmod(cell, 12)
+        grid.set_obstacle(row, col, not grid.cells[cell])
+        pathfinder.leg_planners[(start, end)].notify_changes([cell])
+
+
+def test_distance_matrix_matches_reference_distances():
+    rng = random.Random(4)
+    grid = random_floor(rng, 15, 15, density=0.15)
+    free = [index + 1 for index, cell in enumerate(grid.cells) if not cell]
+    reachable = reference_distances(grid, free[0] - 1)
+    points = rng.sample([point for point in free if point - 1 in reachable], 7)
+    matrix = PathFinder(15, 15, grid).build_distance_matrix(points)[0]
+    for i, a in enumerate(points):
+        distances = reference_distances(grid, a - 1)
+        assert matrix[i] == [distances[b - 1] for b in points]
+
+
+def test_replanned_routes_stay_shortest_per_leg():
+    rng = random.Random(12)
+    grid = random_floor(rng, 14, 14, density=0.15)
+    free = [index + 1 for index, cell in enumerate(grid.cells) if not cell]
+    reachable = reference_distances(grid, free[0] - 1)
+    start, end, *points = rng.sample([point for point in free if point - 1 in reachable], 6)
+    pathfinder = PathFinder(14, 14, grid, seed=1)
+    pathfinder.find_shortest_path(start, end, points)
+    for _ in range(10):
+        route = pathfinder.route
+        cell = rng.choice([index for index in range(14 * 14) if index + 1 not in route])
+        row, col = divmod(cell, 14)
+        grid.set_obstacle(row, col, not grid.cells[cell])
+        try:
+            path = pathfinder.replan([(row, col)])
+        except ValueError:
+            grid.set_obstacle(row, col, not grid.cells[cell])
+            pathfinder.replan([(row, col)])
+            continue
+        assert_valid_path(grid, path, start, end)
+        for (a, b), leg in zip(zip(route, route[1:]), pathfinder.route_legs):
+            assert len(leg) - 1 == reference_distances(grid, a - 1)[b - 1]
@@ -0,0 +1,94 @@
+import random
+from itertools import permutations
+
+import pytest
+
+from grid import OccupancyGrid
+from spa import PathFinder
+from tsp import held_karp, improve_route, np, or_opt, route_length, two_opt
+
+
+def random_matrix(rng, n, symmetric=True):
+    matrix = [[0 if i == j else rng.randint(1, 50) for j in range(n)] for i in range(n)]
+    if symmetric:
+        for i in range(n):
+            for j in range(i):
+                matrix[i][j] = matrix[j][i]
+    return matrix
+
+
+def brute_force(matrix):
+    n = len(matrix)
+    return min(route_length([0, *middle, n - 1], matrix) for middle in permutations(range(1, n - 1)))
+
+
+def assert_route(route, n):
+    assert route[0] == 0 and route[-1] == n - 1
+    assert sorted(route) == list(range(n))
+
+
+@pytest.mark.parametrize('symmetric', [True, False])
+def test_held_karp_matches_brute_force(symmetric):
+    rng = random.Random(2)
+    for n in range(2, 9):
+        for _ in range(4):
+            matrix = random_matrix(rng, n, symmetric)
+            route = held_karp(matrix)
+            assert_route(route, n)
+            assert route_length(route, matrix) == brute_force(matrix)
+
+
+def test_local_search_never_lengthens_a_route():
+    rng = random.Random(8)
+    for _ in range(20):
+        n = rng.randint(4, 12)
+        matrix = random_matrix(rng, n)
+        route = [0] + rng.sample(range(1, n - 1), n - 2) + [n - 1]
+        for improve in (two_opt, or_opt, improve_route):
+            improved = improve(route, matrix)
+            assert_route(improved, n)
+            assert route_length(improved, matrix) <= route_length(route, matrix)
+
+
+def line_matrix(n):
+    # Waypoints on a line in a shuffled order; the best route visits them left to right
+    positions = [0] + random.Random(n).sample(range(1, n - 1), n - 2) + [n - 1]
+    return [[abs(a - b) for b in positions] for a in positions]
+
+
+@pytest.mark.parametrize('vectorized', [False, pytest.param(True, marks=pytest.mark.skipif(np is None, reason="needs NumPy"))])
+@pytest.mark.parametrize('local_search', [None, 'memetic'])
+def test_genetic_route_is_a_valid_and_sensible_route(vectorized, local_search):
+    n = 16
+    matrix = line_matrix(n)
+    pathfinder = PathFinder(4, 4, OccupancyGrid(4, 4), seed=3)
+    pathfinder.vectorized = vectorized
+    pathfinder.local_search = local_search
+    curve = []
+    route = pathfinder.genetic_route(matrix, curve)
+    assert_route(route, n)
+    # The best routes always survive into the next generation
+    assert curve and all(b[1] <= a[1] for a, b in zip(curve, curve[1:]))
+    if local_search:
+        assert route_length(route, matrix) == n - 1
+    else:
+        assert route_length(route, matrix) < 3 * (n - 1)
+
+
+def test_genetic_route_is_repeatable_with_a_seed():
+    matrix = random_matrix(random.Random(6), 15)
+    routes = []
+    for _ in range(2):
+        pathfinder = PathFinder(4, 4, OccupancyGrid(4, 4), seed=42)
+        routes.append(pathfinder.genetic_route(matrix))
+    assert routes[0] == routes[1]
+
+
+def test_large_orders_use_the_ga_and_small_ones_held_karp():
+    pathfinder = PathFinder(10, 10, OccupancyGrid(10, 10), seed=1)
+    points = random.Random(1).sample(range(2, 100), 14)
+    pathfinder.find_shortest_path(1, 100, points[:5])
+    assert pathfinder.stats.details['solver'] == 'exact'
+    path = pathfinder.find_shortest_path(1, 100, points)
+    assert pathfinder.stats.details['solver'] == 'ga'
+    assert set(points) <= set(path)
@@ -0,0 +1,327 @@
+# tsp.py
+import logging
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+try:
+    import numpy as np
+except ImportError:  # the pure-Python GA in spa.py is used instead
+    np = None
+
+logger = logging.getLogger(__name__)
+
+INFINITY = 2 ** 62
+
+
+def held_karp(distance_matrix):
+    # Exact open-path TSP by dynamic programming over subsets.
+    # Index 0 is the fixed start, index n - 1 the fixed end; returns the visiting order.
+    n = len(distance_matrix)
+    m = n - 2
+    if m <= 1:
+        return list(range(n))
+
+    # cost[mask * m + j]: shortest path from the start through the waypoints in
+    # mask, finishing at waypoint j (waypoint j is matrix index j + 1)
+    states = (1 << m) * m
+    cost = array('q', [INFINITY]) * states
+    parent = array('b', [-1]) * states
+    legs = [[distance_matrix[j + 1][k + 1] for k in range(m)] for j in range(m)]
+
+    for j in range(m):
+        cost[(1 << j) * m + j] = distance_matrix[0][j + 1]
+
+    for mask in range(1, 1 << m):
+        base = mask * m
+        unvisited = [k for k in range(m) if not mask & (1 << k)]
+        if not unvisited:
+            continue
+        for j in range(m):
+            current = cost[base + j]
+            if current == INFINITY:
+                continue
+            row = legs[j]
+            for k in unvisited:
+                index = (mask | (1 << k)) * m + k
+                candidate = current + row[k]
+                if candidate < cost[index]:
+                    cost[index] = candidate
+                    parent[index] = j
+
+    full = (1 << m) - 1
+    last = min(range(m), key=lambda j: cost[full * m + j] + distance_matrix[j + 1][n - 1])
+
+    order = []
+    mask = full
+    while last != -1:
+        order.append(last + 1)
+        previous = parent[mask * m + last]
+        mask &= ~(1 << last)
+        last = previous
+    return [0] + order[::-1] + [n - 1]
+
+
+def route_length(route, distance_matrix):
+    return sum(distance_matrix[route[i]][route[i + 1]] for i in range(len(route) - 1))
+
+
+def two_opt(route, distance_matrix):
+    # Reverse route[i:j + 1] whenever that shortens the route; the end points stay fixed.
+    # Each move is scored from the two edges it replaces, so evaluation is O(1).
+    route = route[:]
+    d = distance_matrix
+    n = len(route)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(1, n - 2):
+            a = route[i - 1]
+            b = route[i]
+            for j in range(i + 1, n - 1):
+                c = route[j]
+                e = route[j + 1]
+                if d[a][c] + d[b][e] < d[a][b] + d[c][e]:
+                    route[i:j + 1] = route[i:j + 1][::-1]
+                    b = route[i]
+                    improved = True
+    return route
+
+
+def or_opt(route, distance_matrix, max_segment=3):
+    # Move segments of up to max_segment waypoints (either way round) to a better position.
+    # Each move is scored from the three edges it replaces, so evaluation is O(1).
+    route = route[:]
+    d = distance_matrix
+    n = len(route)
+    improved = True
+    while improved:
+        improved = False
+        for length in range(1, max_segment + 1):
+            for i in range(1, n - length):
+                j = i + length - 1
+                prev = route[i - 1]
+                first = route[i]
+                last = route[j]
+                following = route[j + 1]
+                removed = d[prev][first] + d[last][following] - d[prev][following]
+                best_delta = 0
+                best_move = None
+                for k in range(n - 1):
+                    if i - 1 <= k <= j:
+                        continue
+                    x = route[k]
+                    y = route[k + 1]
+                    forward = d[x][first] + d[last][y] - d[x][y]
+                    backward = d[x][last] + d[first][y] - d[x][y]
+                    delta = min(forward, backward) - removed
+                    if delta < best_delta:
+                        best_delta = delta
+                        best_move = (k, backward < forward)
+                if best_move is not None:
+                    k, reverse = best_move
+                    segment = route[i:j + 1]
+                    if reverse:
+                        segment.reverse()
+                    rest = route[:i] + route[j + 1:]
+                    insert_at = k + 1 if k < i else k + 1 - length
+                    route = rest[:insert_at] + segment + rest[insert_at:]
+                    improved = True
+    return route
+
+
+def improve_route(route, distance_matrix):
+    # Alternate 2-opt and Or-opt until neither finds an improving move
+    best = route_length(route, distance_matrix)
+    while True:
+        route = or_opt(two_opt(route, distance_matrix), distance_matrix)
+        length = route_length(route, distance_matrix)
+        if length >= best:
+            return route
+        best = length
+
+
+def _random_population(n, population_size, rng):
+    population = np.empty((population_size, n), dtype=np.int32)
+    population[:, 0] = 0
+    population[:, -1] = n - 1
+    population[:, 1:-1] = rng.permuted(np.tile(np.arange(1, n - 1, dtype=np.int32), (population_size, 1)), axis=1)
+    return population
+
+
+def _fitness(population, distances):
+    return distances[population[:, :-1], population[:, 1:]].sum(axis=1)
+
+
+def _rank(population, distances, distance_matrix, local_search, elite_size):
+    # Sort best-first, polishing the elites first in memetic mode
+    if local_search == 'memetic':
+        order = np.argsort(_fitness(population, distances), kind='stable')
+        population = population[order]
+        for k in range(min(elite_size, len(population))):
+            population[k] = improve_route(population[k].tolist(), distance_matrix)
+    scores = _fitness(population, distances)
+    order = np.argsort(scores, kind='stable')
+    return population[order], scores[order]
+
+
+def _breed(population, generation, mutation_rate, mutation_decay, rng):
+    # Keep the better half, refill with order crossover children and swap mutation
+    population_size, n = population.shape
+    inner = n - 2
+    survivors = population_size // 2
+    children = population_size - survivors
+    child_rows = np.arange(children)[:, None]
+    positions = np.arange(inner)
+
+    parents = population[:survivors]
+    first = parents[rng.integers(0, survivors, children), 1:-1]
+    second = parents[rng.integers(0, survivors, children), 1:-1]
+
+    # Order crossover: keep a slice of the first parent, fill the rest in the second parent's order
+    cuts = np.sort(rng.integers(0, inner, (children, 2)), axis=1)
+    in_slice = (positions >= cuts[:, :1]) & (positions < cuts[:, 1:])
+    taken = np.zeros((children, n), dtype=bool)
+    taken[np.broadcast_to(child_rows, first.shape)[in_slice], first[in_slice]] = True
+    offspring = np.where(in_slice, first, 0)
+    offspring[~in_slice] = second[~taken[child_rows, second]]
+
+    # Swap mutation on a decaying fraction of the children
+    rate = mutation_rate * (mutation_decay ** generation)
+    mutants = np.nonzero(rng.random(children) < rate)[0]
+    if len(mutants):
+        i = rng.integers(0, inner, len(mutants))
+        j = (i + rng.integers(1, inner, len(mutants))) % inner
+        swapped = offspring[mutants, i]
+        offspring[mutants, i] = offspring[mutants, j]
+        offspring[mutants, j] = swapped
+
+    next_generation = np.empty_like(population)
+    next_generation[:survivors] = parents
+    next_generation[survivors:, 0] = 0
+    next_generation[survivors:, 1:-1] = offspring
+    next_generation[survivors:, -1] = n - 1
+    return next_generation
+
+
+def vectorized_genetic_route(distance_matrix, population_size, generations, patience,
+                             mutation_rate, mutation_decay, local_search=None, elite_size=2, rng=None, curve=None):
+    # GA with the whole population held as one integer matrix (one route per row).
+    # Fitness is a single gather-and-sum over the distance matrix; selection, order
+    # crossover and swap mutation all run on arrays for the full batch at once.
+    # curve, if given, gets a (generation, best length) pair per generation.
+    rng = rng if rng is not None else np.random.default_rng()
+    distances = np.asarray(distance_matrix, dtype=np.int64)
+    n = len(distance_matrix)
+    if n - 2 < 2:
+        return list(range(n))
+
+    population = _random_population(n, population_size, rng)
+    best_fitness = None
+    generations_without_improvement = 0
+
+    for generation in range(generations):
+        population, scores = _rank(population, distances, distance_matrix, local_search, elite_size)
+
+        current_best = int(scores[0])
+        if curve is not None:
+            curve.append((generation, current_best))
+        if best_fitness is None or current_best < best_fitness:
+            best_fitness = current_best
+            generations_without_improvement = 0
+        else:
+            generations_without_improvement += 1
+        if generations_without_improvement >= patience:
+            logger.info(f"Early stopping at generation {generation}")
+            break
+
+        population = _breed(population, generation, mutation_rate, mutation_decay, rng)
+
+    best_route = population[int(np.argmin(_fitness(population, distances)))].tolist()
+    if local_search:
+        best_route = improve_route(best_route, distance_matrix)
+    return best_route
+
+
+# Per-process view of the shared distance matrix, attached on a worker's first epoch
+_shared_distances = {}
+
+
+def _attach_distances(name, n):
+    if name not in _shared_distances:
+        for old_name in list(_shared_distances):
+            _shared_distances.pop(old_name)[0].close()
+        block = shared_memory.SharedMemory(name=name)
+        distances = np.ndarray((n, n), dtype=np.int64, buffer=block.buf)
+        _shared_distances[name] = (block, distances, distances.tolist())
+    return _shared_distances[name][1:]
+
+
+def _island_epoch(name, n, population, first_generation, generations, mutation_rate, mutation_decay,
+                  local_search, elite_size, seed):
+    # Evolve one island for a fixed number of generations; runs in a worker process
+    distances, distance_matrix = _attach_distances(name, n)
+    rng = np.random.default_rng(seed)
+    for generation in range(first_generation, first_generation + generations):
+        population, _ = _rank(population, distances, distance_matrix, local_search, elite_size)
+        population = _breed(population, generation, mutation_rate, mutation_decay, rng)
+    return _rank(population, distances, distance_matrix, local_search, elite_size)
+
+
+def island_genetic_route(distance_matrix, population_size, generations, patience, mutation_rate,
+                         mutation_decay, local_search=None, elite_size=2, workers=4,
+                         migration_interval=10, migrants=2, rng=None, curve=None):
+    # Island-model GA: one population per worker process, evolving independently and
+    # passing their best routes round a ring every migration_interval generations.
+    # The distance matrix lives in shared memory so only the populations are pickled.
+    # curve, if given, gets a (generation, best length) pair per migration epoch.
+    rng = rng if rng is not None else np.random.default_rng()
+    n = len(distance_matrix)
+    if n - 2 < 2:
+        return list(range(n))
+
+    distances = np.asarray(distance_matrix, dtype=np.int64)
+    block = shared_memory.SharedMemory(create=True, size=distances.nbytes)
+    try:
+        np.ndarray(distances.shape, dtype=np.int64, buffer=block.buf)[:] = distances
+        islands = [_random_population(n, population_size, rng) for _ in range(workers)]
+        best_fitness = None
+        best_route = None
+        generations_without_improvement = 0
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for first_generation in range(0, generations, migration_interval):
+                epoch = min(migration_interval, generations - first_generation)
+                futures = [pool.submit(_island_epoch, block.name, n, island, first_generation, epoch,
+                                       mutation_rate, mutation_decay, local_search, elite_size,
+                                       int(rng.integers(2 ** 32)))
+                           for island in islands]
+                results = [future.result() for future in futures]
+                islands = [population for population, _ in results]
+
+                epoch_best = min(range(workers), key=lambda i: results[i][1][0])
+                current_best = int(results[epoch_best][1][0])
+                if curve is not None:
+                    curve.append((first_generation + epoch - 1, current_best))
+                if best_fitness is None or current_best < best_fitness:
+                    best_fitness = current_best
+                    best_route = islands[epoch_best][0].tolist()
+                    generations_without_improvement = 0
+                else:
+                    generations_without_improvement += epoch
+                if generations_without_improvement >= patience:
+                    logger.info(f"Early stopping at generation {first_generation + epoch}")
+                    break
+
+                # Ring migration: each island's elites replace the next island's worst routes
+                if workers > 1:
+                    elites = [island[:migrants].copy() for island in islands]
+                    for i in range(workers):
+                        islands[(i + 1) % workers][-migrants:] = elites[i]
+    finally:
+        block.close()
+        block.unlink()
+
+    if local_search:
+        best_route = improve_route(best_route, distance_matrix)
+    return best_route
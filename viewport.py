@@ -0,0 +1,350 @@
+# viewport.py
+import math
+from collections import OrderedDict
+
+from PIL import Image, ImageColor, ImageDraw, ImageTk
+
+from database import NO_QUANTITY
+
+TILE_PIXELS = 256  # Rough on-screen size of one tile
+MIN_TILE_CELLS = 8
+TILE_CACHE_SIZE = 256  # Rendered tiles kept across pans and zooms
+MAX_SCALE = 64  # Pixels per cell at full zoom
+ZOOM_STEP = math.sqrt(2)
+GRID_LINE_SCALE = 6  # Cell borders are drawn from this many pixels per cell
+LABEL_SCALE = 32  # ItemID labels are drawn from this many pixels per cell
+
+# Palette indices 0-2 are the base cell states; overlay colours are appended as they are used
+BASE_COLORS = ("white", "red", "gray")
+EMPTY, OUT_OF_STOCK, OBSTACLE = range(3)
+
+OVERLAY_LAYERS = ("path", "highlight")  # Bottom to top
+
+
+def cell_kind(quantity, obstacle):
+    if obstacle:
+        return OBSTACLE
+    if quantity == 0:
+        return OUT_OF_STOCK
+    return EMPTY
+
+
+def render_cells(cells, cols, r0, r1, c0, c1, width, height, palette, box=None, grid_lines=False, labels=False):
+    # Rasterise cells[r0:r1, c0:c1] (one palette index per cell, row-major with cols per row)
+    # into a width x height RGB image, one solid pixel block per cell. box is the drawn region
+    # as (left, top, right, bottom) in cells relative to (c0, r0), the whole range by default.
+    if box is None:
+        box = (0, 0, c1 - c0, r1 - r0)
+    data = b''.join(cells[r * cols + c0:r * cols + c1] for r in range(r0, r1))
+    image = Image.frombytes('P', (c1 - c0, r1 - r0), data)
+    image.putpalette(palette)
+    image = image.resize((width, height), Image.NEAREST, box=box).convert('RGB')
+    if grid_lines or labels:
+        draw = ImageDraw.Draw(image)
+        scale_x = width / (box[2] - box[0])
+        scale_y = height / (box[3] - box[1])
+        xs = [round((c - c0 - box[0]) * scale_x) for c in range(c0, c1 + 1)]
+        ys = [round((r - r0 - box[1]) * scale_y) for r in range(r0, r1 + 1)]
+        if grid_lines:
+            for x in xs:
+                draw.line([(x, 0), (x, height)], fill="black")
+            for y in ys:
+                draw.line([(0, y), (width, y)], fill="black")
+        if labels:
+            for i, r in enumerate(range(r0, r1)):
+                for j, c in enumerate(range(c0, c1)):
+                    if cells[r * cols + c] != OBSTACLE:
+                        text = str(r * cols + c + 1)
+                        left, top, right, bottom = draw.textbbox((0, 0), text)
+                        draw.text(((xs[j] + xs[j + 1] - right - left) / 2, (ys[i] + ys[i + 1] - bottom - top) / 2),
+                                  text, fill="black")
+    return image
+
+
+class ViewportRenderer:
+    # Raster view for floors too large for one canvas item per cell. The grid state is kept as
+    # one palette index per cell and drawn as image tiles; only the tiles in view are placed on
+    # the canvas, and rendered tiles are cached until one of their cells changes.
+    # Mouse wheel zooms about the pointer, dragging with the right button pans.
+    # Same drawing interface as renderer.GridRenderer, plus cell_at() for mapping clicks.
+    def __init__(self, canvas, rows, cols, size=800):
+        self.canvas = canvas
+        self.rows = rows
+        self.cols = cols
+        self.width = size
+        self.height = size
+        self.fit_scale = min(size / cols, size / rows)
+        self.max_level = max(0, math.floor(math.log(MAX_SCALE / self.fit_scale, ZOOM_STEP)))
+        self.level = 0
+        self.scale = self.fit_scale
+        self.offset_x = 0  # World pixel at the canvas's left/top edge
+        self.offset_y = 0
+        self.palette_names = list(BASE_COLORS)
+        self.palette = []
+        for name in BASE_COLORS:
+            self.palette.extend(ImageColor.getrgb(name))
+        self.quantities = None
+        self.obstacles = None
+        self.base = None
+        self.cells = None
+        self.layers = {layer: {} for layer in OVERLAY_LAYERS}
+        self.arrows = []
+        self.tiles = OrderedDict()  # (level, tile_row, tile_col) -> PhotoImage
+        self.placed = {}  # (level, tile_row, tile_col) -> (canvas item, PhotoImage)
+        self.render_pending = None
+        self.drag_from = None
+
+    def build(self, snapshot):
+        self.canvas.delete("all")
+        quantities, obstacles = snapshot
+        self.quantities = quantities[:]
+        self.obstacles = bytearray(obstacles)
+        self.base = bytearray(cell_kind(q, o) for q, o in zip(self.quantities, self.obstacles))
+        self.cells = bytearray(self.base)
+        self.layers = {layer: {} for layer in OVERLAY_LAYERS}
+        self.arrows = []
+        self.tiles.clear()
+        self.placed = {}
+        self.canvas.bind("<MouseWheel>", self.on_wheel)
+        self.canvas.bind("<Button-4>", lambda event: self.zoom(1, event.x, event.y))
+        self.canvas.bind("<Button-5>", lambda event: self.zoom(-1, event.x, event.y))
+        self.canvas.bind("<ButtonPress-3>", self.on_drag_start)
+        self.canvas.bind("<B3-Motion>", self.on_drag)
+        self.canvas.bind("<Configure>", self.on_resize)
+        self.render()
+
+    def close(self):
+        self.cancel_render()
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>", "<ButtonPress-3>", "<B3-Motion>",
+                         "<Configure>"):
+            self.canvas.unbind(sequence)
+        self.canvas.delete("all")
+
+    # --- view transform ---
+
+    def tile_span(self, level):
+        scale = self.fit_scale * ZOOM_STEP ** level
+        return max(MIN_TILE_CELLS, 2 ** math.ceil(math.log2(max(1, TILE_PIXELS / scale))))
+
+    def cell_at(self, x, y):
+        # Cell index (ItemID - 1) under a canvas point, None outside the floor.
+        # Pixel centres are used, matching how the tiles are resampled.
+        col = math.floor((x + 0.5 + self.offset_x) / self.scale)
+        row = math.floor((y + 0.5 + self.offset_y) / self.scale)
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            return row * self.cols + col
+        return None
+
+    def cell_centre(self, index):
+        row, col = divmod(index, self.cols)
+        return (col + 0.5) * self.scale - self.offset_x, (row + 0.5) * self.scale - self.offset_y
+
+    def clamp_offsets(self):
+        for attr, extent, span in (("offset_x", self.cols * self.scale, self.width),
+                                   ("offset_y", self.rows * self.scale, self.height)):
+            limit = max(0, math.ceil(extent - span))
+            setattr(self, attr, min(max(0, getattr(self, attr)), limit))
+
+    def zoom(self, steps, x, y):
+        level = min(max(0, self.level + steps), self.max_level)
+        if level == self.level:
+            return
+        # Keep the world point under the pointer fixed
+        world_x = (x + self.offset_x) / self.scale
+        world_y = (y + self.offset_y) / self.scale
+        self.level = level
+        self.scale = self.fit_scale * ZOOM_STEP ** level
+        self.offset_x = round(world_x * self.scale - x)
+        self.offset_y = round(world_y * self.scale - y)
+        self.clamp_offsets()
+        self.render()
+
+    def pan(self, dx, dy):
+        self.offset_x -= dx
+        self.offset_y -= dy
+        self.clamp_offsets()
+        self.render()
+
+    def on_wheel(self, event):
+        self.zoom(1 if event.delta > 0 else -1, event.x, event.y)
+
+    def on_drag_start(self, event):
+        self.drag_from = (event.x, event.y)
+
+    def on_drag(self, event):
+        if self.drag_from is None:
+            return
+        dx = event.x - self.drag_from[0]
+        dy = event.y - self.drag_from[1]
+        self.drag_from = (event.x, event.y)
+        self.pan(dx, dy)
+
+    def on_resize(self, event):
+        if (event.width, event.height) != (self.width, self.height) and event.width > 1 and event.height > 1:
+            self.width = event.width
+            self.height = event.height
+            self.clamp_offsets()
+            self.render()
+
+    # --- tiles ---
+
+    def render_tile(self, level, tile_row, tile_col):
+        span = self.tile_span(level)
+        scale = self.fit_scale * ZOOM_STEP ** level
+        r0 = tile_row * span
+        c0 = tile_col * span
+        r1 = min(r0 + span, self.rows)
+        c1 = min(c0 + span, self.cols)
+        x0 = round(c0 * scale)
+        y0 = round(r0 * scale)
+        # Tile edges are rounded to whole pixels, so the tile samples a slightly larger cell range
+        # through a box in floor coordinates; its pixels then agree with cell_at()
+        margin = math.ceil(1 / scale) + 1
+        mr0 = max(0, r0 - margin)
+        mc0 = max(0, c0 - margin)
+        mr1 = min(self.rows, r1 + margin)
+        mc1 = min(self.cols, c1 + margin)
+        width = round(c1 * scale) - x0
+        height = round(r1 * scale) - y0
+        box = (max(0, x0 / scale - mc0), max(0, y0 / scale - mr0),
+               min(mc1 - mc0, (x0 + width) / scale - mc0), min(mr1 - mr0, (y0 + height) / scale - mr0))
+        image = render_cells(self.cells, self.cols, mr0, mr1, mc0, mc1, width, height, self.palette, box=box,
+                             grid_lines=scale >= GRID_LINE_SCALE, labels=scale >= LABEL_SCALE)
+        return ImageTk.PhotoImage(image)
+
+    def invalidate(self, indices):
+        # Drop cached tiles, at every zoom level, that contain any of the given cells
+        indices = list(indices)
+        if not indices:
+            return
+        for level in {key[0] for key in self.tiles}:
+            span = self.tile_span(level)
+            for index in indices:
+                row, col = divmod(index, self.cols)
+                self.tiles.pop((level, row // span, col // span), None)
+        self.schedule_render()
+
+    def schedule_render(self):
+        # Coalesce a burst of cell updates into one redraw on the next idle turn
+        if self.render_pending is None:
+            self.render_pending = self.canvas.after_idle(self.render)
+
+    def cancel_render(self):
+        if self.render_pending is not None:
+            self.canvas.after_cancel(self.render_pending)
+            self.render_pending = None
+
+    def render(self):
+        self.cancel_render()
+        span = self.tile_span(self.level)
+        scale = self.scale
+        first_col = max(0, math.floor(self.offset_x / scale)) // span
+        first_row = max(0, math.floor(self.offset_y / scale)) // span
+        last_col = min(self.cols - 1, math.floor((self.offset_x + self.width) / scale)) // span
+        last_row = min(self.rows - 1, math.floor((self.offset_y + self.height) / scale)) // span
+
+        visible = {}
+        for tile_row in range(first_row, last_row + 1):
+            for tile_col in range(first_col, last_col + 1):
+                key = (self.level, tile_row, tile_col)
+                photo = self.tiles.get(key)
+                if photo is None:
+                    photo = self.tiles[key] = self.render_tile(*key)
+                else:
+                    self.tiles.move_to_end(key)
+                x = round(tile_col * span * scale) - self.offset_x
+                y = round(tile_row * span * scale) - self.offset_y
+                placed = self.placed.pop(key, None)
+                if placed is None:
+                    item = self.canvas.create_image(x, y, anchor="nw", image=photo, tags="tile")
+                else:
+                    item = placed[0]
+                    self.canvas.coords(item, x, y)
+                    if placed[1] is not photo:
+                        self.canvas.itemconfig(item, image=photo)
+                visible[key] = (item, photo)
+        for item, _ in self.placed.values():
+            self.canvas.delete(item)
+        self.placed = visible
+
+        # Evict least recently used tiles, never the ones on screen
+        for key in list(self.tiles):
+            if len(self.tiles) <= TILE_CACHE_SIZE:
+                break
+            if key not in visible:
+                del self.tiles[key]
+
+        self.canvas.delete("arrow")
+        for start_point, end_point in self.arrows:
+            self.draw_arrow(start_point, end_point)
+
+    # --- drawing interface shared with GridRenderer ---
+
+    def refresh_cell(self, index):
+        kind = self.base[index] = cell_kind(self.quantities[index], self.obstacles[index])
+        for layer in OVERLAY_LAYERS:
+            kind = self.layers[layer].get(index, kind)
+        if kind != self.cells[index]:
+            self.cells[index] = kind
+            return True
+        return False
+
+    def sync(self, snapshot):
+        quantities, obstacles = snapshot
+        if quantities == self.quantities and obstacles == self.obstacles:
+            return
+        changed = []
+        for index in range(self.rows * self.cols):
+            if quantities[index] != self.quantities[index] or obstacles[index] != self.obstacles[index]:
+                self.quantities[index] = quantities[index]
+                self.obstacles[index] = obstacles[index]
+                if self.refresh_cell(index):
+                    changed.append(index)
+        self.invalidate(changed)
+
+    def set_obstacle(self, point, is_obstacle):
+        self.obstacles[point - 1] = 1 if is_obstacle else 0
+        if self.refresh_cell(point - 1):
+            self.invalidate([point - 1])
+
+    def set_quantity(self, point, quantity):
+        self.quantities[point - 1] = NO_QUANTITY if quantity is None else quantity
+        if self.refresh_cell(point - 1):
+            self.invalidate([point - 1])
+
+    def color_index(self, color):
+        if color not in self.palette_names:
+            self.palette_names.append(color)
+            self.palette.extend(ImageColor.getrgb(color))
+        return self.palette_names.index(color)
+
+    def clear_layer(self, layer):
+        if layer == "arrow":
+            self.arrows = []
+            self.canvas.delete("arrow")
+            return
+        marked = self.layers[layer]
+        self.layers[layer] = {}
+        self.invalidate([index for index in marked if self.refresh_cell(index)])
+
+    def clear_overlays(self):
+        for layer in OVERLAY_LAYERS + ("arrow",):
+            self.clear_layer(layer)
+
+    def mark_cell(self, point, color, layer="highlight", text_color="green"):
+        # Marks are painted into the tiles; at label zoom the ItemID is drawn in black whatever text_color is
+        self.layers[layer][point - 1] = self.color_index(color)
+        if self.refresh_cell(point - 1):
+            self.invalidate([point - 1])
+
+    def draw_arrow(self, start_point, end_point):
+        start_x, start_y = self.cell_centre(start_point - 1)
+        end_x, end_y = self.cell_centre(end_point - 1)
+        if (max(start_x, end_x) < 0 or min(start_x, end_x) > self.width or
+                max(start_y, end_y) < 0 or min(start_y, end_y) > self.height):
+            return
+        self.canvas.create_line(start_x, start_y, end_x, end_y, arrow="last", fill="black", tags="arrow")
+
+    def arrow(self, start_point, end_point):
+        self.arrows.append((start_point, end_point))
+        self.draw_arrow(start_point, end_point)